@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Count, Max
 
 # Create your models here.
 
@@ -13,10 +14,23 @@ class Company(models.Model):
     # Campos para el cliente (Universidad Estatal de Milagro)
     client_name = models.CharField(max_length=255, default="Universidad Estatal de Milagro", verbose_name="Nombre del Cliente Fijo")
     client_ruc = models.CharField(max_length=20, verbose_name="RUC del Cliente")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Modificación")  # Validador para GET condicional
 
     def __str__(self):
         return f"{self.name} (Cliente: {self.client_name})"
 
+    @classmethod
+    def get_last_modified(cls, pk):
+        """Validador barato para GET condicional. None si la compañía no existe."""
+        return cls.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+
+    @classmethod
+    def get_list_version(cls):
+        """Versión del listado de compañías: cambia con cualquier alta, edición o baja."""
+        data = cls.objects.aggregate(count=Count('id'), last_modified=Max('updated_at'))
+        last_modified = data['last_modified'].isoformat() if data['last_modified'] else ''
+        return f"{data['count']}:{last_modified}"
+
     @property
     def get_current_iva(self):
         """Devuelve el porcentaje de IVA actual de la compañía."""
@@ -0,0 +1,73 @@
+"""
+Compañía activa por petición: una misma instalación atiende a varias estaciones.
+
+ActiveCompanyMiddleware deja en request.company la compañía elegida en la sesión (selector
+del menú lateral) o, para las integraciones, la indicada en la cabecera X-Company-Id. Sin
+ninguna de las dos se usa la primera compañía, como antes de haber varias. Se resuelve de
+forma perezosa: las peticiones que no la usan no hacen la consulta.
+
+Los datos de tickets en caché se guardan bajo el espacio de su compañía (company_cache_key),
+así una estación no lee ni invalida las entradas de otra.
+"""
+from django.utils.functional import SimpleLazyObject
+
+from apps.company.models import Company
+
+SESSION_KEY = 'company_id'
+HEADER = 'X-Company-Id'
+
+
+def _get_company(company_id):
+    try:
+        return Company.objects.filter(pk=int(company_id)).first()
+    except (TypeError, ValueError):
+        return None
+
+
+def resolve_company(request):
+    """Compañía activa de la petición, o None si la cabecera no corresponde a ninguna."""
+    if request.headers.get(HEADER):
+        # Una integración que indica la compañía no debe recibir datos de otra
+        return _get_company(request.headers[HEADER])
+    company_id = request.session.get(SESSION_KEY) if hasattr(request, 'session') else None
+    company = _get_company(company_id) if company_id else None
+    return company or Company.objects.first()
+
+
+class ActiveCompanyMiddleware:
+    """Agrega request.company (perezosa). Debe ir después de SessionMiddleware."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.company = SimpleLazyObject(lambda: resolve_company(request))
+        return self.get_response(request)
+
+
+def for_company(queryset, company, field='company'):
+    """Filtra el queryset a la compañía; sin compañía activa no devuelve nada."""
+    if not company:
+        return queryset.none()
+    return queryset.filter(**{f'{field}_id': company.pk})
+
+
+class CompanyScopedMixin:
+    """Restringe el queryset de la vista a la compañía activa."""
+    company_field = 'company'
+
+    def get_queryset(self):
+        return for_company(super().get_queryset(), self.request.company, self.company_field)
+
+
+def company_cache_key(company_id, *parts):
+    """Clave de caché dentro del espacio de la compañía."""
+    return ':'.join(['company', str(company_id), *(str(part) for part in parts)])
+
+
+def active_company(request):
+    """Context processor: compañía activa y compañías para el selector del menú."""
+    return {
+        'active_company': getattr(request, 'company', None),
+        'companies': Company.objects.only('id', 'name'),
+    }
@@ -5,6 +5,8 @@ from .views import (
     CompanyCreateView,
     CompanyUpdateView,
     CompanyDeleteView,
+    api_company_detail,
+    select_company,
 )
 
 app_name = 'company'
@@ -14,5 +16,7 @@ urlpatterns = [
     path('<int:pk>/', CompanyDetailView.as_view(), name='company_detail'),
     path('create/', CompanyCreateView.as_view(), name='company_create'),
     path('update/<int:pk>/', CompanyUpdateView.as_view(), name='company_update'),
-    path('delete/<int:pk>/', CompanyDeleteView.as_view(), name='company_delete')
+    path('delete/<int:pk>/', CompanyDeleteView.as_view(), name='company_delete'),
+    path('api/<int:pk>/', api_company_detail, name='api_company_detail'),
+    path('seleccionar/', select_company, name='select_company'),
 ]
@@ -5,6 +5,13 @@ from django.urls import reverse_lazy
 from django.contrib import messages
 from django.shortcuts import redirect, get_object_or_404
 from django.db.models import Q
+from django.views.decorators.http import require_GET, require_POST
+from apps.company.tenancy import SESSION_KEY
+from apps.core.api import ApiError, conditional_json, error_response, parse_fields, pick
+from apps.core.conditional import ConditionalGetMixin, make_etag
+from apps.core.fragments import FragmentListMixin
+from apps.ticket.models import Ticket
+from apps.ticket.services.purge import enqueue_company_purge
 from .models import Company
 from .forms import CompanyForm
 
@@ -14,14 +21,6 @@ class CompanyCreateView(CreateView):
     template_name = 'company/modal_form.html'
     success_url = reverse_lazy('company:company_list')
 
-    def get(self, request, *args, **kwargs):
-        if Company.objects.exists():
-            from django.contrib import messages
-            from django.shortcuts import redirect
-            messages.warning(request, 'Solo se permite crear una compañía.')
-            return redirect('company:company_list')
-        return super().get(request, *args, **kwargs)
-
     def form_valid(self, form):
         response = super().form_valid(form)
         messages.success(self.request, f'Compañía "{self.object.name}" creada exitosamente.')
@@ -51,9 +50,10 @@ class CompanyUpdateView(UpdateView):
         return super().form_invalid(form)
 
 
-class CompanyListView(ListView):
+class CompanyListView(FragmentListMixin, ListView):
     model = Company
     template_name = 'company/company_list.html'
+    fragment_template_name = 'fragments/company_list_results.html'
     context_object_name = 'companies'
     paginate_by = 10  
 
@@ -67,21 +67,26 @@ class CompanyListView(ListView):
             )
         return queryset
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['can_create_company'] = not Company.objects.exists()
-        # Breadcrumbs
-        context['breadcrumb_list'] = [
-            {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
-            {'label': 'Compañías'}
-        ]
-        return context
+    def get_fragment_version(self):
+        return Company.get_list_version()
 
-class CompanyDetailView(DetailView):
+    def get_layout_context(self):
+        return {
+            # Breadcrumbs
+            'breadcrumb_list': [
+                {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
+                {'label': 'Compañías'}
+            ],
+        }
+
+class CompanyDetailView(ConditionalGetMixin, DetailView):
     model = Company
     template_name = 'company/company_detail.html'
     context_object_name = 'company'
 
+    def get_last_modified(self):
+        return Company.get_last_modified(self.kwargs['pk'])
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         # Breadcrumbs
@@ -100,8 +105,64 @@ class CompanyDeleteView(DeleteView):
     def post(self, request, *args, **kwargs):
         self.object = self.get_object()
         company_name = self.object.name
-        self.object.delete()
-        messages.success(self.request, f'Compañía "{company_name}" eliminada exitosamente.')
+        if Ticket.objects.filter(company=self.object).exists():
+            # La cascada de años de tickets no cabe en una petición: se elimina por lotes en segundo plano
+            enqueue_company_purge(self.object)
+            messages.info(
+                self.request,
+                f'La compañía "{company_name}" y sus tickets se eliminarán en segundo plano; '
+                'los tickets quedarán disponibles en el archivo.'
+            )
+        else:
+            self.object.delete()
+            messages.success(self.request, f'Compañía "{company_name}" eliminada exitosamente.')
         if request.headers.get('x-requested-with') == 'XMLHttpRequest':
             return JsonResponse({'redirect_url': str(self.success_url)})
-        return super().post(request, *args, **kwargs)
+        return redirect(self.success_url)
+
+
+# Campos públicos de la compañía para la API (sin la clave de acceso del SRI)
+COMPANY_API_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'ruc': 'ruc',
+    'phone': 'phone',
+    'address': 'address',
+    'iva_percentage': 'iva_percentage',
+    'client_name': 'client_name',
+    'client_ruc': 'client_ruc',
+    'updated_at': 'updated_at',
+}
+
+
+@require_GET
+def api_company_detail(request, pk):
+    """Compañía en JSON (parámetro fields), con ETag y Last-Modified."""
+    try:
+        fields = parse_fields(request.GET.get('fields'), COMPANY_API_FIELDS, COMPANY_API_FIELDS)
+    except ApiError as error:
+        return error_response(error)
+
+    last_modified = Company.get_last_modified(pk)
+    if last_modified is None:
+        return JsonResponse({'error': 'Compañía no encontrada.'}, status=404)
+    etag = make_etag(last_modified, 'api', ','.join(fields))
+
+    def build():
+        row = Company.objects.filter(pk=pk).values(*{COMPANY_API_FIELDS[name] for name in fields}).first()
+        return pick(row, fields, COMPANY_API_FIELDS)
+
+    return conditional_json(request, etag, build, last_modified)
+
+
+@require_POST
+def select_company(request):
+    """Cambia la compañía (estación) activa de la sesión."""
+    company_id = request.POST.get('company', '')
+    company = Company.objects.filter(pk=company_id).first() if company_id.isdigit() else None
+    if company is None:
+        messages.error(request, 'Compañía no encontrada.')
+    else:
+        request.session[SESSION_KEY] = company.pk
+        messages.success(request, f'Compañía activa: {company.name}.')
+    return redirect('core:dashboard')
@@ -0,0 +1,94 @@
+"""
+Utilidades de la API JSON de solo lectura (tickets, detalles y compañía).
+
+Las integraciones eligen los campos con ?fields=a,b,c: la vista pide a la base solo esas
+columnas con values(), sin instanciar modelos ni renderizar plantillas. Las respuestas
+llevan ETag y los clientes que repiten la consulta con If-None-Match reciben 304 sin que
+se ejecute la consulta principal.
+"""
+import base64
+import hashlib
+import json
+
+from django.conf import settings
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class ApiError(ValueError):
+    """Parámetro inválido; la vista responde 400 con el mensaje."""
+
+
+def error_response(error):
+    return JsonResponse({'error': str(error)}, status=400)
+
+
+def parse_fields(value, allowed, default):
+    """
+    Campos pedidos en `value` ("a,b,c") validados contra `allowed` (nombre -> ruta del ORM).
+    Sin valor devuelve `default`. Conserva el orden pedido.
+    """
+    if not value:
+        return tuple(default)
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise ApiError(f'Campos desconocidos: {", ".join(unknown)}. Disponibles: {", ".join(allowed)}.')
+    return fields
+
+
+def parse_limit(value):
+    if not value:
+        return DEFAULT_LIMIT
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ApiError('limit debe ser un entero.')
+    if limit <= 0:
+        raise ApiError('limit debe ser mayor que 0.')
+    return min(limit, MAX_LIMIT)
+
+
+def encode_cursor(*values):
+    """Cursor opaco con los valores de orden de la última fila entregada."""
+    return base64.urlsafe_b64encode(json.dumps(values).encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(value):
+    try:
+        return json.loads(base64.urlsafe_b64decode(value.encode('ascii')))
+    except (ValueError, UnicodeError):
+        raise ApiError('cursor inválido.')
+
+
+def pick(row, fields, paths):
+    """Fila de values() con los nombres públicos de los campos pedidos."""
+    return {name: row[paths[name]] for name in fields}
+
+
+def make_version_etag(version, *variant):
+    """ETag de un listado a partir de la versión de sus datos y de la consulta."""
+    parts = [settings.RELEASE_VERSION, str(version), *(str(part) for part in variant)]
+    return hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+def conditional_json(request, etag, build, last_modified=None):
+    """
+    Responde 304 si el cliente ya tiene `etag`; si no, JSON con el resultado de build().
+    build solo se llama cuando hay que generar el cuerpo.
+    """
+    etag = quote_etag(etag)
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is None:
+        response = JsonResponse(build())
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    # El cliente puede guardar la respuesta pero debe revalidarla
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
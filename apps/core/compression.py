@@ -0,0 +1,74 @@
+"""
+Compresión de respuestas y de archivos estáticos.
+
+CompressionMiddleware comprime con gzip las páginas y exportaciones de texto (impresión masiva,
+listados, CSV, JSON de la API), incluidas las respuestas en streaming: cada bloque se comprime
+y se envía a medida que se genera, sin esperar el cuerpo completo. No toca el stream SSE, que
+debe llegar evento por evento, ni los formatos ya comprimidos (xlsx, imágenes).
+
+CompressedManifestStaticFilesStorage agrega el hash del contenido al nombre de cada estático
+(caché de larga duración en el navegador) y deja junto a cada archivo de texto su versión .gz,
+que nginx entrega directamente con gzip_static.
+"""
+import gzip
+import os
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.middleware.gzip import GZipMiddleware
+
+COMPRESSIBLE_TYPES = {
+    'text/html',
+    'text/plain',
+    'text/csv',
+    'text/css',
+    'application/json',
+    'application/javascript',
+}
+COMPRESSIBLE_EXTENSIONS = ('.css', '.js', '.json', '.svg', '.txt', '.xml', '.map', '.html')
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware limitado a tipos de texto y, en respuestas completas, a cuerpos de al menos
+    COMPRESSION_MIN_BYTES (comprimir una respuesta chica no ahorra nada). Las respuestas en
+    streaming se comprimen siempre que su tipo lo permita.
+    """
+
+    def process_response(self, request, response):
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+        if not response.streaming and len(response.content) < settings.COMPRESSION_MIN_BYTES:
+            return response
+        return super().process_response(request, response)
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Estáticos con hash en el nombre y copia .gz precomprimida para nginx."""
+
+    def post_process(self, paths, dry_run=False, **options):
+        processed_names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run=dry_run, **options):
+            if not isinstance(processed, Exception):
+                processed_names.update(filter(None, (name, hashed_name)))
+            yield name, hashed_name, processed
+        if dry_run:
+            return
+        for name in processed_names:
+            if name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.write_compressed(name)
+
+    def write_compressed(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            content = source.read()
+        # mtime=0: el mismo archivo produce siempre el mismo .gz
+        compressed = gzip.compress(content, compresslevel=9, mtime=0)
+        if len(compressed) >= len(content):
+            return
+        with open(f'{path}.gz', 'wb') as target:
+            target.write(compressed)
+        # gzip_static compara las fechas: el .gz no debe quedar más viejo que el original
+        stat = os.stat(path)
+        os.utime(f'{path}.gz', (stat.st_atime, stat.st_mtime))
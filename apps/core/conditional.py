@@ -0,0 +1,60 @@
+"""
+Soporte de GET condicional (ETag / Last-Modified) para vistas de detalle.
+
+Las vistas obtienen primero un validador barato (la fecha de última modificación leída
+con una consulta de una sola fila) y, si el navegador ya tiene la misma versión,
+responden 304 Not Modified sin ejecutar las consultas ni renderizar la plantilla.
+make_etag es la misma función que deben usar las cachés de impresión o la API para
+que todos compartan el validador.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(last_modified, *variant):
+    """
+    ETag a partir de la última modificación y de las variantes de la representación
+    (por ejemplo el tamaño de impresión). Incluye RELEASE_VERSION para invalidar
+    las copias del navegador cuando cambian las plantillas en un despliegue.
+    """
+    parts = [settings.RELEASE_VERSION, last_modified.isoformat(), *(str(part) for part in variant)]
+    return hashlib.md5('|'.join(parts).encode('utf-8')).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    Mixin para DetailView. Las subclases implementan get_last_modified() (sin cargar el objeto)
+    y opcionalmente get_etag_variant() si la misma URL tiene varias representaciones.
+    """
+
+    def get_last_modified(self):
+        raise NotImplementedError('Las subclases deben implementar get_last_modified().')
+
+    def get_etag_variant(self):
+        return ()
+
+    def get(self, request, *args, **kwargs):
+        last_modified = self.get_last_modified()
+        if last_modified is None:
+            # El objeto no existe: la vista normal responde 404
+            return super().get(request, *args, **kwargs)
+
+        etag = quote_etag(make_etag(last_modified, *self.get_etag_variant()))
+        timestamp = int(last_modified.timestamp())
+
+        response = None
+        # Con mensajes pendientes hay que renderizar para mostrarlos
+        if not len(get_messages(request)):
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+        # El navegador puede guardar la página pero debe revalidarla en cada visita
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
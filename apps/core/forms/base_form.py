@@ -4,9 +4,15 @@ Estilo profesional, contable y administrativo, similar a sistemas ERP.
 Tema claro con Tailwind CSS, colores neutros (slate, gray, zinc).
 Incluye soporte completo para widgets comunes en aplicaciones administrativas.
 """
+import copy
+
 from django import forms
 
 
+# Memo de clases CSS por (clase de formulario, tipo de widget)
+_WIDGET_CLASSES_CACHE = {}
+
+
 class BaseFormMixin:
     """
     Mixin base para formularios que aplica clases CSS automáticamente a los widgets.
@@ -107,14 +113,42 @@ class BaseFormMixin:
     NUMBER_CLASSES = INPUT_CLASSES  # Mismo estilo que inputs normales
 
     def __init__(self, *args, **kwargs):
+        # Los estilos se calculan una sola vez por clase sobre base_fields;
+        # cada instancia los hereda al copiar los campos en Form.__init__.
+        self.prepare_base_fields()
         super().__init__(*args, **kwargs)
-        self.apply_widget_classes()
+
+    def prepare_base_fields(self):
+        """
+        Aplica prepare_field a los base_fields de la clase la primera vez que se instancia.
+        Se trabaja sobre una copia para no modificar campos compartidos con la clase padre.
+        """
+        cls = type(self)
+        if cls.__dict__.get('_base_fields_prepared'):
+            return
+        base_fields = copy.deepcopy(cls.base_fields)
+        for field in base_fields.values():
+            self.prepare_field(field)
+        cls.base_fields = base_fields
+        cls._base_fields_prepared = True
+
+    def prepare_field(self, field):
+        """Configuración por campo que se precalcula a nivel de clase."""
+        self.apply_field_classes(field)
 
     def get_widget_classes(self, widget):
         """
         Método helper para obtener clases CSS según el tipo de widget.
-        Centraliza la lógica y evita repetición.
+        Memoizado por (clase de formulario, tipo de widget).
         """
+        key = (type(self), type(widget))
+        classes = _WIDGET_CLASSES_CACHE.get(key)
+        if classes is None:
+            classes = _WIDGET_CLASSES_CACHE[key] = self._compute_widget_classes(widget)
+        return classes
+
+    def _compute_widget_classes(self, widget):
+        """Centraliza la lógica de clases por tipo de widget y evita repetición."""
         if isinstance(widget, (forms.TextInput, forms.EmailInput, forms.URLInput)):
             return self.get_input_classes()
         elif isinstance(widget, forms.PasswordInput):
@@ -151,53 +185,61 @@ class BaseFormMixin:
 
     def apply_widget_classes(self):
         """
-        Aplica clases CSS a los widgets según su tipo.
+        Aplica clases CSS a los widgets de la instancia.
+        Ya no es necesario llamarlo en __init__ (los base_fields vienen estilizados);
+        se mantiene para campos agregados dinámicamente. Es idempotente.
+        """
+        for field in self.fields.values():
+            self.apply_field_classes(field)
+
+    def apply_field_classes(self, field):
+        """
+        Aplica clases CSS al widget de un campo según su tipo.
         Maneja placeholders, tipos de input, y estados readonly/disabled.
         No sobreescribe clases existentes. Ignora HiddenInput.
         """
-        for field_name, field in self.fields.items():
-            widget = field.widget
-
-            # Ignorar HiddenInput explícitamente
-            if isinstance(widget, forms.HiddenInput):
-                continue
-
-            # Obtener clases existentes del widget
-            existing_classes = widget.attrs.get('class', '')
-
-            # Aplicar clases base solo si no existen
-            if not existing_classes:
-                base_classes = self.get_widget_classes(widget)
-                if base_classes:
-                    widget.attrs['class'] = base_classes
-
-                # Configuraciones específicas por tipo
-                if isinstance(widget, forms.Textarea) and 'rows' not in widget.attrs:
-                    widget.attrs['rows'] = 3
-                elif isinstance(widget, forms.DateInput):
-                    widget.attrs['type'] = 'date'
-                    if self.DATE_ICON_CLASSES:
-                        self.add_classes_to_widget(widget, self.DATE_ICON_CLASSES)
-                elif isinstance(widget, forms.TimeInput):
-                    widget.attrs['type'] = 'time'
-                    if self.TIME_ICON_CLASSES:
-                        self.add_classes_to_widget(widget, self.TIME_ICON_CLASSES)
-                elif isinstance(widget, forms.DateTimeInput):
-                    widget.attrs['type'] = 'datetime-local'
-
-            # Agregar placeholder si no existe y hay label (configurable)
-            if isinstance(widget, (forms.TextInput, forms.EmailInput, forms.URLInput, forms.NumberInput, forms.PasswordInput, forms.Textarea)):
-                if 'placeholder' not in widget.attrs and field.label and self.PLACEHOLDER_FORMAT:
-                    if self.PLACEHOLDER_FORMAT == 'label':
-                        widget.attrs['placeholder'] = field.label
-                    elif self.PLACEHOLDER_FORMAT == 'ej_label':
-                        widget.attrs['placeholder'] = f'Ej: {field.label}'
-
-            # Manejar estados readonly y disabled usando helper
-            if widget.attrs.get('readonly'):
-                self.add_classes_to_widget(widget, self.READONLY_CLASSES)
-            if widget.attrs.get('disabled'):
-                self.add_classes_to_widget(widget, self.DISABLED_CLASSES)
+        widget = field.widget
+
+        # Ignorar HiddenInput explícitamente
+        if isinstance(widget, forms.HiddenInput):
+            return
+
+        # Obtener clases existentes del widget
+        existing_classes = widget.attrs.get('class', '')
+
+        # Aplicar clases base solo si no existen
+        if not existing_classes:
+            base_classes = self.get_widget_classes(widget)
+            if base_classes:
+                widget.attrs['class'] = base_classes
+
+            # Configuraciones específicas por tipo
+            if isinstance(widget, forms.Textarea) and 'rows' not in widget.attrs:
+                widget.attrs['rows'] = 3
+            elif isinstance(widget, forms.DateInput):
+                widget.attrs['type'] = 'date'
+                if self.DATE_ICON_CLASSES:
+                    self.add_classes_to_widget(widget, self.DATE_ICON_CLASSES)
+            elif isinstance(widget, forms.TimeInput):
+                widget.attrs['type'] = 'time'
+                if self.TIME_ICON_CLASSES:
+                    self.add_classes_to_widget(widget, self.TIME_ICON_CLASSES)
+            elif isinstance(widget, forms.DateTimeInput):
+                widget.attrs['type'] = 'datetime-local'
+
+        # Agregar placeholder si no existe y hay label (configurable)
+        if isinstance(widget, (forms.TextInput, forms.EmailInput, forms.URLInput, forms.NumberInput, forms.PasswordInput, forms.Textarea)):
+            if 'placeholder' not in widget.attrs and field.label and self.PLACEHOLDER_FORMAT:
+                if self.PLACEHOLDER_FORMAT == 'label':
+                    widget.attrs['placeholder'] = field.label
+                elif self.PLACEHOLDER_FORMAT == 'ej_label':
+                    widget.attrs['placeholder'] = f'Ej: {field.label}'
+
+        # Manejar estados readonly y disabled usando helper
+        if widget.attrs.get('readonly'):
+            self.add_classes_to_widget(widget, self.READONLY_CLASSES)
+        if widget.attrs.get('disabled'):
+            self.add_classes_to_widget(widget, self.DISABLED_CLASSES)
 
 
 class BaseModelForm(BaseFormMixin, forms.ModelForm):
@@ -207,13 +249,12 @@ class BaseModelForm(BaseFormMixin, forms.ModelForm):
     Hereda estilos consistentes del BaseFormMixin.
     """
 
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
+    def prepare_field(self, field):
+        super().prepare_field(field)
 
-        # Marcar campos requeridos con asterisco en el label
-        for field_name, field in self.fields.items():
-            if field.required and field.label:
-                field.label = f'{field.label} *'
+        # Marcar campos requeridos con asterisco en el label (después del placeholder)
+        if field.required and field.label:
+            field.label = f'{field.label} *'
 
     class Meta:
         abstract = True
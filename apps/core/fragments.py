@@ -0,0 +1,84 @@
+"""
+Respuestas parciales para los listados con filtros y paginación.
+
+Cuando la petición llega por XHR (cabecera X-Requested-With), la vista devuelve solo el
+fragmento de resultados (tabla y paginación) en lugar de la página completa: no se
+renderiza el layout ni se calcula su contexto (breadcrumbs, opciones de los filtros).
+El HTML del fragmento se guarda en la caché por cadena de consulta; la clave incluye
+la versión de los datos que muestra el listado, así que un cambio deja inaccesibles los
+fragmentos anteriores sin tener que borrarlos. El ETag permite además al navegador
+revalidar su copia y recibir un 304 sin cuerpo.
+"""
+import hashlib
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+
+FRAGMENT_CACHE_TIMEOUT = 5 * 60
+
+
+class FragmentListMixin:
+    """
+    Mixin para ListView. Las subclases definen fragment_template_name, implementan
+    get_fragment_version() (consulta barata que cambia cuando cambian los datos listados)
+    y devuelven el contexto exclusivo de la página completa en get_layout_context().
+    """
+    fragment_template_name = None
+    fragment_cache_timeout = FRAGMENT_CACHE_TIMEOUT
+
+    def is_fragment_request(self):
+        return self.request.headers.get('x-requested-with') == 'XMLHttpRequest'
+
+    def get_fragment_version(self):
+        raise NotImplementedError('Las subclases deben implementar get_fragment_version().')
+
+    def get_layout_context(self):
+        return {}
+
+    def get_template_names(self):
+        if self.is_fragment_request():
+            return [self.fragment_template_name]
+        return super().get_template_names()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Filtros actuales sin la página, para que la paginación los conserve
+        query = self.request.GET.copy()
+        query.pop('page', None)
+        context['page_query'] = query.urlencode()
+        if not self.is_fragment_request():
+            context.update(self.get_layout_context())
+        return context
+
+    def get_fragment_cache_key(self):
+        query = sorted((key, sorted(values)) for key, values in self.request.GET.lists())
+        digest = hashlib.md5(json.dumps([self.request.path, query]).encode('utf-8')).hexdigest()
+        return f'fragment:{settings.RELEASE_VERSION}:{self.get_fragment_version()}:{digest}'
+
+    def get(self, request, *args, **kwargs):
+        if not self.is_fragment_request():
+            response = super().get(request, *args, **kwargs)
+            # La misma URL devuelve página o fragmento según la cabecera
+            patch_vary_headers(response, ['X-Requested-With'])
+            return response
+
+        cache_key = self.get_fragment_cache_key()
+        etag = quote_etag(hashlib.md5(cache_key.encode('utf-8')).hexdigest())
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            content = cache.get(cache_key)
+            if content is None:
+                response = super().get(request, *args, **kwargs)
+                response.render()
+                cache.set(cache_key, response.content, self.fragment_cache_timeout)
+            else:
+                response = HttpResponse(content)
+
+        response['ETag'] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ['X-Requested-With'])
+        return response
@@ -0,0 +1,177 @@
+import json
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.company.models import Company
+from apps.company.tenancy import HEADER
+from apps.core.query_plans import analyze_query, baseline_entry, compare_costs, explainable
+from apps.ticket.models import Ticket, TicketDetail
+
+DEFAULT_BASELINE = settings.BASE_DIR / 'deploy' / 'query_plans.json'
+SEED_SELLERS = ['Ana Torres', 'Carlos Mena', 'Luis Vera', 'María Paz', 'Pedro Solís', 'Rosa León']
+SEED_PRODUCTS = [('Diesel', Decimal('1.03700000')), ('Extra', Decimal('2.72000000')), ('Súper', Decimal('3.50000000'))]
+# Sin caché: todas las consultas de cada vista llegan a la base
+NO_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+
+
+class Command(BaseCommand):
+    help = (
+        'Chequea los planes de consulta (EXPLAIN) de las vistas más usadas sobre datos generados: marca '
+        'lecturas secuenciales y ordenamientos grandes sin índice, y compara el costo estimado con la '
+        'línea base. Todo se ejecuta en una transacción que se revierte al final. Solo PostgreSQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Archivo JSON de la línea base')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Guardar los costos y hallazgos actuales como línea base')
+        parser.add_argument('--tickets', type=int, default=5000, help='Tickets generados por compañía')
+        parser.add_argument('--companies', type=int, default=3, help='Compañías generadas')
+        parser.add_argument('--existing-data', action='store_true',
+                            help='Usar los datos actuales en lugar de generar tickets')
+        parser.add_argument('--min-rows', type=int, default=1000,
+                            help='Filas a partir de las que una lectura secuencial u ordenamiento se marca')
+        parser.add_argument('--tolerance', type=float, default=0.2,
+                            help='Aumento de costo aceptado respecto de la línea base (0.2 = 20 %%)')
+
+    def seed(self, companies, tickets_per_company):
+        """Compañías con tickets repartidos en el último año, con 1 a 3 detalles cada uno."""
+        rng = random.Random(2026)
+        created = []
+        for index in range(companies):
+            company = Company.objects.create(
+                name=f'Estación plan {index + 1}', ruc=f'PLAN{index:09d}', phone='0000000000',
+                sri_access_key='-', address='-', client_ruc='0000000000001',
+            )
+            numbers = Ticket.reserve_document_numbers(company.pk, tickets_per_company)
+            Ticket.objects.bulk_create([
+                Ticket(
+                    company=company, document_number=number, seller=rng.choice(SEED_SELLERS),
+                    client=company.client_name, ci_ruc=company.client_ruc,
+                    plate=f'{rng.choice("ABGMPU")}{rng.choice("ABCT")}{rng.choice("AEIO")}-{rng.randint(0, 9999):04d}',
+                    total=Decimal(rng.randint(500, 9000)) / 100,
+                )
+                for number in numbers
+            ], batch_size=2000)
+            created.append(company)
+
+        company_ids = [company.pk for company in created]
+        with connection.cursor() as cursor:
+            # date es auto_now_add: las fechas del último año se asignan después de insertar
+            cursor.execute(
+                """
+                UPDATE ticket_ticket SET date = %s - (id %% 365) * interval '1 day' - (id %% 1440) * interval '1 minute'
+                WHERE company_id = ANY(%s)
+                """,
+                [timezone.now(), company_ids],
+            )
+        tickets = Ticket.objects.filter(company_id__in=company_ids).values_list('pk', 'date')
+        details = []
+        for ticket_id, ticket_date in tickets.iterator(chunk_size=2000):
+            for product, unit_price in rng.sample(SEED_PRODUCTS, rng.randint(1, 3)):
+                details.append(TicketDetail(
+                    ticket_id=ticket_id, ticket_date=ticket_date, product=product,
+                    quantity=Decimal(rng.randint(100, 5000)) / 100, unit_price=unit_price,
+                ))
+        TicketDetail.objects.bulk_create(details, batch_size=2000)
+        with connection.cursor() as cursor:
+            # Estadísticas al día para que el planificador vea el volumen generado
+            cursor.execute('ANALYZE ticket_ticket')
+            cursor.execute('ANALYZE ticket_ticketdetail')
+        return created[0]
+
+    def scenarios(self, company):
+        """(nombre, función, tablas donde se acepta una lectura secuencial)."""
+        client = Client(headers={HEADER: str(company.pk)})
+        secure = not settings.DEBUG
+        yesterday = (timezone.localdate() - timedelta(days=1)).isoformat()
+        seller = SEED_SELLERS[0]
+
+        def get(name, **params):
+            return lambda: client.get(reverse(name), params, secure=secure)
+
+        def generate_document_number():
+            Ticket(company_id=company.pk).generate_document_number()
+
+        return [
+            ('Listado de tickets', get('ticket:ticket_list'), ()),
+            ('Listado: búsqueda', get('ticket:ticket_list', search='Mena'), ()),
+            ('Listado: vendedor', get('ticket:ticket_list', seller=seller), ()),
+            ('Dashboard', get('core:dashboard'), ()),
+            ('Impresión en masa', get('ticket:ticket_mass_print', date_from=yesterday, date_to=yesterday), ()),
+            # La exportación lee todos los tickets de la compañía: una lectura secuencial es razonable
+            ('Exportación Excel', get('ticket:ticket_export_excel'), ('ticket_ticket', 'ticket_ticketdetail')),
+            ('Número de documento', generate_document_number, ()),
+        ]
+
+    def check_scenario(self, run, allowed_tables, min_rows, sizes):
+        with CaptureQueriesContext(connection) as context:
+            run()
+        return [
+            analyze_query(query['sql'], min_rows, allowed_tables, sizes)
+            for query in context.captured_queries if explainable(query['sql'])
+        ]
+
+    def load_baseline(self, path):
+        try:
+            with open(path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('El chequeo de planes requiere PostgreSQL (EXPLAIN en formato JSON).')
+        if options['tickets'] <= 0 or options['companies'] <= 0 or options['min_rows'] <= 0:
+            raise CommandError('--tickets, --companies y --min-rows deben ser mayores que 0.')
+
+        baseline = {} if options['update_baseline'] else self.load_baseline(options['baseline'])
+        results = []
+        with transaction.atomic(), override_settings(CACHES=NO_CACHE):
+            if options['existing_data']:
+                company = Company.objects.first()
+                if company is None:
+                    raise CommandError('No hay compañías: use los datos generados.')
+            else:
+                company = self.seed(options['companies'], options['tickets'])
+            sizes = {}
+            for name, run, allowed_tables in self.scenarios(company):
+                results.append((name, self.check_scenario(run, allowed_tables, options['min_rows'], sizes)))
+            transaction.set_rollback(True)
+
+        failures = 0
+        self.stdout.write(f'{"Escenario":<24} {"Consultas":>10} {"Costo máx.":>12} {"Hallazgos":>10}')
+        for name, plans in results:
+            accepted = {key for entry in baseline.get(name, {}).values() for key in entry.get('issues', ())}
+            issues = [issue for plan in plans for issue in plan.issues if issue.key not in accepted]
+            regressions = compare_costs(plans, baseline.get(name, {}), options['tolerance'])
+            max_cost = max((plan.cost for plan in plans), default=0)
+            self.stdout.write(f'{name:<24} {len(plans):>10} {max_cost:>12.1f} {len(issues) + len(regressions):>10}')
+            for issue in issues:
+                label = 'Lectura secuencial de' if issue.kind == 'seq_scan' else 'Ordenamiento sin índice por'
+                self.stdout.write(self.style.WARNING(f'    {label} {issue.detail} (~{issue.rows:.0f} filas, consulta {issue.query})'))
+            for query, base_cost, cost in regressions:
+                self.stdout.write(self.style.WARNING(f'    Costo de la consulta {query}: {base_cost:.1f} -> {cost:.1f}'))
+            if options['verbosity'] > 1:
+                for plan in plans:
+                    self.stdout.write(f'    [{plan.fingerprint}] {plan.cost:>10.1f}  {plan.sql[:160]}')
+            failures += len(issues) + len(regressions)
+
+        if options['update_baseline']:
+            with open(options['baseline'], 'w', encoding='utf-8') as file:
+                json.dump({name: baseline_entry(plans) for name, plans in results}, file, indent=2, ensure_ascii=False)
+                file.write('\n')
+            self.stdout.write(self.style.SUCCESS(f'Línea base guardada en {options["baseline"]}.'))
+            return
+        if failures:
+            raise CommandError(f'{failures} hallazgos nuevos o regresiones de costo en los planes de consulta.')
+        self.stdout.write(self.style.SUCCESS('Planes de consulta sin hallazgos nuevos.'))
@@ -0,0 +1,118 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from apps.company.models import Company
+
+# Configuración anterior de Django: sesiones en la base y mensajes en cookie con respaldo en la sesión
+DATABASE_STORAGE = {
+    'SESSION_ENGINE': 'django.contrib.sessions.backends.db',
+    'MESSAGE_STORAGE': 'django.contrib.messages.storage.fallback.FallbackStorage',
+}
+
+WRITE_PREFIXES = ('INSERT', 'UPDATE', 'DELETE')
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide las consultas y escrituras por petición de TicketListView y TicketCreateView con las sesiones '
+        'y mensajes en la base de datos frente a SESSION_ENGINE / MESSAGE_STORAGE configurados. '
+        'Todo se ejecuta en una transacción que se revierte al final.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=5, help='Repeticiones por escenario')
+
+    def build_ticket_data(self, company):
+        return {
+            'seller': 'Medición',
+            'client': company.client_name,
+            'ci_ruc': company.client_ruc,
+            'phone': '',
+            'plate': 'MED-0001',
+            'form-TOTAL_FORMS': '1',
+            'form-INITIAL_FORMS': '0',
+            'form-MIN_NUM_FORMS': '0',
+            'form-MAX_NUM_FORMS': '1000',
+            'form-0-product': 'Diesel',
+            'form-0-quantity': '10.00000000',
+            'form-0-unit_price': '1.03700000',
+        }
+
+    def open_session(self, client):
+        """Sesión ya existente, como la de un usuario que vuelve (p. ej. tras entrar al admin)."""
+        store = import_module(settings.SESSION_ENGINE).SessionStore()
+        store['measured'] = True
+        store.save()
+        client.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+        return store
+
+    def measure(self, request, repeat):
+        totals = {'queries': 0, 'session': 0, 'writes': 0, 'seconds': 0.0}
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as context:
+                started = time.perf_counter()
+                response = request()
+                totals['seconds'] += time.perf_counter() - started
+            statements = [query['sql'] for query in context.captured_queries]
+            totals['queries'] += len(statements)
+            totals['session'] += sum('django_session' in sql for sql in statements)
+            totals['writes'] += sum(sql.lstrip().upper().startswith(WRITE_PREFIXES) for sql in statements)
+        return response, {key: value / repeat for key, value in totals.items()}
+
+    def run_scenarios(self, company, repeat):
+        client = Client()
+        store = self.open_session(client)
+        secure = not settings.DEBUG
+        list_url = reverse('ticket:ticket_list')
+        create_url = reverse('ticket:ticket_create')
+        results = []
+
+        _, stats = self.measure(lambda: client.get(list_url, secure=secure), repeat)
+        results.append(('Listado de tickets (GET)', stats))
+        _, stats = self.measure(lambda: client.get(create_url, secure=secure), repeat)
+        results.append(('Nuevo ticket (GET)', stats))
+        if company:
+            data = self.build_ticket_data(company)
+            response, stats = self.measure(lambda: client.post(create_url, data, secure=secure), repeat)
+            results.append(('Crear ticket (POST + mensaje)', stats))
+            # La página siguiente muestra (y consume) el mensaje de éxito
+            location = response.headers.get('Location', list_url)
+            _, stats = self.measure(lambda: client.get(location, secure=secure), 1)
+            results.append(('Redirección con mensaje (GET)', stats))
+        store.delete()
+        return results
+
+    def handle(self, *args, **options):
+        company = Company.objects.first()
+        if company is None:
+            self.stdout.write(self.style.WARNING('No hay compañía: se omite la creación de tickets.'))
+
+        configurations = [
+            ('Base de datos', DATABASE_STORAGE),
+            ('Configurado', {'SESSION_ENGINE': settings.SESSION_ENGINE, 'MESSAGE_STORAGE': settings.MESSAGE_STORAGE}),
+        ]
+        results = []
+        with transaction.atomic():
+            for label, storage in configurations:
+                with override_settings(**storage):
+                    results.append((label, self.run_scenarios(company, options['repeat'])))
+            transaction.set_rollback(True)
+
+        self.stdout.write(f'Configurado: {settings.SESSION_ENGINE} / {settings.MESSAGE_STORAGE}\n')
+        self.stdout.write(
+            f'{"Escenario":<32} {"Almacenamiento":<15} {"Consultas":>10} {"Sesión":>8} {"Escrituras":>11} {"ms":>8}'
+        )
+        for index, (scenario, _) in enumerate(results[0][1]):
+            for label, scenarios in results:
+                stats = scenarios[index][1]
+                self.stdout.write(
+                    f'{scenario:<32} {label:<15} {stats["queries"]:>10.1f} {stats["session"]:>8.1f} '
+                    f'{stats["writes"]:>11.1f} {stats["seconds"] * 1000:>8.1f}'
+                )
@@ -0,0 +1,74 @@
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Lo que hace un worker antes de su primera petición: cargar Django y todas las vistas
+STARTUP_SCRIPT = (
+    'import config.wsgi\n'
+    'from django.urls import get_resolver\n'
+    'get_resolver().url_patterns\n'
+)
+
+
+def parse_importtime(output):
+    """
+    Filas de `python -X importtime` como (módulo, profundidad, self_us, cumulative_us),
+    en el orden en que terminaron de importarse.
+    """
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        parts = line[len('import time:'):].split('|')
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue  # Encabezado
+        name = parts[2].rstrip()
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(parts[0]), int(parts[1])))
+    return rows
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide el tiempo de importación del arranque de un worker (Django, apps y vistas) en un proceso '
+        'nuevo con python -X importtime y lista los módulos más costosos. Con --max-ms falla si el '
+        'arranque supera el límite, para detectar regresiones.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=20, help='Módulos a listar')
+        parser.add_argument('--max-ms', type=float, help='Falla si el tiempo total de importación lo supera')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings')}
+        started = time.monotonic()
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', STARTUP_SCRIPT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        wall_ms = (time.monotonic() - started) * 1000
+        rows = parse_importtime(result.stderr)
+        if result.returncode != 0:
+            errors = [line for line in result.stderr.splitlines() if not line.startswith('import time:')]
+            raise CommandError('El arranque falló:\n' + '\n'.join(errors[-20:]))
+
+        top_level = [row for row in rows if row[1] == 1]
+        total_ms = sum(row[3] for row in top_level) / 1000
+
+        self.stdout.write(f'{"Módulo":<50} {"Propio ms":>10} {"Acumulado ms":>13}')
+        for name, _, self_us, cumulative_us in sorted(top_level, key=lambda row: -row[3])[:options['limit']]:
+            self.stdout.write(f'{name:<50} {self_us / 1000:>10.1f} {cumulative_us / 1000:>13.1f}')
+
+        if options['verbosity'] > 1:
+            self.stdout.write('\nMódulos con más tiempo propio:')
+            for name, _, self_us, _ in sorted(rows, key=lambda row: -row[2])[:options['limit']]:
+                self.stdout.write(f'  {name:<48} {self_us / 1000:>10.1f}')
+
+        summary = f'{len(rows)} módulos importados en {total_ms:.0f} ms (proceso completo: {wall_ms:.0f} ms).'
+        if options['max_ms'] is not None and total_ms > options['max_ms']:
+            raise CommandError(f'{summary} Supera el límite de {options["max_ms"]:.0f} ms.')
+        self.stdout.write(self.style.SUCCESS(summary))
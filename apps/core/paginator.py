@@ -0,0 +1,38 @@
+"""
+Paginador con conteo estimado para tablas grandes.
+
+COUNT(*) sobre toda la tabla recorre cada fila en PostgreSQL. Cuando el listado no tiene
+filtros, el total se toma de la estadística del planificador (pg_class.reltuples, actualizada
+por ANALYZE/autovacuum); con filtros, o si la tabla es pequeña, se cuenta normalmente.
+"""
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 10_000
+
+
+def estimated_row_count(model, using='default'):
+    """Filas estimadas de la tabla del modelo, o None si la base no ofrece la estimación."""
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass', [model._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples es -1 si la tabla nunca fue analizada
+    return row[0] if row and row[0] >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator que usa el conteo estimado para querysets sin filtros sobre tablas grandes."""
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        query = getattr(queryset, 'query', None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= ESTIMATE_THRESHOLD:
+                return estimate
+        return super().count
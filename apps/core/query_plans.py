@@ -0,0 +1,153 @@
+"""
+Chequeo de planes de consulta (PostgreSQL) para las vistas más usadas.
+
+Se capturan las consultas que ejecuta cada escenario (listado de tickets, dashboard, impresión
+en masa, exportación, numeración) y se pide su EXPLAIN. En cada plan se marcan:
+
+- seq_scan: lectura secuencial de una tabla con al menos `min_rows` filas estimadas.
+- sort: ordenamiento explícito de al menos `min_rows` filas (el orden no sale de un índice).
+
+El costo estimado de cada consulta se compara con una línea base guardada en JSON; las
+consultas se identifican por su huella (el SQL sin literales), así que cambiar un valor de
+filtro no cuenta como consulta nueva. Los hallazgos ya aceptados en la línea base no se
+vuelven a reportar; uno nuevo o un costo que supera la tolerancia hace fallar el chequeo.
+"""
+import hashlib
+import json
+import re
+from dataclasses import dataclass, field
+
+from django.db import connection
+
+EXPLAINED_PREFIXES = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'IN \((?:\?, )*\?\)')
+
+
+def fingerprint(sql):
+    """Huella del SQL sin literales: la misma consulta con otros valores tiene la misma huella."""
+    normalized = _STRING_LITERAL.sub('?', sql)
+    normalized = _NUMBER_LITERAL.sub('?', normalized)
+    normalized = _IN_LIST.sub('IN (...)', normalized)
+    return hashlib.md5(normalized.encode('utf-8')).hexdigest()[:12]
+
+
+@dataclass
+class PlanIssue:
+    kind: str  # seq_scan | sort
+    detail: str  # tabla o clave de ordenamiento
+    rows: float
+    query: str  # huella de la consulta
+
+    @property
+    def key(self):
+        return f'{self.kind}:{self.detail}:{self.query}'
+
+
+@dataclass
+class QueryPlan:
+    sql: str
+    cost: float
+    issues: list = field(default_factory=list)
+
+    @property
+    def fingerprint(self):
+        return fingerprint(self.sql)
+
+
+def explain(sql):
+    """Plan estimado (sin ejecutar la consulta) en formato JSON."""
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]['Plan']
+
+
+def _walk(node):
+    yield node
+    for child in node.get('Plans', ()):
+        yield from _walk(child)
+
+
+def table_rows(tables):
+    """Filas estimadas (pg_class.reltuples) de cada tabla, sumando particiones si las hay."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT parent.relname, sum(coalesce(child.reltuples, parent.reltuples))
+            FROM pg_class parent
+            LEFT JOIN pg_inherits ON pg_inherits.inhparent = parent.oid
+            LEFT JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = ANY(%s)
+            GROUP BY parent.relname
+            """,
+            [list(tables)],
+        )
+        return {name: rows for name, rows in cursor.fetchall()}
+
+
+def _is_allowed(table, allowed_tables):
+    # En una tabla particionada el nodo nombra la partición (ticket_ticket_p202610, ticket_ticket_default)
+    return any(
+        table == name or table == f'{name}_default' or re.fullmatch(rf'{name}_p\d{{6}}', table)
+        for name in allowed_tables
+    )
+
+
+def analyze_query(sql, min_rows, allowed_tables=(), sizes=None):
+    """EXPLAIN de `sql` con los hallazgos del plan. `sizes` guarda las filas por tabla entre llamadas."""
+    plan = explain(sql)
+    nodes = list(_walk(plan))
+    sizes = {} if sizes is None else sizes
+    tables = {node['Relation Name'] for node in nodes if 'Relation Name' in node} - set(sizes)
+    if tables:
+        sizes.update(table_rows(tables))
+
+    query_plan = QueryPlan(sql=sql, cost=plan['Total Cost'])
+    for node in nodes:
+        if node['Node Type'] == 'Seq Scan':
+            table = node['Relation Name']
+            rows = sizes.get(table, 0)
+            if rows >= min_rows and not _is_allowed(table, allowed_tables):
+                query_plan.issues.append(PlanIssue('seq_scan', table, rows, query_plan.fingerprint))
+        elif node['Node Type'] == 'Sort':
+            rows = max((child['Plan Rows'] for child in node.get('Plans', ())), default=node['Plan Rows'])
+            if rows >= min_rows:
+                sort_key = ', '.join(node.get('Sort Key', ()))
+                query_plan.issues.append(PlanIssue('sort', sort_key, rows, query_plan.fingerprint))
+    return query_plan
+
+
+def explainable(sql):
+    return sql.lstrip().upper().startswith(EXPLAINED_PREFIXES)
+
+
+def compare_costs(plans, baseline, tolerance, min_increase=1.0):
+    """
+    (huella, costo base, costo actual) de las consultas cuyo costo supera la línea base en más
+    de `tolerance` (proporción) y de `min_increase` unidades. Las consultas nuevas no se comparan.
+    """
+    regressions = []
+    for plan in plans:
+        previous = baseline.get(plan.fingerprint)
+        if previous is None:
+            continue
+        base_cost = previous['cost']
+        if plan.cost > base_cost * (1 + tolerance) and plan.cost - base_cost > min_increase:
+            regressions.append((plan.fingerprint, base_cost, plan.cost))
+    return regressions
+
+
+def baseline_entry(plans):
+    """Línea base de un escenario: costo y hallazgos aceptados por consulta."""
+    entry = {}
+    for plan in plans:
+        current = entry.setdefault(plan.fingerprint, {'cost': 0.0, 'sql': plan.sql[:300], 'issues': []})
+        # La misma consulta puede repetirse en el escenario: se guarda la más cara
+        current['cost'] = max(current['cost'], plan.cost)
+        current['issues'] = sorted(set(current['issues']) | {issue.key for issue in plan.issues})
+    return entry
@@ -6,4 +6,5 @@ app_name = 'core'
 urlpatterns = [
     path('', views.dashboard, name='dashboard'),
     path('sw.js', views.service_worker, name='service_worker'),
+    path('ready', views.ready, name='ready'),
 ]
\ No newline at end of file
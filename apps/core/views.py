@@ -1,21 +1,25 @@
 from django.shortcuts import render
-from django.http import HttpResponse
+from django.http import HttpResponse, JsonResponse
+from django.utils import timezone
 from apps.ticket.models import Ticket
 from apps.company.models import Company
-from datetime import date
+from apps.company.tenancy import for_company
+from apps.ticket.services.reports import start_of_day
+from apps.core import warmup
 import os
 
 
 def dashboard(request):
     """
     Vista del dashboard principal.
-    Muestra estadísticas básicas de tickets y compañías.
+    Muestra estadísticas básicas de los tickets de la compañía activa y de las compañías.
     """
-    # Estadísticas
-    total_tickets = Ticket.objects.count()
+    # Estadísticas de la compañía activa
+    tickets = for_company(Ticket.objects, request.company)
+    total_tickets = tickets.count()
     total_companies = Company.objects.count()
-    tickets_today = Ticket.objects.filter(date__date=date.today()).count()
-    recent_tickets = Ticket.objects.select_related('company').order_by('-date')[:5]
+    tickets_today = tickets.filter(date__gte=start_of_day(timezone.localdate())).count()
+    recent_tickets = tickets.select_related('company').order_by('-date')[:5]
 
     context = {
         'total_tickets': total_tickets,
@@ -44,3 +48,16 @@ def service_worker(request):
         return response
     except FileNotFoundError:
         return HttpResponse('Service Worker not found', status=404)
+
+
+def ready(request):
+    """
+    Readiness para el balanceador y el despliegue: 200 solo cuando el worker que responde
+    ya compiló plantillas, resolvió URLs y abrió su conexión a la base; si no, 503.
+    """
+    if not warmup.is_ready():
+        warmup.warm_up_worker()
+    status = 200 if warmup.is_ready() else 503
+    response = JsonResponse({'ready': warmup.is_ready()}, status=status)
+    response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
+    return response
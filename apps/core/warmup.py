@@ -0,0 +1,105 @@
+"""
+Calentamiento de los procesos de gunicorn antes de atender peticiones.
+
+Sin calentamiento, la primera petición de cada worker paga la compilación de las
+plantillas, la construcción del resolver de URLs, la importación de módulos pesados y
+la conexión a la base. Con preload_app (ver config/gunicorn.py) el trabajo se reparte así:
+
+- warm_up(), en el proceso maestro antes del fork: importa módulos, resuelve las URLs y
+  compila las plantillas. Los workers heredan todo por copy-on-write.
+- warm_up_worker(), en cada worker después del fork: abre sus propias conexiones (las
+  conexiones no se comparten entre procesos) y carga el índice del catálogo.
+
+is_ready() es lo que consulta el endpoint /ready: solo es verdadero en un worker que
+terminó su calentamiento (si la base no respondía, /ready lo reintenta).
+"""
+import importlib
+import logging
+import time
+
+from django.db import DatabaseError, connections
+from django.template.loader import get_template
+from django.urls import get_resolver, reverse
+
+logger = logging.getLogger(__name__)
+
+# Plantillas del camino de venta, con los componentes que incluyen
+WARMUP_TEMPLATES = [
+    'layouts/base.html',
+    'layouts/dashboard.html',
+    'components/breadcrumbs.html',
+    'components/loading.html',
+    'components/navbar.html',
+    'components/pagination.html',
+    'components/sidebar.html',
+    'fragments/alerts.html',
+    'fragments/ticket_list_results.html',
+    'partials/scripts.html',
+    'ticket/ticket_list.html',
+    'ticket/ticket_form.html',
+    'ticket/ticket_detail.html',
+    'ticket/ticket_print.html',
+]
+
+WARMUP_URLS = [
+    'core:dashboard',
+    'ticket:ticket_list',
+    'ticket:ticket_create',
+    'ticket:ticket_plate_history',
+    'product:product_autocomplete',
+]
+
+# Módulos que las vistas importan al usarse; en el maestro se cargan una vez para todos
+WARMUP_MODULES = [
+    'openpyxl',
+    'openpyxl.styles',
+    'lxml.etree',
+]
+
+_warm = False
+_ready = False
+
+
+def warm_up():
+    """Trabajo compartible entre procesos. Devuelve los segundos empleados."""
+    global _warm
+    started = time.monotonic()
+    for module in WARMUP_MODULES:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            logger.warning('Calentamiento: no se pudo importar %s', module)
+    # Importa todas las vistas y construye las tablas de reverse()
+    get_resolver().url_patterns
+    for name in WARMUP_URLS:
+        reverse(name)
+    for name in WARMUP_TEMPLATES:
+        get_template(name)
+    # Ninguna conexión abierta durante el calentamiento debe heredarse
+    connections.close_all()
+    _warm = True
+    return time.monotonic() - started
+
+
+def warm_up_worker():
+    """Trabajo propio de cada worker. Devuelve los segundos empleados."""
+    global _ready
+    from apps.product.catalog import get_index
+
+    started = time.monotonic()
+    if not _warm:
+        warm_up()
+    try:
+        for connection in connections.all():
+            connection.ensure_connection()
+        get_index()
+    except DatabaseError:
+        # El worker atiende igual; /ready lo reintenta hasta que la base responda
+        logger.exception('Calentamiento: la base de datos no está disponible')
+        return time.monotonic() - started
+    _ready = True
+    return time.monotonic() - started
+
+
+def is_ready():
+    return _ready
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Product
+
+@admin.register(Product)
+class ProductAdmin(admin.ModelAdmin):
+    list_display = ('name', 'unit_price', 'is_active', 'updated_at')
+    search_fields = ('name', 'normalized_name')
+    list_filter = ('is_active',)
+    ordering = ('name',)
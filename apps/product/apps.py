@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class ProductConfig(AppConfig):
+    name = 'apps.product'
+
+    def ready(self):
+        from apps.product import signals  # noqa: F401
@@ -0,0 +1,108 @@
+"""
+Índice en memoria del catálogo de productos para el autocompletado de las líneas del ticket.
+
+Cada proceso mantiene una lista ordenada de claves (nombre normalizado y cada sufijo que
+empieza en una palabra, para que "super" encuentre "Gasolina Super") y resuelve los
+prefijos con búsqueda binaria, sin consultar la base. Cuando el catálogo cambia se
+incrementa una versión en la caché compartida y cada proceso recarga su índice en la
+siguiente consulta; con una caché local por proceso, REFRESH_SECONDS acota el desfase.
+"""
+import threading
+import time
+import unicodedata
+from bisect import bisect_left
+from collections import namedtuple
+
+from django.core.cache import cache
+
+
+VERSION_CACHE_KEY = 'product:catalog:version'
+REFRESH_SECONDS = 60
+
+CatalogEntry = namedtuple('CatalogEntry', ['id', 'name', 'unit_price'])
+
+
+def normalize_name(value):
+    """Minúsculas, sin tildes y con espacios simples: 'Gasolina  Súper' -> 'gasolina super'."""
+    text = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(text.lower().split())
+
+
+class ProductIndex:
+    """Índice de prefijos inmutable construido a partir de las entradas del catálogo."""
+
+    def __init__(self, entries):
+        self._by_name = {}
+        keys = []
+        for entry in entries:
+            normalized = normalize_name(entry.name)
+            self._by_name[normalized] = entry
+            words = normalized.split(' ')
+            for position in range(len(words)):
+                keys.append((' '.join(words[position:]), position, entry.name, entry))
+        keys.sort(key=lambda key: key[:3])
+        self._keys = keys
+        self._sort_keys = [key[0] for key in keys]
+
+    def get(self, name):
+        """Entrada con el mismo nombre normalizado, o None."""
+        return self._by_name.get(normalize_name(name))
+
+    def search(self, query, limit=10):
+        """Productos cuyo nombre (o alguna de sus palabras) empieza con query."""
+        prefix = normalize_name(query)
+        if not prefix:
+            return []
+        matches = {}
+        index = bisect_left(self._sort_keys, prefix)
+        while index < len(self._keys) and self._sort_keys[index].startswith(prefix):
+            _, position, name, entry = self._keys[index]
+            # Mejor posición por producto: primero los que empiezan con el texto buscado
+            if entry.id not in matches or position < matches[entry.id][0]:
+                matches[entry.id] = (position, name, entry)
+            index += 1
+        return [entry for _, _, entry in sorted(matches.values(), key=lambda match: match[:2])[:limit]]
+
+
+_lock = threading.Lock()
+_index = None
+_loaded_version = None
+_loaded_at = 0.0
+
+
+def _load():
+    from apps.product.models import Product
+
+    entries = [
+        CatalogEntry(*row)
+        for row in Product.objects.filter(is_active=True).values_list('id', 'name', 'unit_price')
+    ]
+    return ProductIndex(entries)
+
+
+def get_index():
+    """Índice del proceso; se recarga si otro proceso cambió el catálogo o venció el intervalo."""
+    global _index, _loaded_version, _loaded_at
+    version = cache.get(VERSION_CACHE_KEY, 0)
+    # Referencia local: otro hilo puede reemplazar _index entre la comprobación y el return
+    index = _index
+    if index is not None and version == _loaded_version and time.monotonic() - _loaded_at < REFRESH_SECONDS:
+        return index
+    with _lock:
+        if _index is None or version != _loaded_version or time.monotonic() - _loaded_at >= REFRESH_SECONDS:
+            _index = _load()
+            _loaded_version = version
+            _loaded_at = time.monotonic()
+        return _index
+
+
+def invalidate():
+    """
+    Marca el catálogo como modificado para todos los procesos. No descarta el índice: las
+    consultas en curso siguen usando el anterior hasta que la siguiente lo recargue.
+    """
+    global _loaded_version
+    cache.set(VERSION_CACHE_KEY, time.time_ns(), None)
+    with _lock:
+        # Recarga en este proceso aunque la caché no sea compartida (o sea DummyCache)
+        _loaded_version = None
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Product',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, verbose_name='Nombre')),
+                ('normalized_name', models.CharField(editable=False, max_length=255, unique=True, verbose_name='Nombre Normalizado')),
+                ('unit_price', models.DecimalField(decimal_places=8, default=0.0, max_digits=15, verbose_name='P. Unitario por Defecto')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activo')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Última Modificación')),
+            ],
+            options={
+                'verbose_name': 'Producto',
+                'verbose_name_plural': 'Productos',
+                'ordering': ['name'],
+                'indexes': [models.Index(fields=['normalized_name'], name='product_normalized_prefix_idx', opclasses=['varchar_pattern_ops'])],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+from django.db import models
+
+from apps.product.catalog import normalize_name
+
+
+class Product(models.Model):
+    name = models.CharField(max_length=255, verbose_name="Nombre")
+    normalized_name = models.CharField(max_length=255, unique=True, editable=False, verbose_name="Nombre Normalizado")  # Sin tildes ni mayúsculas, para búsqueda y agrupación
+    unit_price = models.DecimalField(max_digits=15, decimal_places=8, default=0.00000000, verbose_name="P. Unitario por Defecto")  # Mismo formato que TicketDetail
+    is_active = models.BooleanField(default=True, verbose_name="Activo")
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Modificación")
+
+    def __str__(self):
+        return self.name
+
+    def save(self, *args, **kwargs):
+        self.normalized_name = normalize_name(self.name)
+        super().save(*args, **kwargs)
+
+    class Meta:
+        verbose_name = "Producto"
+        verbose_name_plural = "Productos"
+        ordering = ['name']
+        indexes = [
+            # Búsqueda por prefijo (LIKE 'texto%') independiente de la collation de la base
+            models.Index(fields=['normalized_name'], name='product_normalized_prefix_idx', opclasses=['varchar_pattern_ops']),
+        ]
@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.product import catalog
+from apps.product.models import Product
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def refresh_product_index(sender, **kwargs):
+    """Invalida el índice de autocompletado de todos los procesos al confirmar el cambio."""
+    transaction.on_commit(catalog.invalidate)
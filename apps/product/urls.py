@@ -0,0 +1,8 @@
+from django.urls import path
+from . import views
+
+app_name = 'product'
+
+urlpatterns = [
+    path('autocomplete/', views.product_autocomplete, name='product_autocomplete'),
+]
@@ -0,0 +1,21 @@
+from django.http import JsonResponse
+from django.views.decorators.http import require_GET
+
+from apps.product.catalog import get_index
+
+
+@require_GET
+def product_autocomplete(request):
+    """
+    Sugerencias de productos para las líneas del ticket.
+    Responde desde el índice en memoria del proceso, sin consultar la base.
+    """
+    try:
+        limit = min(int(request.GET.get('limit', 10)), 50)
+    except ValueError:
+        limit = 10
+    results = [
+        {'id': entry.id, 'name': entry.name, 'unit_price': str(entry.unit_price)}
+        for entry in get_index().search(request.GET.get('q', ''), limit=limit)
+    ]
+    return JsonResponse({'results': results})
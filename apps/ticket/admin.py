@@ -1,24 +1,137 @@
-from django.contrib import admin
-from .models import Ticket, TicketDetail
+import csv
+
+from django.contrib import admin, messages
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from apps.core.paginator import EstimatedCountPaginator
+from .models import DispenserSale, OutboxEvent, PumpAssignment, PurgeJob, Ticket, TicketDetail
+
+EXPORT_HEADERS = [
+    'Número de Ticket', 'Fecha', 'Vendedor', 'Teléfono', 'Placa', 'Compañía',
+    'Producto', 'Cantidad', 'Precio Unitario', 'Subtotal Producto', 'IVA (%)', 'Total Ticket',
+]
+
+
+class Echo:
+    """Pseudo-archivo para csv.writer: devuelve la línea en lugar de escribirla."""
+
+    def write(self, value):
+        return value
+
 
 class TicketDetailInline(admin.TabularInline):
     model = TicketDetail
-    extra = 1  # Número de filas vacías para agregar detalles
+    extra = 0  # Las filas nuevas se agregan con "Agregar otro"
     fields = ('product', 'quantity', 'unit_price', 'total')
     readonly_fields = ('total',)  # El total se calcula automáticamente
 
 @admin.register(Ticket)
 class TicketAdmin(admin.ModelAdmin):
-    list_display = ('id', 'client', 'seller', 'date', 'total', 'iva_percentage')
-    search_fields = ('client', 'seller', 'ci_ruc')
-    list_filter = ('date', 'company', 'iva_percentage')
+    """
+    Administración de tickets para tablas grandes: sin COUNT(*) completo (conteo estimado),
+    jerarquía de fechas sobre el índice de Ticket.date, búsqueda por igualdad o prefijo
+    (puede usar índices) y totales recalculados en SQL.
+    """
+    list_display = ('document_number', 'date', 'plate', 'seller', 'company', 'total', 'iva_percentage')
+    list_select_related = ('company',)
+    search_fields = ('document_number__exact', 'plate__exact', 'seller__istartswith')
+    list_filter = ('company', 'iva_percentage')
+    date_hierarchy = 'date'
     ordering = ('-date',)
+    show_full_result_count = False
+    paginator = EstimatedCountPaginator
     inlines = [TicketDetailInline]
+    actions = ['recompute_totals', 'export_selected']
+
+    def get_search_results(self, request, queryset, search_term):
+        # Las placas se guardan en mayúsculas; número y vendedor no distinguen mayúsculas
+        return super().get_search_results(request, queryset, search_term.upper())
 
     def save_model(self, request, obj, form, change):
         # Copiar IVA de la compañía si es un nuevo ticket
         if not change:  # Si es creación
             obj.iva_percentage = obj.company.iva_percentage
         super().save_model(request, obj, form, change)
-        # Actualizar el total después de guardar
-        obj.update_total()
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        # Total calculado en SQL una vez guardados los detalles del inline
+        Ticket.refresh_totals(Ticket.objects.filter(pk=form.instance.pk))
+
+    @admin.action(description='Recalcular totales de los tickets seleccionados')
+    def recompute_totals(self, request, queryset):
+        updated = Ticket.refresh_totals(queryset)
+        self.message_user(request, f'{updated} tickets con total corregido.', messages.SUCCESS)
+
+    @admin.action(description='Exportar tickets seleccionados (CSV)')
+    def export_selected(self, request, queryset):
+        """Exporta los detalles de los tickets seleccionados en el formato que acepta la importación."""
+        rows = (
+            TicketDetail.objects
+            .filter(ticket__in=queryset.values('pk'))
+            .order_by('ticket__date', 'ticket_id', 'id')
+            .values_list(
+                'ticket__document_number', 'ticket__date', 'ticket__seller', 'ticket__phone', 'ticket__plate',
+                'ticket__company__name', 'product', 'quantity', 'unit_price', 'total',
+                'ticket__iva_percentage', 'ticket__total',
+            )
+            .iterator(chunk_size=2000)
+        )
+        writer = csv.writer(Echo())
+
+        def stream():
+            yield '\ufeff' + writer.writerow(EXPORT_HEADERS)
+            for row in rows:
+                row = list(row)
+                row[1] = timezone.localtime(row[1]).strftime('%Y-%m-%d %H:%M')
+                yield writer.writerow(row)
+
+        response = StreamingHttpResponse(stream(), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = 'attachment; filename=tickets_seleccionados.csv'
+        return response
+
+
+@admin.register(PurgeJob)
+class PurgeJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'kind', 'status', 'company_name', 'cutoff', 'tickets_deleted', 'tickets_archived', 'created_at', 'finished_at')
+    list_filter = ('kind', 'status')
+    readonly_fields = ('tickets_archived', 'tickets_deleted', 'details_deleted', 'error', 'started_at', 'finished_at')
+
+
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ('id', 'topic', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status', 'topic')
+    readonly_fields = ('topic', 'payload', 'attempts', 'last_error', 'created_at', 'sent_at')
+    actions = ['requeue']
+
+    @admin.action(description='Reintentar los eventos seleccionados')
+    def requeue(self, request, queryset):
+        updated = queryset.exclude(status=OutboxEvent.STATUS_SENT).update(
+            status=OutboxEvent.STATUS_PENDING, attempts=0, next_attempt_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} eventos reprogramados.', messages.SUCCESS)
+
+
+@admin.register(PumpAssignment)
+class PumpAssignmentAdmin(admin.ModelAdmin):
+    list_display = ('pump', 'plate', 'seller', 'company', 'created_at', 'consumed_at')
+    list_filter = ('company', 'pump')
+    search_fields = ('plate',)
+
+
+@admin.register(DispenserSale)
+class DispenserSaleAdmin(admin.ModelAdmin):
+    list_display = ('pump', 'sale_id', 'product', 'quantity', 'unit_price', 'dispensed_at', 'status', 'ticket')
+    list_filter = ('status', 'company', 'pump')
+    list_select_related = ('ticket',)
+    readonly_fields = ('ticket', 'received_at', 'ticketed_at')
+    actions = ['retry_matching']
+
+    @admin.action(description='Volver a esperar asignación de placa')
+    def retry_matching(self, request, queryset):
+        updated = queryset.filter(status=DispenserSale.STATUS_UNMATCHED).update(
+            status=DispenserSale.STATUS_PENDING, received_at=timezone.now()
+        )
+        self.message_user(request, f'{updated} ventas vuelven a esperar una asignación.', messages.SUCCESS)
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class TicketConfig(AppConfig):
     name = 'apps.ticket'
+
+    def ready(self):
+        from apps.ticket import signals  # noqa: F401
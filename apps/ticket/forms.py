@@ -1,24 +1,34 @@
 from django import forms
 from django.forms import inlineformset_factory, modelformset_factory
-from .models import Ticket, TicketDetail
-from apps.core.forms.base_form import BaseModelForm
+from .models import PumpAssignment, Ticket, TicketDetail
+from apps.core.forms.base_form import BaseModelForm, BaseForm
+from apps.product.catalog import get_index
+from apps.ticket.services.plate_history import normalize_plate
+from apps.ticket.services.reports import REPORT_CHOICES, SalesReport
 
 
 class TicketDetailForm(BaseModelForm):
     """
     Formulario para detalles del ticket.
     Campos manuales: product, quantity, unit_price.
-    Total se calcula automáticamente.
+    Total se calcula automáticamente. Si el producto existe en el catálogo se enlaza,
+    se usa su nombre y, si no se ingresó precio, su precio por defecto.
     """
 
     class Meta:
         model = TicketDetail
         fields = ['product', 'quantity', 'unit_price']  # Excluye total (calculado) y ticket (FK)
         widgets = {
+            'product': forms.TextInput(attrs={'list': 'product-catalog', 'autocomplete': 'off'}),
             'quantity': forms.NumberInput(attrs={'step': '0.00000001', 'min': '0'}),
-            'unit_price': forms.NumberInput(attrs={'step': '0.00000001', 'min': '0'}),
         }
 
+    # Opcional desde la clase (el precio puede venir del catálogo): la etiqueta se prepara sin asterisco
+    unit_price = forms.DecimalField(
+        max_digits=15, decimal_places=8, required=False, label="P. Unitario",
+        widget=forms.NumberInput(attrs={'step': '0.00000001', 'min': '0'}),
+    )
+
     def clean_quantity(self):
         """Valida que la cantidad sea positiva."""
         quantity = self.cleaned_data.get('quantity')
@@ -33,6 +43,36 @@ class TicketDetailForm(BaseModelForm):
             raise forms.ValidationError("El precio unitario no puede ser negativo.")
         return price
 
+    def clean(self):
+        """Enlaza el producto del catálogo (índice en memoria, sin consultas) y completa el precio."""
+        cleaned_data = super().clean()
+        product = cleaned_data.get('product')
+        entry = get_index().get(product) if product else None
+        self.instance.catalog_product_id = entry.id if entry else None
+        if entry:
+            cleaned_data['product'] = entry.name
+            if cleaned_data.get('unit_price') is None and 'unit_price' not in self.errors:
+                cleaned_data['unit_price'] = entry.unit_price
+        if cleaned_data.get('unit_price') is None and 'unit_price' not in self.errors:
+            self.add_error('unit_price', "El precio unitario es obligatorio para productos fuera del catálogo.")
+        return cleaned_data
+
+
+# Formsets de detalle construidos una sola vez (modelformset_factory crea una clase nueva en cada llamada)
+TicketDetailCreateFormSet = modelformset_factory(
+    TicketDetail,
+    form=TicketDetailForm,
+    extra=1,  # Una fila extra para agregar
+    can_delete=True,  # Permitir eliminar
+)
+
+TicketDetailUpdateFormSet = modelformset_factory(
+    TicketDetail,
+    form=TicketDetailForm,
+    extra=0,  # No extra en edición
+    can_delete=True,
+)
+
 
 class TicketForm(BaseModelForm):
     """
@@ -50,8 +90,15 @@ class TicketForm(BaseModelForm):
             'plate': forms.TextInput(attrs={'maxlength': '20'}),
         }
 
-    def __init__(self, *args, **kwargs):
+    # Versión del ticket que vio el usuario; la vista de edición la compara al guardar
+    version = forms.IntegerField(required=False, widget=forms.HiddenInput)
+
+    def __init__(self, *args, company=None, **kwargs):
         super().__init__(*args, **kwargs)
+        if self.instance.pk:
+            # En edición es obligatoria: sin ella no se puede saber si otro usuario guardó antes
+            self.fields['version'].required = True
+            self.fields['version'].initial = self.instance.version
 
         # Hacer campos opcionales
         self.fields['seller'].required = False
@@ -61,18 +108,15 @@ class TicketForm(BaseModelForm):
         self.fields['client'].widget.attrs['readonly'] = True
         self.fields['ci_ruc'].widget.attrs['readonly'] = True
 
-        # Inicializar valores desde la compañía
-        company = None
-        if hasattr(self, 'instance') and self.instance.pk and self.instance.company:
-            # Edición: usar la compañía del ticket existente
-            company = self.instance.company
-        else:
-            # Creación: usar la compañía por defecto
-            from apps.company.models import Company
-            try:
+        # Inicializar valores desde la compañía (el llamador puede pasarla para evitar la consulta)
+        if company is None:
+            if hasattr(self, 'instance') and self.instance.pk and self.instance.company:
+                # Edición: usar la compañía del ticket existente
+                company = self.instance.company
+            else:
+                # Creación: usar la compañía por defecto (las vistas pasan la compañía activa)
+                from apps.company.models import Company
                 company = Company.objects.first()
-            except Company.DoesNotExist:
-                company = None
 
         if company:
             self.fields['client'].initial = company.client_name
@@ -82,6 +126,10 @@ class TicketForm(BaseModelForm):
             if 'company' in self.fields:
                 self.fields['company'].disabled = True  # No cambiar compañía en edición
 
+    def clean_plate(self):
+        """Normaliza la placa para que el historial la encuentre con el índice."""
+        return normalize_plate(self.cleaned_data.get('plate'))
+
     def clean_ci_ruc(self):
         """Valida formato básico del CI/RUC."""
         ci_ruc = self.cleaned_data.get('ci_ruc')
@@ -101,3 +149,68 @@ class TicketForm(BaseModelForm):
         return instance
 
 
+class TicketImportForm(BaseForm):
+    """
+    Formulario para importar tickets desde un archivo Excel (.xlsx) o CSV.
+    """
+    file = forms.FileField(label="Archivo (.xlsx o .csv)")
+    renumber = forms.BooleanField(required=False, label="Asignar nuevos números de documento")
+    dry_run = forms.BooleanField(required=False, label="Solo validar (no guardar)")
+
+    def clean_file(self):
+        """Valida la extensión del archivo."""
+        file = self.cleaned_data.get('file')
+        if file and not file.name.lower().endswith(('.xlsx', '.csv')):
+            raise forms.ValidationError("Solo se permiten archivos .xlsx o .csv.")
+        return file
+
+
+class TicketReportForm(BaseForm):
+    """
+    Filtros de los reportes de ventas. Se envía por GET para que los reportes se puedan enlazar.
+    """
+    report = forms.ChoiceField(choices=REPORT_CHOICES, initial='day', label="Agrupar por")
+    date_from = forms.DateField(required=False, label="Desde", widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, label="Hasta", widget=forms.DateInput(attrs={'type': 'date'}))
+    product = forms.CharField(required=False, max_length=255, label="Producto")
+    seller = forms.CharField(required=False, max_length=255, label="Vendedor")
+    plate = forms.CharField(required=False, max_length=20, label="Placa")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            self.add_error('date_to', "La fecha final debe ser posterior a la inicial.")
+        return cleaned_data
+
+    def get_report(self, company):
+        """Reporte de la compañía con los filtros validados (llamar después de is_valid())."""
+        data = self.cleaned_data
+        return SalesReport(
+            company.pk,
+            data['report'],
+            date_from=data.get('date_from'),
+            date_to=data.get('date_to'),
+            product=data.get('product'),
+            seller=data.get('seller'),
+            plate=data.get('plate'),
+        )
+
+
+class PumpAssignmentForm(BaseModelForm):
+    """
+    Placa y vendedor para la próxima venta de un surtidor, registrados en la isla.
+    El servicio de ingesta crea el ticket cuando el surtidor reporta la venta.
+    """
+
+    class Meta:
+        model = PumpAssignment
+        fields = ['pump', 'plate', 'seller', 'phone']
+        widgets = {
+            'plate': forms.TextInput(attrs={'maxlength': '20', 'autofocus': True}),
+            'phone': forms.TextInput(attrs={'maxlength': '20'}),
+        }
+
+    def clean_plate(self):
+        return normalize_plate(self.cleaned_data.get('plate'))
@@ -0,0 +1,85 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.forms import modelformset_factory
+
+from apps.ticket.forms import TicketDetailCreateFormSet, TicketDetailForm
+from apps.ticket.models import TicketDetail
+
+
+class LegacyStyleMixin:
+    """
+    Camino anterior a la memoización: cada formulario parte de campos sin estilo, recalcula las
+    clases de cada widget y agrega los asteriscos en su propio __init__.
+    """
+
+    def prepare_base_fields(self):
+        pass
+
+    def get_widget_classes(self, widget):
+        return self._compute_widget_classes(widget)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.apply_widget_classes()
+        for field in self.fields.values():
+            if field.required and field.label:
+                field.label = f'{field.label} *'
+
+
+class LegacyTicketDetailForm(LegacyStyleMixin, TicketDetailForm):
+    pass
+
+
+LegacyTicketDetailFormSet = modelformset_factory(
+    TicketDetail, form=LegacyTicketDetailForm, extra=1, can_delete=True,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Micro-benchmark del formset de detalles: construir, validar y renderizar tickets con N líneas. '
+        'Compara el estilo precalculado por clase con el estilo por instancia (--legacy).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, nargs='+', default=[1, 10, 50, 100, 200],
+                            help='Cantidades de líneas a medir')
+        parser.add_argument('--repeat', type=int, default=20, help='Repeticiones por medición')
+        parser.add_argument('--legacy', action='store_true',
+                            help='Estilos por formulario sobre campos sin estilo (camino anterior a la memoización)')
+
+    def build_data(self, lines):
+        prefix = TicketDetailCreateFormSet().prefix
+        data = {
+            f'{prefix}-TOTAL_FORMS': str(lines),
+            f'{prefix}-INITIAL_FORMS': '0',
+            f'{prefix}-MIN_NUM_FORMS': '0',
+            f'{prefix}-MAX_NUM_FORMS': '1000',
+        }
+        for index in range(lines):
+            data[f'{prefix}-{index}-product'] = 'Diesel'
+            data[f'{prefix}-{index}-quantity'] = '10.12345678'
+            data[f'{prefix}-{index}-unit_price'] = '1.03700000'
+        return data
+
+    def run_once(self, data, legacy):
+        formset_class = LegacyTicketDetailFormSet if legacy else TicketDetailCreateFormSet
+        formset = formset_class(data, queryset=TicketDetail.objects.none())
+        formset.is_valid()
+        for form in formset.forms:
+            for bound_field in form:
+                str(bound_field)
+
+    def handle(self, *args, **options):
+        # Calentar: la primera instancia precalcula los estilos de la clase
+        self.run_once(self.build_data(1), options['legacy'])
+
+        self.stdout.write(f'{"líneas":>8} {"ms/ticket":>10} {"µs/línea":>10}')
+        for lines in options['lines']:
+            data = self.build_data(lines)
+            started = time.perf_counter()
+            for _ in range(options['repeat']):
+                self.run_once(data, options['legacy'])
+            elapsed = (time.perf_counter() - started) / options['repeat']
+            self.stdout.write(f'{lines:>8} {elapsed * 1000:>10.2f} {elapsed * 1_000_000 / lines:>10.1f}')
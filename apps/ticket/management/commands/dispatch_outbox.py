@@ -0,0 +1,43 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ticket.services.outbox import OutboxDispatcher, get_metrics
+
+
+class Command(BaseCommand):
+    help = (
+        'Envía por lotes los eventos del outbox (tickets nuevos) al sistema de flota, con reintentos, '
+        'backoff y descarte tras OUTBOX_MAX_ATTEMPTS. Sin --once queda en ejecución.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Endpoint receptor (por defecto OUTBOX_ENDPOINT_URL)')
+        parser.add_argument('--batch-size', type=int, help='Eventos por envío (por defecto OUTBOX_BATCH_SIZE)')
+        parser.add_argument('--once', action='store_true', help='Enviar lo pendiente y terminar')
+        parser.add_argument('--sleep', type=float, default=1.0, help='Segundos de espera sin eventos pendientes')
+
+    def handle(self, *args, **options):
+        url = options['url'] or settings.OUTBOX_ENDPOINT_URL
+        if not url:
+            raise CommandError('Configure OUTBOX_ENDPOINT_URL o use --url.')
+
+        dispatcher = OutboxDispatcher(url=url, batch_size=options['batch_size'])
+        while True:
+            sent, failed = dispatcher.sent, dispatcher.failed
+            dispatcher.dispatch_pending()
+            if options['verbosity'] > 1 or dispatcher.failed > failed:
+                metrics = get_metrics()
+                self.stdout.write(
+                    f'{dispatcher.sent - sent} enviados, {dispatcher.failed - failed} fallidos; '
+                    f'{metrics["pending"]} pendientes, {metrics["dead"]} descartados, '
+                    f'lag {metrics["lag_seconds"]:.1f}s'
+                )
+            if options['once']:
+                break
+            time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{dispatcher.sent} eventos enviados, {dispatcher.failed} envíos fallidos, {dispatcher.dead} descartados.'
+        ))
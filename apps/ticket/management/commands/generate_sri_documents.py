@@ -0,0 +1,68 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ticket.models import SriDocument, Ticket
+from apps.ticket.services.sri import SriBatchGenerator, sign_and_submit
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera las claves de acceso y los XML de comprobantes del SRI para los tickets de un rango de fechas. '
+        'Omite los tickets sin cambios desde la última generación.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='Fecha inicial (AAAA-MM-DD)')
+        parser.add_argument('--date-to', help='Fecha final (AAAA-MM-DD)')
+        parser.add_argument('--ticket', type=int, action='append', dest='tickets', help='ID de ticket (repetible)')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Procesos para armar y validar los XML')
+        parser.add_argument('--force', action='store_true', help='Regenerar aunque el ticket no haya cambiado (nunca los ya firmados, enviados o autorizados)')
+        parser.add_argument('--xsd', help='Ruta del XSD para validar (por defecto SRI_XSD_PATH)')
+        parser.add_argument('--submit', action='store_true',
+                            help='Firmar y enviar los comprobantes generados con SRI_SIGNER / SRI_SUBMITTER')
+
+    def handle(self, *args, **options):
+        queryset = Ticket.objects.all()
+        if options['tickets']:
+            queryset = queryset.filter(pk__in=options['tickets'])
+        if options['date_from']:
+            queryset = queryset.filter(date__date__gte=options['date_from'])
+        if options['date_to']:
+            queryset = queryset.filter(date__date__lte=options['date_to'])
+        if options['xsd'] and not os.path.exists(options['xsd']):
+            raise CommandError(f'No existe el XSD: {options["xsd"]}')
+
+        started = time.monotonic()
+
+        def report_progress(generator):
+            self.stdout.write(f'  {generator.generated} generados, {len(generator.errors)} con errores '
+                              f'({time.monotonic() - started:.1f}s)')
+
+        generator = SriBatchGenerator(
+            workers=options['workers'],
+            force=options['force'],
+            xsd_path=options['xsd'],
+            on_chunk=report_progress if options['verbosity'] > 1 else None,
+        ).run(queryset)
+
+        for ticket_id, errors in list(generator.errors.items())[:20]:
+            for error in errors:
+                self.stderr.write(f'  Ticket {ticket_id}: {error}')
+
+        summary = (
+            f'{generator.generated} comprobantes generados, {generator.skipped} sin cambios, '
+            f'{len(generator.errors)} con errores en {time.monotonic() - started:.1f}s.'
+        )
+        self.stdout.write(self.style.WARNING(summary) if generator.errors else self.style.SUCCESS(summary))
+        if generator.flagged:
+            self.stdout.write(self.style.WARNING(
+                f'{generator.flagged} comprobantes ya emitidos tienen cambios en su ticket: no se regeneran y '
+                'quedan marcados para nota de crédito o revisión manual (needs_review).'
+            ))
+
+        if options['submit']:
+            processed = sign_and_submit(SriDocument.objects.filter(ticket__in=queryset))
+            self.stdout.write(self.style.SUCCESS(f'{processed} comprobantes firmados y enviados.'))
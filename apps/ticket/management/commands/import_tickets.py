@@ -0,0 +1,74 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.company.models import Company
+from apps.ticket.services.ticket_import import DEFAULT_CHUNK_SIZE, TicketImporter, TicketImportError
+
+
+class Command(BaseCommand):
+    help = 'Importa tickets desde un archivo Excel (.xlsx) o CSV por lotes, con reporte de errores por fila.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Ruta del archivo .xlsx o .csv')
+        parser.add_argument('--company', type=int, help='ID de la compañía (por defecto la primera)')
+        parser.add_argument('--renumber', action='store_true',
+                            help='Asignar nuevos números de documento en lugar de conservar los del archivo')
+        parser.add_argument('--dry-run', action='store_true', help='Solo validar, sin guardar')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+                            help='Líneas de detalle por transacción')
+        parser.add_argument('--errors-file', help='Ruta del CSV donde escribir el reporte de errores')
+
+    def handle(self, *args, **options):
+        if options['company']:
+            company = Company.objects.filter(pk=options['company']).first()
+        else:
+            company = Company.objects.first()
+        if company is None:
+            raise CommandError('No existe la compañía indicada. Cree una compañía antes de importar.')
+
+        started = time.monotonic()
+
+        def report_progress(result):
+            self.stdout.write(
+                f'  {result.rows_read} filas, {result.tickets_created} tickets creados, '
+                f'{result.error_count} errores ({time.monotonic() - started:.1f}s)'
+            )
+
+        importer = TicketImporter(
+            company=company,
+            renumber=options['renumber'],
+            dry_run=options['dry_run'],
+            chunk_size=options['chunk_size'],
+            on_chunk=report_progress if options['verbosity'] > 1 else None,
+        )
+        try:
+            with open(options['path'], 'rb') as fileobj:
+                result = importer.import_file(fileobj, options['path'])
+        except OSError as error:
+            raise CommandError(f'No se pudo abrir el archivo: {error}')
+        except TicketImportError as error:
+            raise CommandError(str(error))
+
+        if options['errors_file'] and result.errors:
+            with open(options['errors_file'], 'w', newline='', encoding='utf-8') as errors_file:
+                writer = csv.writer(errors_file)
+                writer.writerow(['Fila', 'Número de Ticket', 'Columna', 'Error'])
+                for error in result.errors:
+                    writer.writerow([error.row, error.document_number, error.column, error.message])
+        elif result.errors:
+            for error in result.errors[:20]:
+                self.stderr.write(f'  Fila {error.row} [{error.document_number}] {error.column}: {error.message}')
+            if result.error_count > 20:
+                self.stderr.write(f'  ... {result.error_count - 20} errores más (use --errors-file)')
+
+        elapsed = time.monotonic() - started
+        summary = (
+            f'{result.rows_read} filas leídas, {result.tickets_created} tickets y '
+            f'{result.details_created} detalles creados, {result.documents_rejected} tickets rechazados '
+            f'en {elapsed:.1f}s.'
+        )
+        if options['dry_run']:
+            summary = f'[dry-run] {summary}'
+        self.stdout.write(self.style.WARNING(summary) if result.has_errors else self.style.SUCCESS(summary))
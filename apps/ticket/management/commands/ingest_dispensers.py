@@ -0,0 +1,85 @@
+import json
+import socketserver
+import threading
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.company.models import Company
+from apps.ticket.services.dispenser import DispenserEventError, DispenserIngestor, get_metrics, parse_event
+
+ACK_TIMEOUT_SECONDS = 10
+
+
+class Command(BaseCommand):
+    help = (
+        'Servicio de ingesta de ventas de los surtidores: escucha líneas JSON en un socket TCP local, '
+        'las guarda por lotes y crea los tickets al emparejarlas con la placa y el vendedor registrados '
+        'en la isla. Cada venta se confirma con {"ack": sale_id} después de guardarse.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=None, help='Interfaz (por defecto DISPENSER_HOST)')
+        parser.add_argument('--port', type=int, default=None, help='Puerto (por defecto DISPENSER_PORT)')
+        parser.add_argument('--batch-size', type=int, help='Ventas por lote (por defecto DISPENSER_BATCH_SIZE)')
+        parser.add_argument('--flush-seconds', type=float, help='Espera máxima por lote (por defecto DISPENSER_FLUSH_SECONDS)')
+        parser.add_argument('--stats-seconds', type=float, default=30, help='Intervalo de las métricas en consola')
+        parser.add_argument('--company', type=int, help='ID de la compañía de la estación (por defecto la primera)')
+
+    def handle(self, *args, **options):
+        if options['company']:
+            company = Company.objects.filter(pk=options['company']).first()
+        else:
+            company = Company.objects.first()
+        if company is None:
+            raise CommandError('No existe la compañía indicada para asignar los tickets.')
+
+        ingestor = DispenserIngestor(company, batch_size=options['batch_size'], flush_seconds=options['flush_seconds'])
+        command = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                for raw_line in self.rfile:
+                    line = raw_line.decode('utf-8', 'replace').strip()
+                    if not line:
+                        continue
+                    try:
+                        event = parse_event(line)
+                        ingestor.submit(event).result(timeout=ACK_TIMEOUT_SECONDS)
+                        reply = {'ack': event['sale_id']}
+                    except DispenserEventError as error:
+                        reply = {'error': str(error)}
+                    except Exception as error:
+                        command.stderr.write(f'Error al guardar la venta: {error}')
+                        reply = {'error': 'No guardada, reintente.'}
+                    self.wfile.write(json.dumps(reply).encode('utf-8') + b'\n')
+
+        class Server(socketserver.ThreadingTCPServer):
+            daemon_threads = True
+            allow_reuse_address = True
+
+        address = (options['host'] or settings.DISPENSER_HOST, options['port'] or settings.DISPENSER_PORT)
+        server = Server(address, Handler)
+        worker = threading.Thread(target=ingestor.run, name='dispenser-ingestor', daemon=True)
+        worker.start()
+        threading.Thread(target=server.serve_forever, name='dispenser-server', daemon=True).start()
+        self.stdout.write(f'Escuchando surtidores en {address[0]}:{address[1]}')
+
+        try:
+            while True:
+                time.sleep(options['stats_seconds'])
+                metrics = get_metrics(company.pk)
+                self.stdout.write(
+                    f'{ingestor.received} recibidas, {ingestor.tickets_created} tickets, cola {ingestor.queue.qsize()}, '
+                    f'último lote {ingestor.last_store_seconds * 1000:.0f} ms; '
+                    f'{metrics["pending"]} pendientes ({metrics["backlog_seconds"]:.0f}s), '
+                    f'{metrics["unmatched"]} sin asignación, latencia media {metrics["latency_avg_seconds"]:.1f}s'
+                )
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.shutdown()
+            server.server_close()
+            ingestor.stop()
+            worker.join(timeout=5)
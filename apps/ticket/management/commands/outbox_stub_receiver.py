@@ -0,0 +1,55 @@
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        'Receptor HTTP local que simula el sistema de flota para probar dispatch_outbox: '
+        'acepta lotes de eventos, puede fallar o demorar a propósito y detecta duplicados.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument('--fail-rate', type=float, default=0.0, help='Proporción de lotes que responden 503')
+        parser.add_argument('--delay', type=float, default=0.0, help='Segundos de demora por lote')
+
+    def handle(self, *args, **options):
+        command = self
+        received = set()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+                time.sleep(options['delay'])
+                if random.random() < options['fail_rate']:
+                    self.send_response(503)
+                    self.end_headers()
+                    command.stdout.write('Lote rechazado (falla simulada)')
+                    return
+                ids = [event['id'] for event in json.loads(body)['events']]
+                duplicates = [event_id for event_id in ids if event_id in received]
+                received.update(ids)
+                command.stdout.write(
+                    f'Lote de {len(ids)} eventos ({ids[0]}-{ids[-1]}), {len(duplicates)} duplicados, '
+                    f'{len(received)} recibidos en total'
+                )
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.end_headers()
+                self.wfile.write(b'{"status": "ok"}')
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), Handler)
+        self.stdout.write(f'Receptor escuchando en http://127.0.0.1:{options["port"]}/')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
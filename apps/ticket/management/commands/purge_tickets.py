@@ -0,0 +1,42 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ticket.models import PurgeJob
+from apps.ticket.services.purge import TicketPurger, enqueue_retention_purge
+
+
+class Command(BaseCommand):
+    help = (
+        'Archiva en .jsonl.gz y elimina por lotes los tickets más antiguos que la ventana de retención '
+        '(TICKET_RETENTION_DAYS). Con --enqueue solo programa el trabajo para run_purge_jobs.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--retention-days', type=int, default=settings.TICKET_RETENTION_DAYS,
+                            help='Conservar los tickets de los últimos N días')
+        parser.add_argument('--no-archive', action='store_true', help='Eliminar sin archivar')
+        parser.add_argument('--chunk-size', type=int, default=settings.PURGE_CHUNK_SIZE,
+                            help='Tickets por lote (una transacción por lote)')
+        parser.add_argument('--enqueue', action='store_true', help='Programar el trabajo en lugar de ejecutarlo')
+
+    def handle(self, *args, **options):
+        if options['retention_days'] < 0 or options['chunk_size'] <= 0:
+            raise CommandError('--retention-days debe ser >= 0 y --chunk-size > 0.')
+
+        job = enqueue_retention_purge(options['retention_days'], archive=not options['no_archive'])
+        self.stdout.write(f'Depuración #{job.pk}: tickets anteriores a {job.cutoff:%Y-%m-%d %H:%M}.')
+        if options['enqueue']:
+            return
+
+        job.status = PurgeJob.STATUS_RUNNING
+        job.save(update_fields=['status'])
+
+        def report_progress(purger):
+            self.stdout.write(f'  {purger.job.tickets_deleted} tickets eliminados, '
+                              f'{purger.job.details_deleted} detalles')
+
+        job = TicketPurger(job, chunk_size=options['chunk_size'], on_chunk=report_progress).run()
+        self.stdout.write(self.style.SUCCESS(
+            f'{job.tickets_deleted} tickets eliminados ({job.tickets_archived} archivados), '
+            f'{job.details_deleted} detalles.'
+        ))
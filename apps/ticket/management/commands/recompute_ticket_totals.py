@@ -0,0 +1,84 @@
+from decimal import Decimal, InvalidOperation
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ticket.models import Ticket
+from apps.ticket.services.totals import DEFAULT_CHUNK_SIZE, TotalRecalculator
+
+
+class Command(BaseCommand):
+    help = (
+        'Recalcula en SQL, por lotes de ids, el total de los tickets filtrados (y opcionalmente su tarifa de IVA). '
+        '--dry-run muestra las diferencias sin escribir; --verify solo informa los totales incorrectos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date-from', help='Fecha inicial (AAAA-MM-DD)')
+        parser.add_argument('--date-to', help='Fecha final (AAAA-MM-DD)')
+        parser.add_argument('--company', type=int, help='ID de la compañía')
+        parser.add_argument('--iva', help='Solo tickets con esta tarifa de IVA guardada')
+        parser.add_argument('--set-iva', help='Nueva tarifa de IVA para los tickets filtrados')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rango de ids por UPDATE')
+        parser.add_argument('--skip-change-log', action='store_true',
+                            help='No registrar los cambios en el feed (un solo UPDATE por lote)')
+        mode = parser.add_mutually_exclusive_group()
+        mode.add_argument('--dry-run', action='store_true', help='Mostrar las diferencias sin guardar')
+        mode.add_argument('--verify', action='store_true',
+                          help='Informar los tickets cuyo total guardado no coincide con el calculado')
+
+    def parse_decimal(self, value, option):
+        try:
+            return Decimal(value)
+        except InvalidOperation:
+            raise CommandError(f'{option} debe ser un número: {value}')
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] <= 0:
+            raise CommandError('--chunk-size debe ser mayor que 0.')
+        if options['verify'] and options['set_iva']:
+            raise CommandError('--verify compara con la tarifa guardada; no se puede combinar con --set-iva.')
+
+        queryset = Ticket.objects.all()
+        if options['date_from']:
+            queryset = queryset.filter(date__date__gte=options['date_from'])
+        if options['date_to']:
+            queryset = queryset.filter(date__date__lte=options['date_to'])
+        if options['company']:
+            queryset = queryset.filter(company_id=options['company'])
+        if options['iva']:
+            queryset = queryset.filter(iva_percentage=self.parse_decimal(options['iva'], '--iva'))
+        set_iva = self.parse_decimal(options['set_iva'], '--set-iva') if options['set_iva'] else None
+
+        read_only = options['dry_run'] or options['verify']
+
+        def report_progress(recalculator, last_id):
+            if options['verbosity'] > 1:
+                found = recalculator.mismatched if read_only else recalculator.updated
+                self.stdout.write(f'  hasta id {last_id}: {found} tickets con diferencias')
+
+        recalculator = TotalRecalculator(
+            queryset,
+            iva_percentage=set_iva,
+            chunk_size=options['chunk_size'],
+            record_changes=not options['skip_change_log'],
+            on_chunk=report_progress,
+        )
+
+        if read_only:
+            recalculator.diff()
+            for sample in recalculator.samples:
+                self.stdout.write(
+                    f'  {sample["document_number"]} (id {sample["pk"]}, IVA {sample["iva_percentage"]}%): '
+                    f'{sample["total"]} -> {sample["computed_total"]}'
+                )
+            summary = (
+                f'{recalculator.mismatched} de {recalculator.checked} tickets con diferencias '
+                f'(diferencia acumulada {recalculator.difference:.8f}).'
+            )
+            if options['verify'] and recalculator.mismatched:
+                raise CommandError(summary)
+            self.stdout.write(self.style.SUCCESS(summary))
+            return
+
+        recalculator.apply()
+        self.stdout.write(self.style.SUCCESS(f'{recalculator.updated} tickets actualizados.'))
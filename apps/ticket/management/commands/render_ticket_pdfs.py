@@ -0,0 +1,50 @@
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.company.models import Company
+from apps.ticket.models import Ticket
+from apps.ticket.services.pdf import PDF_SIZES, PdfRenderError, render_batch
+from apps.ticket.services.reports import start_of_day
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera los PDF de los tickets de un rango de fechas en paralelo y los une en un solo archivo. '
+        'Los PDF quedan en la caché (TICKET_PDF_DIR), así las reimpresiones no vuelven a generarlos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help='Ruta del PDF unido')
+        parser.add_argument('--date-from', type=date.fromisoformat, help='Desde (AAAA-MM-DD)')
+        parser.add_argument('--date-to', type=date.fromisoformat, help='Hasta, inclusive (AAAA-MM-DD)')
+        parser.add_argument('--company', type=int, help='Id de la compañía (por defecto la primera)')
+        parser.add_argument('--size', choices=list(PDF_SIZES), default='half')
+        parser.add_argument('--workers', type=int, default=settings.TICKET_PDF_WORKERS,
+                            help='Procesos para generar los PDF que no están en caché')
+
+    def handle(self, *args, **options):
+        if options['workers'] <= 0:
+            raise CommandError('--workers debe ser mayor que 0.')
+        company = (
+            Company.objects.filter(pk=options['company']).first() if options['company'] else Company.objects.first()
+        )
+        if company is None:
+            raise CommandError('No existe la compañía.')
+
+        tickets = Ticket.objects.filter(company_id=company.pk)
+        if options['date_from']:
+            tickets = tickets.filter(date__gte=start_of_day(options['date_from']))
+        if options['date_to']:
+            tickets = tickets.filter(date__lt=start_of_day(options['date_to'] + timedelta(days=1)))
+        ticket_ids = list(tickets.order_by('date', 'id').values_list('pk', flat=True))
+        if not ticket_ids:
+            self.stdout.write('No hay tickets en el rango.')
+            return
+
+        try:
+            merged = render_batch(ticket_ids, options['size'], options['output'], options['workers'])
+        except PdfRenderError as error:
+            raise CommandError(str(error))
+        self.stdout.write(self.style.SUCCESS(f'{merged} tickets de {company.name} en {options["output"]}.'))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from apps.ticket.services.purge import TicketPurger, claim_next_job
+
+
+class Command(BaseCommand):
+    help = (
+        'Ejecuta las depuraciones programadas (eliminación de compañías con sus tickets y retención). '
+        'Sin --once queda esperando nuevos trabajos.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Procesar los trabajos pendientes y terminar')
+        parser.add_argument('--sleep', type=float, default=5.0, help='Segundos entre consultas sin trabajos')
+
+    def handle(self, *args, **options):
+        while True:
+            job = claim_next_job()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(options['sleep'])
+                continue
+
+            self.stdout.write(f'Depuración #{job.pk} ({job.get_kind_display()}) iniciada.')
+            try:
+                TicketPurger(job).run()
+            except Exception as error:
+                # El trabajo queda como fallido; se puede volver a programar sin repetir lo ya borrado
+                self.stderr.write(self.style.ERROR(f'Depuración #{job.pk} fallida: {error}'))
+                continue
+            self.stdout.write(self.style.SUCCESS(
+                f'Depuración #{job.pk} terminada: {job.tickets_deleted} tickets, {job.details_deleted} detalles.'
+            ))
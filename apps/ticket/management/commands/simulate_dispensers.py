@@ -0,0 +1,112 @@
+import json
+import random
+import socket
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from apps.company.models import Company
+from apps.ticket.models import PumpAssignment
+from apps.ticket.services.dispenser import get_metrics
+
+PRODUCTS = [('Diesel', Decimal('1.03700000')), ('Gasolina Extra', Decimal('2.47100000')), ('Gasolina Super', Decimal('3.56100000'))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Simula surtidores que envían ventas a ingest_dispensers: una conexión por surtidor, en ráfaga '
+        'o a intervalos, registrando antes las placas en la isla. Informa la latencia de confirmación '
+        'y espera a que se creen los tickets.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default=None)
+        parser.add_argument('--port', type=int, default=None)
+        parser.add_argument('--pumps', type=int, default=12, help='Surtidores simultáneos')
+        parser.add_argument('--sales', type=int, default=50, help='Ventas por surtidor')
+        parser.add_argument('--interval', type=float, default=0.0, help='Segundos entre ventas (0 = ráfaga)')
+        parser.add_argument('--no-assign', action='store_true', help='No registrar placas (las ventas quedan pendientes)')
+        parser.add_argument('--duplicates', type=float, default=0.0, help='Proporción de ventas reenviadas')
+        parser.add_argument('--wait', type=float, default=30.0, help='Segundos máximos esperando los tickets')
+        parser.add_argument('--company', type=int, help='ID de la compañía de ingest_dispensers (por defecto la primera)')
+
+    def handle(self, *args, **options):
+        if options['company']:
+            company = Company.objects.filter(pk=options['company']).first()
+        else:
+            company = Company.objects.first()
+        if company is None:
+            raise CommandError('No existe la compañía indicada para registrar las placas.')
+        address = (options['host'] or settings.DISPENSER_HOST, options['port'] or settings.DISPENSER_PORT)
+        pumps = range(1, options['pumps'] + 1)
+        # Números de venta distintos en cada ejecución: los surtidores reales no los repiten
+        first_sale_id = int(time.time() * 1000)
+
+        if not options['no_assign']:
+            PumpAssignment.objects.bulk_create([
+                PumpAssignment(company=company, pump=pump, plate=f'SIM-{pump:02d}{index:03d}', seller=f'Isla {(pump + 1) // 2}')
+                for pump in pumps for index in range(options['sales'])
+            ])
+
+        latencies = []
+        errors = []
+        lock = threading.Lock()
+
+        def run_pump(pump):
+            with socket.create_connection(address) as connection:
+                stream = connection.makefile('rwb')
+                for index in range(options['sales']):
+                    product, price = random.choice(PRODUCTS)
+                    event = {
+                        'pump': pump,
+                        'sale_id': first_sale_id + index,
+                        'product': product,
+                        'quantity': f'{random.uniform(2, 60):.8f}',
+                        'unit_price': str(price),
+                        # Despacho posterior a las asignaciones: solo se emparejan las registradas antes
+                        'dispensed_at': timezone.now().isoformat(),
+                    }
+                    sends = 2 if random.random() < options['duplicates'] else 1
+                    for _ in range(sends):
+                        started = time.perf_counter()
+                        stream.write(json.dumps(event).encode('utf-8') + b'\n')
+                        stream.flush()
+                        reply = json.loads(stream.readline())
+                        with lock:
+                            latencies.append(time.perf_counter() - started)
+                            if 'error' in reply:
+                                errors.append(reply['error'])
+                    if options['interval']:
+                        time.sleep(options['interval'])
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=run_pump, args=(pump,)) for pump in pumps]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        latencies.sort()
+        if latencies:
+            self.stdout.write(
+                f'{len(latencies)} envíos en {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s); confirmación '
+                f'p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, '
+                f'p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f} ms, '
+                f'máx {latencies[-1] * 1000:.1f} ms; {len(errors)} errores'
+            )
+
+        deadline = time.monotonic() + options['wait']
+        metrics = get_metrics(company.pk)
+        while metrics['pending'] and not options['no_assign'] and time.monotonic() < deadline:
+            time.sleep(0.5)
+            metrics = get_metrics(company.pk)
+        summary = (
+            f'{metrics["pending"]} ventas pendientes, {metrics["unmatched"]} sin asignación; '
+            f'venta a ticket: media {metrics["latency_avg_seconds"]:.2f}s, máx {metrics["latency_max_seconds"]:.2f}s.'
+        )
+        self.stdout.write(self.style.WARNING(summary) if errors or metrics['pending'] else self.style.SUCCESS(summary))
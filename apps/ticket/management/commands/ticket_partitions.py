@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.ticket.services.partitions import (
+    PartitioningError, convert, detach_before, ensure_partitions, list_partitions,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mantiene las particiones mensuales de tickets y detalles: por defecto crea las de los '
+        'próximos meses (TICKET_PARTITION_MONTHS_AHEAD). Pensado para ejecutarse a diario.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--months-ahead', type=int, default=settings.TICKET_PARTITION_MONTHS_AHEAD,
+                            help='Meses futuros con partición creada')
+        parser.add_argument('--convert', action='store_true',
+                            help='Convertir las tablas actuales en particionadas (bloquea las tablas mientras copia)')
+        parser.add_argument('--detach-before', metavar='AAAA-MM',
+                            help='Separar las particiones anteriores a ese mes (quedan como tablas sueltas)')
+        parser.add_argument('--drop', action='store_true', help='Con --detach-before, eliminar las particiones separadas')
+        parser.add_argument('--status', action='store_true', help='Listar las particiones y sus filas estimadas')
+
+    def handle(self, *args, **options):
+        if options['months_ahead'] < 0:
+            raise CommandError('--months-ahead debe ser >= 0.')
+        if options['drop'] and not options['detach_before']:
+            raise CommandError('--drop solo se usa con --detach-before.')
+
+        if options['status']:
+            for table, partition, bounds, rows in list_partitions():
+                self.stdout.write(f'{table:<22} {partition:<32} {rows:>10}  {bounds}')
+            return
+
+        if options['detach_before']:
+            try:
+                month = datetime.strptime(options['detach_before'], '%Y-%m').date()
+            except ValueError:
+                raise CommandError('--detach-before debe tener el formato AAAA-MM.')
+            detached = detach_before(month, drop=options['drop'])
+            action = 'eliminadas' if options['drop'] else 'separadas'
+            self.stdout.write(self.style.SUCCESS(f'{len(detached)} particiones {action}.'))
+            for name in detached:
+                self.stdout.write(f'  {name}')
+            return
+
+        try:
+            created = convert(options['months_ahead']) if options['convert'] else ensure_partitions(options['months_ahead'])
+        except PartitioningError as error:
+            raise CommandError(str(error))
+        if not created:
+            self.stdout.write('Las tablas de tickets no están particionadas (TICKET_PARTITIONING y --convert).')
+            return
+        for table, count in created.items():
+            self.stdout.write(self.style.SUCCESS(f'{table}: {count} particiones nuevas.'))
@@ -0,0 +1,30 @@
+# Generated by Django 6.0.1 on 2026-10-19 10:05
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0002_ticket_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TicketChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha del Cambio')),
+                ('entity', models.CharField(choices=[('ticket', 'Ticket'), ('detail', 'Detalle')], max_length=10, verbose_name='Entidad')),
+                ('action', models.CharField(choices=[('insert', 'Inserción'), ('update', 'Actualización'), ('delete', 'Eliminación')], max_length=10, verbose_name='Acción')),
+                ('object_id', models.BigIntegerField(verbose_name='ID del Objeto')),
+                ('ticket_ref', models.BigIntegerField(verbose_name='ID del Ticket')),
+                ('data', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Datos')),
+            ],
+            options={
+                'verbose_name': 'Cambio de Ticket',
+                'verbose_name_plural': 'Cambios de Tickets',
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0003_ticketchange'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SriDocument',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('access_key', models.CharField(max_length=49, unique=True, verbose_name='Clave de Acceso')),
+                ('xml', models.TextField(verbose_name='XML del Comprobante')),
+                ('signed_xml', models.TextField(blank=True, verbose_name='XML Firmado')),
+                ('status', models.CharField(choices=[('generated', 'Generado'), ('signed', 'Firmado'), ('submitted', 'Enviado'), ('authorized', 'Autorizado'), ('rejected', 'Rechazado')], default='generated', max_length=20, verbose_name='Estado')),
+                ('source_modified', models.DateTimeField(verbose_name='Versión del Ticket')),
+                ('generated_at', models.DateTimeField(auto_now=True, verbose_name='Fecha de Generación')),
+                ('ticket', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='sri_document', to='ticket.ticket', verbose_name='Ticket')),
+            ],
+            options={
+                'verbose_name': 'Comprobante SRI',
+                'verbose_name_plural': 'Comprobantes SRI',
+            },
+        ),
+    ]
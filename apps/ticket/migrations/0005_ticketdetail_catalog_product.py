@@ -0,0 +1,20 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:02
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0001_initial'),
+        ('ticket', '0004_sridocument'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketdetail',
+            name='catalog_product',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ticket_details', to='product.product', verbose_name='Producto del Catálogo'),
+        ),
+    ]
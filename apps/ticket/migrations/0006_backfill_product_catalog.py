@@ -0,0 +1,46 @@
+from collections import Counter, defaultdict
+
+from django.db import migrations
+
+from apps.product.catalog import normalize_name
+
+
+def backfill_product_catalog(apps, schema_editor):
+    """
+    Crea una entrada del catálogo por cada nombre de producto distinto (normalizado) usado en
+    los detalles y enlaza los detalles existentes con un UPDATE por producto.
+    El nombre del catálogo es la variante más usada y el precio, el de la línea más reciente.
+    """
+    Product = apps.get_model('product', 'Product')
+    TicketDetail = apps.get_model('ticket', 'TicketDetail')
+
+    variants = defaultdict(Counter)
+    latest_price = {}
+    rows = TicketDetail.objects.order_by('id').values_list('product', 'unit_price').iterator(chunk_size=5000)
+    for product, unit_price in rows:
+        normalized = normalize_name(product)
+        if normalized:
+            variants[normalized][product] += 1
+            latest_price[normalized] = unit_price
+
+    existing = dict(Product.objects.values_list('normalized_name', 'id'))
+    for normalized, counter in variants.items():
+        product_id = existing.get(normalized)
+        if product_id is None:
+            product_id = Product.objects.create(
+                name=counter.most_common(1)[0][0].strip(),
+                normalized_name=normalized,
+                unit_price=latest_price[normalized],
+            ).id
+        TicketDetail.objects.filter(product__in=list(counter), catalog_product__isnull=True).update(catalog_product_id=product_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0005_ticketdetail_catalog_product'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_product_catalog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:05
+
+from django.db import migrations, models
+from django.db.models import Value
+from django.db.models.functions import Replace, Upper
+
+
+def normalize_plates(apps, schema_editor):
+    """Placas existentes en mayúsculas y sin espacios, como las guarda TicketForm."""
+    Ticket = apps.get_model('ticket', 'Ticket')
+    Ticket.objects.update(plate=Replace(Upper('plate'), Value(' '), Value('')))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0006_backfill_product_catalog'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_plates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['plate', '-date'], name='ticket_plate_date_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 11:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0007_ticket_plate_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['-date'], name='ticket_date_idx'),
+        ),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 6.0.1 on 2026-10-19 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0008_ticket_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ticket_id', models.BigIntegerField(db_index=True, verbose_name='ID del Ticket')),
+                ('document_number', models.CharField(db_index=True, max_length=20, verbose_name='Número de Documento')),
+                ('date', models.DateTimeField(db_index=True, verbose_name='Fecha')),
+                ('plate', models.CharField(db_index=True, max_length=20, verbose_name='Placa')),
+                ('company_name', models.CharField(max_length=255, verbose_name='Compañía')),
+                ('total', models.DecimalField(decimal_places=8, max_digits=15, verbose_name='Total')),
+                ('archive_file', models.CharField(max_length=255, verbose_name='Archivo')),
+                ('offset', models.BigIntegerField(verbose_name='Posición')),
+                ('length', models.IntegerField(verbose_name='Longitud')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Fecha de Archivo')),
+            ],
+            options={
+                'verbose_name': 'Ticket Archivado',
+                'verbose_name_plural': 'Tickets Archivados',
+                'ordering': ['-date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PurgeJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('retention', 'Retención'), ('company', 'Compañía')], max_length=20, verbose_name='Tipo')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('running', 'En ejecución'), ('done', 'Terminado'), ('failed', 'Fallido')], db_index=True, default='pending', max_length=20, verbose_name='Estado')),
+                ('company_id_ref', models.BigIntegerField(blank=True, null=True, verbose_name='ID de la Compañía')),
+                ('company_name', models.CharField(blank=True, max_length=255, verbose_name='Compañía')),
+                ('cutoff', models.DateTimeField(blank=True, null=True, verbose_name='Tickets Anteriores a')),
+                ('archive', models.BooleanField(default=True, verbose_name='Archivar antes de eliminar')),
+                ('tickets_archived', models.IntegerField(default=0, verbose_name='Tickets Archivados')),
+                ('tickets_deleted', models.IntegerField(default=0, verbose_name='Tickets Eliminados')),
+                ('details_deleted', models.IntegerField(default=0, verbose_name='Detalles Eliminados')),
+                ('error', models.TextField(blank=True, verbose_name='Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+            ],
+            options={
+                'verbose_name': 'Depuración de Tickets',
+                'verbose_name_plural': 'Depuraciones de Tickets',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
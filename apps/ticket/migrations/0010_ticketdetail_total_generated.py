@@ -0,0 +1,28 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:10
+
+import django.db.models.expressions
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """
+    TicketDetail.total pasa a ser una columna generada (STORED). Django no permite convertir
+    una columna existente en generada, así que se elimina y se vuelve a crear: la base la
+    calcula para todas las filas existentes al agregarla.
+    """
+
+    dependencies = [
+        ('ticket', '0009_archivedticket_purgejob'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='ticketdetail',
+            name='total',
+        ),
+        migrations.AddField(
+            model_name='ticketdetail',
+            name='total',
+            field=models.GeneratedField(db_persist=True, expression=django.db.models.expressions.CombinedExpression(models.F('quantity'), '*', models.F('unit_price')), output_field=models.DecimalField(decimal_places=8, max_digits=15), verbose_name='Total'),
+        ),
+    ]
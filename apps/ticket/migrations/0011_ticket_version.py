@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 13:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0010_ticketdetail_total_generated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticket',
+            name='version',
+            field=models.PositiveIntegerField(default=1, verbose_name='Versión'),
+        ),
+    ]
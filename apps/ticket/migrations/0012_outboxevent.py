@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:20
+
+import django.core.serializers.json
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0011_ticket_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('topic', models.CharField(max_length=50, verbose_name='Tema')),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Contenido')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('sent', 'Enviado'), ('dead', 'Descartado')], default='pending', max_length=10, verbose_name='Estado')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Próximo Intento')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último Error')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Creado')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Enviado')),
+            ],
+            options={
+                'verbose_name': 'Evento de Salida',
+                'verbose_name_plural': 'Eventos de Salida',
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='outbox_pending_idx')],
+            },
+        ),
+    ]
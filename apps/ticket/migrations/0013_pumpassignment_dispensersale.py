@@ -0,0 +1,55 @@
+# Generated by Django 6.0.1 on 2026-10-19 15:05
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0012_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PumpAssignment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pump', models.PositiveSmallIntegerField(verbose_name='Surtidor')),
+                ('plate', models.CharField(max_length=20, verbose_name='Placa')),
+                ('seller', models.CharField(blank=True, max_length=255, verbose_name='Vendedor')),
+                ('phone', models.CharField(blank=True, max_length=20, verbose_name='Teléfono')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Registrada')),
+                ('consumed_at', models.DateTimeField(blank=True, null=True, verbose_name='Consumida')),
+            ],
+            options={
+                'verbose_name': 'Asignación de Surtidor',
+                'verbose_name_plural': 'Asignaciones de Surtidor',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(condition=models.Q(('consumed_at__isnull', True)), fields=['pump', 'created_at'], name='pump_assignment_open_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='DispenserSale',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pump', models.PositiveSmallIntegerField(verbose_name='Surtidor')),
+                ('sale_id', models.PositiveBigIntegerField(verbose_name='Venta del Surtidor')),
+                ('product', models.CharField(max_length=255, verbose_name='Producto')),
+                ('quantity', models.DecimalField(decimal_places=8, max_digits=15, verbose_name='Cantidad')),
+                ('unit_price', models.DecimalField(decimal_places=8, max_digits=15, verbose_name='P. Unitario')),
+                ('dispensed_at', models.DateTimeField(verbose_name='Despachada')),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Recibida')),
+                ('status', models.CharField(choices=[('pending', 'Pendiente'), ('ticketed', 'Con ticket'), ('unmatched', 'Sin asignación')], default='pending', max_length=10, verbose_name='Estado')),
+                ('ticketed_at', models.DateTimeField(blank=True, null=True, verbose_name='Ticket Creado')),
+                ('ticket', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='dispenser_sales', to='ticket.ticket', verbose_name='Ticket')),
+            ],
+            options={
+                'verbose_name': 'Venta de Surtidor',
+                'verbose_name_plural': 'Ventas de Surtidor',
+                'indexes': [models.Index(fields=['status', 'received_at'], name='dispenser_sale_status_idx')],
+                'constraints': [models.UniqueConstraint(fields=('pump', 'sale_id'), name='dispenser_sale_unique')],
+            },
+        ),
+    ]
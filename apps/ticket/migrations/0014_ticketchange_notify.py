@@ -0,0 +1,33 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:20
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0013_pumpassignment_dispensersale'),
+    ]
+
+    operations = [
+        # NOTIFY por sentencia (no por fila): un bulk_create de mil cambios es un solo aviso,
+        # y Postgres lo entrega recién al confirmarse la transacción
+        migrations.RunSQL(
+            sql="""
+                CREATE FUNCTION ticket_change_notify() RETURNS trigger AS $$
+                BEGIN
+                    PERFORM pg_notify('ticket_changes', '');
+                    RETURN NULL;
+                END;
+                $$ LANGUAGE plpgsql;
+
+                CREATE TRIGGER ticket_change_notify
+                    AFTER INSERT ON ticket_ticketchange
+                    FOR EACH STATEMENT EXECUTE FUNCTION ticket_change_notify();
+            """,
+            reverse_sql="""
+                DROP TRIGGER IF EXISTS ticket_change_notify ON ticket_ticketchange;
+                DROP FUNCTION IF EXISTS ticket_change_notify();
+            """,
+        ),
+    ]
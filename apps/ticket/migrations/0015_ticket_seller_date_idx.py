@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0014_ticketchange_notify'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['seller', '-date'], name='ticket_seller_date_idx'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Max
+from django.db.models.functions import Cast
+
+
+def create_document_sequences(apps, schema_editor):
+    """Una secuencia por compañía que continúa desde su mayor número numérico ya emitido."""
+    Company = apps.get_model('company', 'Company')
+    Ticket = apps.get_model('ticket', 'Ticket')
+    DocumentSequence = apps.get_model('ticket', 'DocumentSequence')
+
+    last_numbers = dict(
+        Ticket.objects
+        .filter(document_number__regex=r'^[0-9]+$')
+        .order_by()
+        .values('company_id')
+        .annotate(last=Max(Cast('document_number', models.BigIntegerField())))
+        .values_list('company_id', 'last')
+    )
+    DocumentSequence.objects.bulk_create([
+        DocumentSequence(company_id=company_id, last_number=last_numbers.get(company_id) or 0)
+        for company_id in Company.objects.values_list('id', flat=True)
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0002_company_updated_at'),
+        ('ticket', '0015_ticket_seller_date_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('company', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='document_sequence', serialize=False, to='company.company', verbose_name='Compañía')),
+                ('last_number', models.PositiveBigIntegerField(default=0, verbose_name='Último Número')),
+            ],
+            options={
+                'verbose_name': 'Secuencia de Documentos',
+                'verbose_name_plural': 'Secuencias de Documentos',
+            },
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='document_number',
+            field=models.CharField(blank=True, max_length=20, verbose_name='Número de Documento'),
+        ),
+        migrations.AlterField(
+            model_name='ticket',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='company.company', verbose_name='Compañía'),
+        ),
+        migrations.AddConstraint(
+            model_name='ticket',
+            constraint=models.UniqueConstraint(fields=('company', 'document_number'), name='ticket_company_document_unique'),
+        ),
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_plate_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='ticket_seller_date_idx',
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['company', '-date'], name='ticket_company_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['company', 'plate', '-date'], name='ticket_company_plate_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['company', 'seller', '-date'], name='ticket_company_seller_date_idx'),
+        ),
+        migrations.RunPython(create_document_sequences, migrations.RunPython.noop),
+    ]
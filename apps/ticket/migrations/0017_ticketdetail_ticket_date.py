@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:40
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_ticket_date(apps, schema_editor):
+    """Copia la fecha del ticket en sus detalles con un solo UPDATE."""
+    Ticket = apps.get_model('ticket', 'Ticket')
+    TicketDetail = apps.get_model('ticket', 'TicketDetail')
+    TicketDetail.objects.update(
+        ticket_date=Subquery(Ticket.objects.filter(pk=OuterRef('ticket_id')).values('date')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0016_company_tenancy'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketdetail',
+            name='ticket_date',
+            field=models.DateTimeField(editable=False, null=True, verbose_name='Fecha del Ticket'),
+        ),
+        migrations.RunPython(backfill_ticket_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='ticketdetail',
+            name='ticket_date',
+            field=models.DateTimeField(editable=False, verbose_name='Fecha del Ticket'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 6.0.1 on 2026-10-19 16:40
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Sin operaciones: la conversión a tablas particionadas bloquea y copia las tablas de
+    tickets, así que no se hace al migrar sino con `ticket_partitions --convert`, en una
+    ventana de mantenimiento.
+    """
+
+    dependencies = [
+        ('ticket', '0017_ticketdetail_ticket_date'),
+    ]
+
+    operations = []
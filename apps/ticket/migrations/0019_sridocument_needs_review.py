@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0018_ticket_partitioning'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sridocument',
+            name='needs_review',
+            field=models.BooleanField(default=False, verbose_name='Requiere Revisión'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:45
+
+import apps.ticket.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('ticket', '0019_sridocument_needs_review'),
+    ]
+
+    operations = [
+        # Las filas existentes toman el id de la transacción de la migración, menor que cualquier posterior
+        migrations.AddField(
+            model_name='ticketchange',
+            name='txid',
+            field=models.BigIntegerField(db_default=apps.ticket.models.CurrentTransactionId(), editable=False, verbose_name='Transacción'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketchange',
+            index=models.Index(fields=['txid', 'id'], name='ticket_change_txid_idx'),
+        ),
+    ]
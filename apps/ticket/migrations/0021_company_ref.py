@@ -0,0 +1,50 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:50
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_company_ref(apps, schema_editor):
+    """
+    Compañía de los cambios y eventos existentes. Los cambios de tickets ya eliminados quedan
+    sin compañía y no aparecen en el feed de ninguna estación.
+    """
+    Company = apps.get_model('company', 'Company')
+    Ticket = apps.get_model('ticket', 'Ticket')
+    TicketChange = apps.get_model('ticket', 'TicketChange')
+    OutboxEvent = apps.get_model('ticket', 'OutboxEvent')
+    TicketChange.objects.update(
+        company_ref=Subquery(Ticket.objects.filter(pk=OuterRef('ticket_ref')).values('company_id')[:1])
+    )
+    for company_id, ruc in Company.objects.values_list('id', 'ruc'):
+        OutboxEvent.objects.filter(payload__company_ruc=ruc).update(company_ref=company_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0002_company_updated_at'),
+        ('ticket', '0020_ticketchange_txid'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ticketchange',
+            name='company_ref',
+            field=models.BigIntegerField(null=True, verbose_name='ID de la Compañía'),
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='company_ref',
+            field=models.BigIntegerField(null=True, verbose_name='ID de la Compañía'),
+        ),
+        migrations.RunPython(backfill_company_ref, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='ticketchange',
+            index=models.Index(fields=['company_ref', 'txid', 'id'], name='ticket_change_company_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='outboxevent',
+            index=models.Index(fields=['company_ref', 'status'], name='outbox_company_status_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 6.0.1 on 2026-10-19 17:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def assign_company(apps, schema_editor):
+    """
+    Hasta ahora una sola estación ingería ventas: las ventas con ticket toman la compañía del
+    ticket y el resto la primera compañía (la que usaba ingest_dispensers por defecto). Sin
+    compañías no puede haber tickets, así que esas filas se eliminan.
+    """
+    Company = apps.get_model('company', 'Company')
+    Ticket = apps.get_model('ticket', 'Ticket')
+    PumpAssignment = apps.get_model('ticket', 'PumpAssignment')
+    DispenserSale = apps.get_model('ticket', 'DispenserSale')
+
+    DispenserSale.objects.filter(ticket__isnull=False).update(
+        company_id=Subquery(Ticket.objects.filter(pk=OuterRef('ticket_id')).values('company_id')[:1])
+    )
+    company_id = Company.objects.order_by('pk').values_list('pk', flat=True).first()
+    if company_id is None:
+        PumpAssignment.objects.all().delete()
+        DispenserSale.objects.all().delete()
+        return
+    PumpAssignment.objects.update(company_id=company_id)
+    DispenserSale.objects.filter(company__isnull=True).update(company_id=company_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0002_company_updated_at'),
+        ('ticket', '0021_company_ref'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pumpassignment',
+            name='company',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='pump_assignments', to='company.company', verbose_name='Compañía'),
+        ),
+        migrations.AddField(
+            model_name='dispensersale',
+            name='company',
+            field=models.ForeignKey(db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='dispenser_sales', to='company.company', verbose_name='Compañía'),
+        ),
+        migrations.RunPython(assign_company, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='pumpassignment',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='pump_assignments', to='company.company', verbose_name='Compañía'),
+        ),
+        migrations.AlterField(
+            model_name='dispensersale',
+            name='company',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='dispenser_sales', to='company.company', verbose_name='Compañía'),
+        ),
+        migrations.RemoveIndex(
+            model_name='pumpassignment',
+            name='pump_assignment_open_idx',
+        ),
+        migrations.AddIndex(
+            model_name='pumpassignment',
+            index=models.Index(condition=models.Q(('consumed_at__isnull', True)), fields=['company', 'pump', 'created_at'], name='pump_assignment_company_open_idx'),
+        ),
+        migrations.RemoveConstraint(
+            model_name='dispensersale',
+            name='dispenser_sale_unique',
+        ),
+        migrations.AddConstraint(
+            model_name='dispensersale',
+            constraint=models.UniqueConstraint(fields=('company', 'pump', 'sale_id'), name='dispenser_sale_company_unique'),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-19 18:00
+
+from django.db import migrations, models
+
+
+def backfill_company_id(apps, schema_editor):
+    """
+    Compañía de los tickets ya archivados según su nombre. Los de compañías depuradas quedan
+    sin compañía y no aparecen en el archivo de ninguna estación.
+    """
+    Company = apps.get_model('company', 'Company')
+    ArchivedTicket = apps.get_model('ticket', 'ArchivedTicket')
+    for company_id, name in Company.objects.order_by('pk').values_list('pk', 'name'):
+        ArchivedTicket.objects.filter(company_id__isnull=True, company_name=name).update(company_id=company_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('company', '0002_company_updated_at'),
+        ('ticket', '0022_dispenser_company'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedticket',
+            name='company_id',
+            field=models.BigIntegerField(null=True, verbose_name='ID de la Compañía'),
+        ),
+        migrations.RunPython(backfill_company_id, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='archivedticket',
+            index=models.Index(fields=['company_id', '-date'], name='archived_ticket_company_idx'),
+        ),
+    ]
@@ -1,14 +1,25 @@
+from decimal import Decimal
+
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models, transaction
+from django.db.models import F, Func, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, Greatest, Round
+from django.utils import timezone
 from apps.company.models import Company
+from apps.product.models import Product
 
 # Create your models here.
 
+class TicketVersionConflict(Exception):
+    """Otro usuario modificó el ticket después de que se cargó el formulario."""
+
+
 class Ticket(models.Model):
-    company = models.ForeignKey(Company, on_delete=models.CASCADE, verbose_name="Compañía")
+    # Sin índice propio: los índices compuestos que empiezan por la compañía lo cubren
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, db_index=False, verbose_name="Compañía")
 
     document_number = models.CharField(
         max_length=20,
-        unique=True,
         blank=True,
         verbose_name="Número de Documento"
     )
@@ -21,10 +32,49 @@ class Ticket(models.Model):
     plate = models.CharField(max_length=20, verbose_name="Placa")  # Manual
     iva_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=15.00, verbose_name="IVA Aplicado (%)")  # Guardado para historial
     total = models.DecimalField(max_digits=15, decimal_places=8, default=0.00000000, verbose_name="Total")  # Calculado con 8 decimales
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Última Modificación")  # Validador para GET condicional
+    version = models.PositiveIntegerField(default=1, verbose_name="Versión")  # Control de concurrencia optimista
 
     def __str__(self):
         return f"Ticket {self.document_number} - {self.client}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Placa leída de la base: si una edición la cambia, se invalida también su historial
+        instance.loaded_plate = (instance.__dict__.get('company_id'), instance.__dict__.get('plate'))
+        return instance
+
+    @classmethod
+    def get_last_modified(cls, pk, company_id=None):
+        """
+        Validador barato para GET condicional: última modificación del ticket o de su compañía
+        (las páginas del ticket muestran datos de ambos). None si el ticket no existe o, con
+        company_id, si es de otra compañía.
+        """
+        queryset = cls.objects.filter(pk=pk)
+        if company_id is not None:
+            queryset = queryset.filter(company_id=company_id)
+        row = queryset.values_list('updated_at', 'company__updated_at').first()
+        return max(row) if row else None
+
+    @classmethod
+    def touch(cls, pk):
+        """Marca el ticket como modificado sin cargarlo (p. ej. al cambiar sus detalles)."""
+        cls.objects.filter(pk=pk).update(updated_at=timezone.now(), version=F('version') + 1)
+
+    @classmethod
+    def claim_version(cls, pk, expected_version):
+        """
+        UPDATE condicional: incrementa la versión solo si sigue siendo la que vio el usuario.
+        Debe llamarse dentro de la transacción que guarda la edición (la fila queda bloqueada
+        hasta el commit, sin bloquear mientras el usuario edita). Si otro usuario guardó antes,
+        lanza TicketVersionConflict.
+        """
+        claimed = cls.objects.filter(pk=pk, version=expected_version).update(version=F('version') + 1)
+        if not claimed:
+            raise TicketVersionConflict(pk)
+
     @property
     def subtotal(self):
         """Calcula el subtotal sumando los totales de los detalles."""
@@ -43,24 +93,72 @@ class Ticket(models.Model):
     def update_total(self):
         """Actualiza el campo total con el cálculo."""
         self.total = self.total_calculated
-        self.save(update_fields=['total'])
+        self.save(update_fields=['total', 'updated_at'])
+
+    @classmethod
+    def computed_total(cls, iva_percentage=None):
+        """
+        Expresión SQL equivalente a total_calculated (subtotal de los detalles + IVA),
+        redondeada a los decimales de la columna para poder compararla con el total guardado.
+        Con iva_percentage se calcula con esa tarifa en lugar de la guardada en cada ticket.
+        """
+        subtotal = Coalesce(
+            Subquery(
+                TicketDetail.objects
+                .filter(ticket=OuterRef('pk'))
+                .values('ticket')
+                .annotate(subtotal=Sum('total'))
+                .values('subtotal')[:1]
+            ),
+            Value(Decimal('0')),
+        )
+        iva = F('iva_percentage') if iva_percentage is None else Value(Decimal(str(iva_percentage)))
+        return Round(subtotal + subtotal * iva / Value(Decimal('100')), 8)
+
+    @classmethod
+    def stale_total_filter(cls, iva_percentage=None):
+        """Condición de los tickets cuyo total (o tarifa de IVA, si se indica) no coincide con el cálculo."""
+        stale = ~models.Q(total=cls.computed_total(iva_percentage))
+        if iva_percentage is not None:
+            stale |= ~models.Q(iva_percentage=iva_percentage)
+        return stale
+
+    @classmethod
+    def refresh_totals(cls, queryset=None, iva_percentage=None, record_changes=True):
+        """
+        Recalcula en SQL el total de los tickets del queryset cuyo valor guardado no coincide,
+        opcionalmente aplicando una nueva tarifa de IVA. Sin record_changes es un solo UPDATE;
+        con él, antes se leen los ids para registrar los cambios. Devuelve los tickets actualizados.
+        """
+        queryset = cls.objects.all() if queryset is None else queryset
+        values = {'total': cls.computed_total(iva_percentage), 'updated_at': timezone.now(), 'version': F('version') + 1}
+        if iva_percentage is not None:
+            values['iva_percentage'] = iva_percentage
+        stale = queryset.filter(cls.stale_total_filter(iva_percentage))
+        with transaction.atomic():
+            if not record_changes:
+                return stale.update(**values)
+            ids = list(stale.values_list('pk', flat=True))
+            if ids:
+                cls.objects.filter(pk__in=ids).update(**values)
+                TicketChange.record_many(cls.objects.filter(pk__in=ids), TicketChange.ACTION_UPDATE)
+        return len(ids)
+
+    @classmethod
+    def reserve_document_numbers(cls, company_id, count):
+        """
+        Reserva `count` números de documento secuenciales de la compañía.
+        Debe llamarse dentro de una transacción: bloquea la secuencia de la compañía hasta el
+        commit, así que las estaciones no compiten entre sí por el mismo bloqueo.
+        """
+        last_number = DocumentSequence.reserve(company_id, count)
+        # Formatear con ceros a la izquierda (9 dígitos)
+        return [f"{number:09d}" for number in range(last_number - count + 1, last_number + 1)]
 
     def generate_document_number(self):
-        """Genera el número de documento secuencial fiscal."""
+        """Genera el número de documento secuencial fiscal de la compañía."""
         with transaction.atomic():
-            # Bloquear el último registro para evitar duplicados
-            last_ticket = Ticket.objects.select_for_update().order_by('-id').first()
-            if last_ticket and last_ticket.document_number:
-                try:
-                    # Extraer el número secuencial
-                    last_number = int(last_ticket.document_number)
-                    new_number = last_number + 1
-                except ValueError:
-                    new_number = 1
-            else:
-                new_number = 1
-            # Formatear con ceros a la izquierda (9 dígitos)
-            self.document_number = f"{new_number:09d}"
+            self.document_number = Ticket.reserve_document_numbers(self.company_id, 1)[0]
 
     def save(self, *args, **kwargs):
         if not self.document_number:
@@ -71,11 +169,85 @@ class Ticket(models.Model):
             self.client = self.company.client_name
             self.ci_ruc = self.company.client_ruc
         
-        super().save(*args, **kwargs)
+        # Cada guardado completo de un ticket existente cambia su versión (en SQL, sin leerla)
+        bump_version = not self._state.adding and kwargs.get('update_fields') is None
+        if bump_version:
+            self.version = F('version') + 1
+
+        # El registro de cambios se escribe en la misma transacción que el ticket
+        action = TicketChange.ACTION_INSERT if self._state.adding else TicketChange.ACTION_UPDATE
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if bump_version and not isinstance(self.version, int):
+                # Backends sin RETURNING en UPDATE: leer el valor asignado por la base
+                self.refresh_from_db(fields=['version'])
+            TicketChange.record(self, action)
 
     class Meta:
         verbose_name = "Ticket"
         verbose_name_plural = "Tickets"
+        constraints = [
+            # La numeración fiscal es por compañía (estación)
+            models.UniqueConstraint(fields=['company', 'document_number'], name='ticket_company_document_unique'),
+        ]
+        indexes = [
+            # Rangos de fechas de todas las compañías (depuración)
+            models.Index(fields=['-date'], name='ticket_date_idx'),
+            # Listados, dashboard y exportaciones de la compañía activa, por fecha
+            models.Index(fields=['company', '-date'], name='ticket_company_date_idx'),
+            # Historial por placa: últimos tickets de un vehículo en la estación
+            models.Index(fields=['company', 'plate', '-date'], name='ticket_company_plate_date_idx'),
+            # Filtro por vendedor de la API
+            models.Index(fields=['company', 'seller', '-date'], name='ticket_company_seller_date_idx'),
+        ]
+
+
+class DocumentSequence(models.Model):
+    """Último número de documento emitido por cada compañía."""
+    company = models.OneToOneField(Company, on_delete=models.CASCADE, primary_key=True, related_name='document_sequence', verbose_name="Compañía")
+    last_number = models.PositiveBigIntegerField(default=0, verbose_name="Último Número")
+
+    @classmethod
+    def initial_number(cls, company_id):
+        """Mayor número numérico ya usado por la compañía (para crear su secuencia)."""
+        return (
+            Ticket.objects
+            .filter(company_id=company_id, document_number__regex=r'^[0-9]+$')
+            .aggregate(last=Max(Cast('document_number', models.BigIntegerField())))['last']
+            or 0
+        )
+
+    @classmethod
+    def reserve(cls, company_id, count):
+        """
+        Avanza la secuencia `count` números con un UPDATE (que bloquea la fila hasta el commit)
+        y devuelve el último reservado. La secuencia se crea la primera vez que se usa.
+        """
+        with transaction.atomic():
+            sequence = cls.objects.filter(company_id=company_id)
+            if not sequence.update(last_number=F('last_number') + count):
+                cls.objects.get_or_create(company_id=company_id, defaults={'last_number': cls.initial_number(company_id)})
+                sequence.update(last_number=F('last_number') + count)
+            return sequence.values_list('last_number', flat=True).get()
+
+    @classmethod
+    def advance_to(cls, company_id, number):
+        """Asegura que la secuencia no vuelva a emitir `number` (p. ej. tras importar números propios)."""
+        with transaction.atomic():
+            if not cls.objects.filter(company_id=company_id).update(
+                last_number=Greatest(F('last_number'), Value(number, output_field=models.PositiveBigIntegerField()))
+            ):
+                cls.objects.get_or_create(
+                    company_id=company_id,
+                    defaults={'last_number': max(number, cls.initial_number(company_id))},
+                )
+
+    def __str__(self):
+        return f"{self.company_id}: {self.last_number}"
+
+    class Meta:
+        verbose_name = "Secuencia de Documentos"
+        verbose_name_plural = "Secuencias de Documentos"
 
 
 class TicketDetail(models.Model):
@@ -83,11 +255,49 @@ class TicketDetail(models.Model):
     product = models.CharField(max_length=255, verbose_name="Producto")
     quantity = models.DecimalField(max_digits=15, decimal_places=8, verbose_name="Cantidad")  # Decimal con 8 decimales para gasolineras
     unit_price = models.DecimalField(max_digits=15, decimal_places=8, verbose_name="P. Unitario")  # Decimal con 8 decimales
-    total = models.DecimalField(max_digits=15, decimal_places=8, default=0.00000000, verbose_name="Total")  # Calculado con 8 decimales: quantity * unit_price
+    # Columna generada por la base (quantity * unit_price, 8 decimales): los UPDATE masivos de
+    # cantidad o precio la mantienen correcta sin cargar ni guardar cada fila
+    total = models.GeneratedField(
+        expression=F('quantity') * F('unit_price'),
+        output_field=models.DecimalField(max_digits=15, decimal_places=8),
+        db_persist=True,
+        verbose_name="Total",
+    )
+    catalog_product = models.ForeignKey(Product, on_delete=models.SET_NULL, null=True, blank=True, related_name='ticket_details', verbose_name="Producto del Catálogo")  # Para agrupar reportes
+    # Copia de la fecha del ticket (que no cambia): clave de partición de los detalles
+    ticket_date = models.DateTimeField(editable=False, verbose_name="Fecha del Ticket")
 
     def save(self, *args, **kwargs):
-        self.total = self.quantity * self.unit_price
-        super().save(*args, **kwargs)
+        if self.ticket_date is None:
+            self.ticket_date = self.ticket.date
+        action = TicketChange.ACTION_INSERT if self._state.adding else TicketChange.ACTION_UPDATE
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            TicketChange.record(self, action)
+            Ticket.touch(self.ticket_id)
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            TicketChange.record(self, TicketChange.ACTION_DELETE)
+            result = super().delete(*args, **kwargs)
+            Ticket.touch(self.ticket_id)
+        return result
+
+    @classmethod
+    def update_lines(cls, queryset, **values):
+        """
+        Corrección masiva de líneas (p. ej. el precio del diésel de un día) con un solo UPDATE.
+        Los totales de línea los recalcula la base; los de los tickets afectados se refrescan
+        con Ticket.refresh_totals. Devuelve la cantidad de líneas actualizadas.
+        """
+        with transaction.atomic():
+            ids = list(queryset.values_list('pk', flat=True))
+            if not ids:
+                return 0
+            updated = cls.objects.filter(pk__in=ids).update(**values)
+            TicketChange.record_many(cls.objects.filter(pk__in=ids), TicketChange.ACTION_UPDATE)
+            Ticket.refresh_totals(Ticket.objects.filter(pk__in=cls.objects.filter(pk__in=ids).values('ticket_id')))
+        return updated
 
     def __str__(self):
         return f"{self.product} - {self.quantity}"
@@ -95,3 +305,392 @@ class TicketDetail(models.Model):
     class Meta:
         verbose_name = "Detalle del Ticket"
         verbose_name_plural = "Detalles del Ticket"
+
+
+class CurrentTransactionId(Func):
+    """Id (xid8) de la transacción de nivel superior en curso, como bigint."""
+    template = 'pg_current_xact_id()::text::bigint'
+    output_field = models.BigIntegerField()
+
+
+class SnapshotXmin(Func):
+    """Transacción en curso más antigua: toda transacción con un id menor ya terminó."""
+    template = 'pg_snapshot_xmin(pg_current_snapshot())::text::bigint'
+    output_field = models.BigIntegerField()
+
+
+class TicketChange(models.Model):
+    """
+    Registro append-only de inserciones, actualizaciones y eliminaciones de tickets y detalles.
+    Se escribe en la misma transacción que el cambio. La eliminación de un ticket implica la de
+    todos sus detalles (no se registran por separado).
+
+    Los ids se asignan al insertar, no al confirmar: una transacción larga (importación,
+    depuración) puede confirmar ids menores que otros ya visibles. Por eso los lectores
+    incrementales (feed de cambios, SSE) recorren el registro en orden (txid, id) y solo hasta
+    la transacción en curso más antigua (committed_after): lo que se confirme después tiene un
+    txid mayor y queda delante del cursor.
+    """
+    ENTITY_TICKET = 'ticket'
+    ENTITY_DETAIL = 'detail'
+    ENTITY_CHOICES = [
+        (ENTITY_TICKET, 'Ticket'),
+        (ENTITY_DETAIL, 'Detalle'),
+    ]
+
+    ACTION_INSERT = 'insert'
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_INSERT, 'Inserción'),
+        (ACTION_UPDATE, 'Actualización'),
+        (ACTION_DELETE, 'Eliminación'),
+    ]
+
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha del Cambio")
+    entity = models.CharField(max_length=10, choices=ENTITY_CHOICES, verbose_name="Entidad")
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES, verbose_name="Acción")
+    object_id = models.BigIntegerField(verbose_name="ID del Objeto")
+    ticket_ref = models.BigIntegerField(verbose_name="ID del Ticket")  # Sin FK: debe sobrevivir a la eliminación del ticket
+    company_ref = models.BigIntegerField(null=True, verbose_name="ID de la Compañía")  # Compañía del ticket, para el feed de cada estación
+    data = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder, verbose_name="Datos")  # Estado tras el cambio
+    txid = models.BigIntegerField(db_default=CurrentTransactionId(), editable=False, verbose_name="Transacción")
+
+    def __str__(self):
+        return f"{self.id} {self.action} {self.entity} {self.object_id}"
+
+    @staticmethod
+    def snapshot(instance):
+        """Estado serializable de un Ticket o TicketDetail (valores de columna)."""
+        return {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+
+    @classmethod
+    def build(cls, instance, action, company_ref=None):
+        if isinstance(instance, Ticket):
+            entity, ticket_ref, company_ref = cls.ENTITY_TICKET, instance.pk, instance.company_id
+        else:
+            entity, ticket_ref = cls.ENTITY_DETAIL, instance.ticket_id
+            if company_ref is None:
+                company_ref = instance.ticket.company_id
+        data = None if action == cls.ACTION_DELETE else cls.snapshot(instance)
+        return cls(entity=entity, action=action, object_id=instance.pk, ticket_ref=ticket_ref, company_ref=company_ref, data=data)
+
+    @classmethod
+    def record(cls, instance, action):
+        """Registra un cambio; debe llamarse dentro de la transacción que lo produce."""
+        change = cls.build(instance, action)
+        change.save()
+        return change
+
+    @classmethod
+    def record_many(cls, instances, action):
+        """Registra varios cambios con un solo INSERT (para operaciones con bulk_create)."""
+        instances = list(instances)
+        # Compañía de los detalles cuyo ticket no está cargado, en una sola consulta
+        pending = {
+            instance.ticket_id for instance in instances
+            if isinstance(instance, TicketDetail) and not TicketDetail.ticket.is_cached(instance)
+        }
+        companies = dict(Ticket.objects.filter(pk__in=pending).values_list('pk', 'company_id')) if pending else {}
+        return cls.objects.bulk_create([
+            cls.build(instance, action, companies.get(getattr(instance, 'ticket_id', None)))
+            for instance in instances
+        ])
+
+    @classmethod
+    def committed_after(cls, since=0, company_id=None):
+        """
+        Cambios posteriores al cambio `since` (0 = desde el inicio) en orden de entrega (txid, id),
+        limitados a las transacciones ya terminadas y, si se indica, a una compañía. Entregarlos
+        en este orden no salta cambios.
+        """
+        queryset = cls.objects.filter(txid__lt=SnapshotXmin())
+        if company_id is not None:
+            queryset = queryset.filter(company_ref=company_id)
+        if since:
+            position = cls.objects.filter(pk=since).values_list('txid', flat=True).first()
+            if position is None:
+                queryset = queryset.filter(id__gt=since)
+            else:
+                queryset = queryset.filter(Q(txid__gt=position) | Q(txid=position, id__gt=since))
+        return queryset.order_by('txid', 'id')
+
+    @classmethod
+    def last_committed_id(cls):
+        """Último cambio en orden de entrega: posición inicial de un lector que empieza ahora."""
+        return cls.objects.filter(txid__lt=SnapshotXmin()).order_by('-txid', '-id').values_list('id', flat=True).first() or 0
+
+    class Meta:
+        verbose_name = "Cambio de Ticket"
+        verbose_name_plural = "Cambios de Tickets"
+        indexes = [
+            # Recorrido de los lectores incrementales
+            models.Index(fields=['txid', 'id'], name='ticket_change_txid_idx'),
+            # Feed de cambios de una compañía
+            models.Index(fields=['company_ref', 'txid', 'id'], name='ticket_change_company_idx'),
+        ]
+
+
+class SriDocument(models.Model):
+    """
+    Comprobante electrónico del SRI generado para un ticket.
+    source_modified guarda la última modificación del ticket/compañía usada al generarlo:
+    si no cambió, la generación por lotes lo omite.
+    """
+    STATUS_GENERATED = 'generated'
+    STATUS_SIGNED = 'signed'
+    STATUS_SUBMITTED = 'submitted'
+    STATUS_AUTHORIZED = 'authorized'
+    STATUS_REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (STATUS_GENERATED, 'Generado'),
+        (STATUS_SIGNED, 'Firmado'),
+        (STATUS_SUBMITTED, 'Enviado'),
+        (STATUS_AUTHORIZED, 'Autorizado'),
+        (STATUS_REJECTED, 'Rechazado'),
+    ]
+
+    ticket = models.OneToOneField(Ticket, on_delete=models.CASCADE, related_name='sri_document', verbose_name="Ticket")
+    access_key = models.CharField(max_length=49, unique=True, verbose_name="Clave de Acceso")
+    xml = models.TextField(verbose_name="XML del Comprobante")
+    signed_xml = models.TextField(blank=True, verbose_name="XML Firmado")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_GENERATED, verbose_name="Estado")
+    source_modified = models.DateTimeField(verbose_name="Versión del Ticket")
+    generated_at = models.DateTimeField(auto_now=True, verbose_name="Fecha de Generación")
+    # El ticket cambió después de firmar/enviar el comprobante: requiere nota de crédito o revisión manual
+    needs_review = models.BooleanField(default=False, verbose_name="Requiere Revisión")
+
+    # Un comprobante firmado, enviado o autorizado ya no se reemplaza al regenerar
+    ISSUED_STATUSES = (STATUS_SIGNED, STATUS_SUBMITTED, STATUS_AUTHORIZED)
+
+    def __str__(self):
+        return f"{self.access_key} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Comprobante SRI"
+        verbose_name_plural = "Comprobantes SRI"
+
+
+class ArchivedTicket(models.Model):
+    """
+    Índice de los tickets archivados. Cada ticket se guarda en archive_file como un miembro
+    gzip independiente con una línea JSON; offset y length permiten leerlo sin descomprimir
+    el resto del archivo. Sin FK: el ticket y su compañía ya no existen en la base. El número
+    de documento es único por compañía, así que las búsquedas se limitan a la compañía activa.
+    """
+    ticket_id = models.BigIntegerField(db_index=True, verbose_name="ID del Ticket")
+    company_id = models.BigIntegerField(null=True, verbose_name="ID de la Compañía")
+    document_number = models.CharField(max_length=20, db_index=True, verbose_name="Número de Documento")
+    date = models.DateTimeField(db_index=True, verbose_name="Fecha")
+    plate = models.CharField(max_length=20, db_index=True, verbose_name="Placa")
+    company_name = models.CharField(max_length=255, verbose_name="Compañía")
+    total = models.DecimalField(max_digits=15, decimal_places=8, verbose_name="Total")
+    archive_file = models.CharField(max_length=255, verbose_name="Archivo")  # Relativo a TICKET_ARCHIVE_DIR
+    offset = models.BigIntegerField(verbose_name="Posición")
+    length = models.IntegerField(verbose_name="Longitud")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Fecha de Archivo")
+
+    def __str__(self):
+        return f"Ticket archivado {self.document_number}"
+
+    class Meta:
+        verbose_name = "Ticket Archivado"
+        verbose_name_plural = "Tickets Archivados"
+        ordering = ['-date']
+        indexes = [
+            # Archivo de la compañía activa, por fecha
+            models.Index(fields=['company_id', '-date'], name='archived_ticket_company_idx'),
+        ]
+
+
+class PurgeJob(models.Model):
+    """
+    Trabajo de depuración en segundo plano: tickets anteriores a una fecha (retención)
+    o todos los tickets de una compañía seguida de la compañía. Lo ejecuta el comando
+    run_purge_jobs por lotes acotados; los contadores muestran el avance.
+    """
+    KIND_RETENTION = 'retention'
+    KIND_COMPANY = 'company'
+    KIND_CHOICES = [
+        (KIND_RETENTION, 'Retención'),
+        (KIND_COMPANY, 'Compañía'),
+    ]
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_DONE = 'done'
+    STATUS_FAILED = 'failed'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_RUNNING, 'En ejecución'),
+        (STATUS_DONE, 'Terminado'),
+        (STATUS_FAILED, 'Fallido'),
+    ]
+
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, verbose_name="Tipo")
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default=STATUS_PENDING, db_index=True, verbose_name="Estado")
+    company_id_ref = models.BigIntegerField(null=True, blank=True, verbose_name="ID de la Compañía")  # Sin FK: la compañía se elimina al final
+    company_name = models.CharField(max_length=255, blank=True, verbose_name="Compañía")
+    cutoff = models.DateTimeField(null=True, blank=True, verbose_name="Tickets Anteriores a")
+    archive = models.BooleanField(default=True, verbose_name="Archivar antes de eliminar")
+    tickets_archived = models.IntegerField(default=0, verbose_name="Tickets Archivados")
+    tickets_deleted = models.IntegerField(default=0, verbose_name="Tickets Eliminados")
+    details_deleted = models.IntegerField(default=0, verbose_name="Detalles Eliminados")
+    error = models.TextField(blank=True, verbose_name="Error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creado")
+    started_at = models.DateTimeField(null=True, blank=True, verbose_name="Inicio")
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name="Fin")
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.pk} ({self.get_status_display()})"
+
+    class Meta:
+        verbose_name = "Depuración de Tickets"
+        verbose_name_plural = "Depuraciones de Tickets"
+        ordering = ['-created_at']
+
+
+class OutboxEvent(models.Model):
+    """
+    Evento pendiente de enviar a un sistema externo (outbox transaccional). Se escribe en
+    la misma transacción que el cambio que lo origina, así que existe si y solo si el cambio
+    se confirmó; el comando dispatch_outbox lo envía después, fuera de la petición.
+    """
+    TOPIC_TICKET_CREATED = 'ticket.created'
+
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_DEAD = 'dead'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_SENT, 'Enviado'),
+        (STATUS_DEAD, 'Descartado'),
+    ]
+
+    topic = models.CharField(max_length=50, verbose_name="Tema")
+    company_ref = models.BigIntegerField(null=True, verbose_name="ID de la Compañía")  # Sin FK: se envía aunque la compañía se depure
+    payload = models.JSONField(encoder=DjangoJSONEncoder, verbose_name="Contenido")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Estado")
+    attempts = models.PositiveIntegerField(default=0, verbose_name="Intentos")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Próximo Intento")
+    last_error = models.TextField(blank=True, verbose_name="Último Error")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Creado")
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Enviado")
+
+    def __str__(self):
+        return f"{self.topic} #{self.pk} ({self.get_status_display()})"
+
+    @classmethod
+    def ticket_created(cls, ticket, details):
+        """Evento de ticket nuevo; debe crearse dentro de la transacción que guarda el ticket."""
+        event = cls.build_ticket_created(ticket, details)
+        event.save()
+        return event
+
+    @classmethod
+    def build_ticket_created(cls, ticket, details):
+        """Evento de ticket nuevo sin guardar, para insertarlo con bulk_create."""
+        return cls(
+            topic=cls.TOPIC_TICKET_CREATED,
+            company_ref=ticket.company_id,
+            payload={
+                'ticket_id': ticket.pk,
+                'document_number': ticket.document_number,
+                'date': ticket.date,
+                'plate': ticket.plate,
+                'seller': ticket.seller,
+                'company_ruc': ticket.company.ruc,
+                'iva_percentage': ticket.iva_percentage,
+                'total': ticket.total,
+                'lines': [
+                    {'product': detail.product, 'quantity': detail.quantity, 'unit_price': detail.unit_price}
+                    for detail in details
+                ],
+            },
+        )
+
+    class Meta:
+        verbose_name = "Evento de Salida"
+        verbose_name_plural = "Eventos de Salida"
+        indexes = [
+            # El dispatcher busca los pendientes cuyo próximo intento ya venció
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_pending_idx'),
+            # Métricas de una compañía
+            models.Index(fields=['company_ref', 'status'], name='outbox_company_status_idx'),
+        ]
+
+
+class PumpAssignment(models.Model):
+    """
+    Placa y vendedor registrados en la isla para la próxima venta de un surtidor de la
+    estación. El servicio de ingesta (ingest_dispensers) asigna cada venta del surtidor a
+    la asignación abierta más antigua de la misma compañía registrada antes del despacho
+    (dentro de DISPENSER_ASSIGNMENT_WINDOW_MINUTES) y la marca como consumida. Las que quedan
+    fuera de la ventana de una venta posterior también se cierran (consumidas sin ticket).
+    """
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, db_index=False, related_name='pump_assignments', verbose_name="Compañía")
+    pump = models.PositiveSmallIntegerField(verbose_name="Surtidor")
+    plate = models.CharField(max_length=20, verbose_name="Placa")
+    seller = models.CharField(max_length=255, blank=True, verbose_name="Vendedor")
+    phone = models.CharField(max_length=20, blank=True, verbose_name="Teléfono")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Registrada")
+    consumed_at = models.DateTimeField(null=True, blank=True, verbose_name="Consumida")
+
+    def __str__(self):
+        return f"Surtidor {self.pump} - {self.plate}"
+
+    class Meta:
+        verbose_name = "Asignación de Surtidor"
+        verbose_name_plural = "Asignaciones de Surtidor"
+        ordering = ['created_at']
+        indexes = [
+            # Asignaciones abiertas por surtidor de la estación, en orden de llegada
+            models.Index(
+                fields=['company', 'pump', 'created_at'],
+                name='pump_assignment_company_open_idx',
+                condition=models.Q(consumed_at__isnull=True),
+            ),
+        ]
+
+
+class DispenserSale(models.Model):
+    """
+    Venta reportada por un surtidor. Se guarda al recibirla (antes de confirmar la recepción
+    al surtidor) y luego se convierte en ticket cuando hay una asignación de placa para el
+    surtidor. (company, pump, sale_id) es único: los reenvíos del surtidor no duplican ventas
+    y dos estaciones pueden tener surtidores con el mismo número.
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_TICKETED = 'ticketed'
+    STATUS_UNMATCHED = 'unmatched'
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pendiente'),
+        (STATUS_TICKETED, 'Con ticket'),
+        (STATUS_UNMATCHED, 'Sin asignación'),
+    ]
+
+    company = models.ForeignKey(Company, on_delete=models.CASCADE, db_index=False, related_name='dispenser_sales', verbose_name="Compañía")
+    pump = models.PositiveSmallIntegerField(verbose_name="Surtidor")
+    sale_id = models.PositiveBigIntegerField(verbose_name="Venta del Surtidor")
+    product = models.CharField(max_length=255, verbose_name="Producto")
+    quantity = models.DecimalField(max_digits=15, decimal_places=8, verbose_name="Cantidad")
+    unit_price = models.DecimalField(max_digits=15, decimal_places=8, verbose_name="P. Unitario")
+    dispensed_at = models.DateTimeField(verbose_name="Despachada")
+    received_at = models.DateTimeField(default=timezone.now, verbose_name="Recibida")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=STATUS_PENDING, verbose_name="Estado")
+    ticket = models.ForeignKey(Ticket, on_delete=models.SET_NULL, null=True, blank=True, related_name='dispenser_sales', verbose_name="Ticket")
+    ticketed_at = models.DateTimeField(null=True, blank=True, verbose_name="Ticket Creado")
+
+    def __str__(self):
+        return f"Surtidor {self.pump} venta {self.sale_id}"
+
+    class Meta:
+        verbose_name = "Venta de Surtidor"
+        verbose_name_plural = "Ventas de Surtidor"
+        constraints = [
+            models.UniqueConstraint(fields=['company', 'pump', 'sale_id'], name='dispenser_sale_company_unique'),
+        ]
+        indexes = [
+            # Backlog: ventas pendientes en orden de llegada
+            models.Index(fields=['status', 'received_at'], name='dispenser_sale_status_idx'),
+        ]
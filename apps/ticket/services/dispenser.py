@@ -0,0 +1,320 @@
+"""
+Ingesta de ventas de los surtidores y creación automática de tickets.
+
+Los surtidores envían cada venta como una línea JSON por un socket TCP local:
+
+    {"pump": 3, "sale_id": 1042, "product": "Diesel", "quantity": "12.34567890",
+     "unit_price": "1.03700000", "dispensed_at": "2026-10-19T08:15:02-05:00"}
+
+El proceso tiene dos etapas desacopladas:
+
+1. Recepción: las ventas de todas las conexiones se acumulan en una cola y se guardan por
+   lotes (DISPENSER_BATCH_SIZE o DISPENSER_FLUSH_SECONDS, lo que ocurra primero) con un
+   solo INSERT. Solo después del commit se confirma la recepción al surtidor; si la
+   confirmación se pierde, el reenvío se descarta por la restricción (company, pump, sale_id).
+2. Tickets: las ventas pendientes se emparejan con la asignación abierta más antigua de
+   su surtidor registrada antes del despacho (placa y vendedor registrados en la isla; ver
+   match_sales) y se crean los tickets del lote
+   en una transacción: una sola reserva de números de documento (que bloquea la secuencia
+   de la compañía, igual que la creación manual, así que la numeración sigue siendo correlativa),
+   bulk_create de tickets, detalles, registro de cambios y eventos del outbox.
+
+Las ventas sin asignación esperan hasta DISPENSER_MATCH_TIMEOUT_MINUTES y luego quedan
+"sin asignación" para resolverlas desde el admin.
+
+Cada proceso de ingesta atiende a una estación (--company): sus ventas y las asignaciones
+que empareja son solo de esa compañía, así que varias estaciones pueden ingerir a la vez.
+"""
+import json
+import logging
+import queue
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from datetime import timedelta
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Avg, Count, ExpressionWrapper, F, DurationField, Max, Min, Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.product.catalog import get_index
+from apps.ticket.models import DispenserSale, OutboxEvent, PumpAssignment, Ticket, TicketChange, TicketDetail
+from apps.ticket.services.plate_history import invalidate_plate_history
+
+logger = logging.getLogger(__name__)
+
+EIGHT_PLACES = Decimal('0.00000001')
+LATENCY_WINDOW = timedelta(minutes=5)
+
+
+class DispenserEventError(ValueError):
+    """La línea recibida no es una venta válida."""
+
+
+def parse_event(line):
+    """Valida una línea JSON del surtidor y devuelve los campos de DispenserSale."""
+    try:
+        data = json.loads(line)
+    except ValueError:
+        raise DispenserEventError('JSON inválido')
+    if not isinstance(data, dict):
+        raise DispenserEventError('Se esperaba un objeto JSON')
+    try:
+        pump = int(data['pump'])
+        sale_id = int(data['sale_id'])
+        product = str(data['product']).strip()
+        quantity = Decimal(str(data['quantity'])).quantize(EIGHT_PLACES)
+        unit_price = Decimal(str(data['unit_price'])).quantize(EIGHT_PLACES)
+    except KeyError as error:
+        raise DispenserEventError(f'Falta el campo {error.args[0]}')
+    except (TypeError, ValueError, InvalidOperation):
+        raise DispenserEventError('Valor numérico inválido')
+    if pump <= 0 or sale_id < 0 or not product or quantity <= 0 or unit_price < 0:
+        raise DispenserEventError('Valores fuera de rango')
+
+    dispensed_at = parse_datetime(str(data.get('dispensed_at') or '')) or timezone.now()
+    if timezone.is_naive(dispensed_at):
+        dispensed_at = timezone.make_aware(dispensed_at)
+    return {
+        'pump': pump,
+        'sale_id': sale_id,
+        'product': product[:255],
+        'quantity': quantity,
+        'unit_price': unit_price,
+        'dispensed_at': dispensed_at,
+    }
+
+
+def store_sales(company, events):
+    """Guarda las ventas de la compañía con un INSERT; los reenvíos (mismo surtidor y venta) se ignoran."""
+    received_at = timezone.now()
+    with transaction.atomic():
+        DispenserSale.objects.bulk_create(
+            [DispenserSale(company=company, received_at=received_at, **event) for event in events],
+            ignore_conflicts=True,
+        )
+
+
+def expire_unmatched(company, match_timeout=None):
+    """Marca como "sin asignación" las ventas pendientes de la compañía que esperaron más de lo permitido."""
+    minutes = settings.DISPENSER_MATCH_TIMEOUT_MINUTES if match_timeout is None else match_timeout
+    return DispenserSale.objects.filter(
+        company=company,
+        status=DispenserSale.STATUS_PENDING,
+        received_at__lt=timezone.now() - timedelta(minutes=minutes),
+    ).update(status=DispenserSale.STATUS_UNMATCHED)
+
+
+def match_sales(sales, open_assignments, window=None):
+    """
+    Empareja las ventas (en orden de despacho) con la asignación abierta más antigua de su
+    surtidor registrada antes del despacho y dentro de la ventana DISPENSER_ASSIGNMENT_WINDOW_MINUTES.
+    Las asignaciones más viejas que la ventana ya no sirven a ninguna venta posterior: se
+    devuelven como vencidas para cerrarlas. Una venta despachada antes de toda asignación
+    abierta ya no puede emparejarse (las siguientes son posteriores): queda sin asignación en
+    lugar de consumir la del próximo cliente. Devuelve (emparejadas, sin asignación, vencidas).
+    """
+    window = timedelta(minutes=settings.DISPENSER_ASSIGNMENT_WINDOW_MINUTES if window is None else window)
+    matched, unmatched, expired = [], [], []
+    for sale in sales:
+        candidates = open_assignments[sale.pump]
+        while candidates and candidates[0].created_at < sale.dispensed_at - window:
+            expired.append(candidates.popleft())
+        if candidates and candidates[0].created_at <= sale.dispensed_at:
+            matched.append((sale, candidates.popleft()))
+        elif candidates:
+            unmatched.append(sale)
+    return matched, unmatched, expired
+
+
+def create_tickets(company, limit=None):
+    """
+    Crea los tickets de hasta `limit` ventas pendientes de la compañía que tengan asignación.
+    Devuelve la cantidad de tickets creados.
+    """
+    limit = limit or settings.DISPENSER_BATCH_SIZE
+    with transaction.atomic():
+        sales = list(
+            DispenserSale.objects
+            .select_for_update(skip_locked=True)
+            .filter(company=company, status=DispenserSale.STATUS_PENDING)
+            # Solo surtidores con asignación abierta: las ventas que esperan no bloquean a las demás
+            .filter(pump__in=PumpAssignment.objects.filter(company=company, consumed_at__isnull=True).values('pump'))
+            .order_by('dispensed_at', 'id')[:limit]
+        )
+        if not sales:
+            return 0
+        open_assignments = defaultdict(deque)
+        assignments = (
+            PumpAssignment.objects
+            .select_for_update(skip_locked=True)
+            .filter(company=company, pump__in={sale.pump for sale in sales}, consumed_at__isnull=True)
+            .order_by('created_at', 'id')
+        )
+        for assignment in assignments:
+            open_assignments[assignment.pump].append(assignment)
+        matched, unmatched, expired = match_sales(sales, open_assignments)
+        if expired:
+            # Cerradas en la base: si no, su surtidor seguiría seleccionando ventas que no emparejan
+            # y ocuparían el lote antes que las de otros surtidores
+            PumpAssignment.objects.filter(pk__in=[assignment.pk for assignment in expired]).update(consumed_at=timezone.now())
+        if unmatched:
+            DispenserSale.objects.filter(pk__in=[sale.pk for sale in unmatched]).update(status=DispenserSale.STATUS_UNMATCHED)
+        if not matched:
+            return 0
+
+        index = get_index()
+        iva_percentage = company.iva_percentage
+        numbers = Ticket.reserve_document_numbers(company.pk, len(matched))
+        tickets, details = [], []
+        for (sale, assignment), number in zip(matched, numbers):
+            subtotal = (sale.quantity * sale.unit_price).quantize(EIGHT_PLACES)
+            tickets.append(Ticket(
+                company=company,
+                document_number=number,
+                seller=assignment.seller,
+                client=company.client_name,
+                ci_ruc=company.client_ruc,
+                phone=assignment.phone or None,
+                plate=assignment.plate,
+                iva_percentage=iva_percentage,
+                total=(subtotal + subtotal * iva_percentage / 100).quantize(EIGHT_PLACES),
+            ))
+            entry = index.get(sale.product)
+            details.append(TicketDetail(
+                product=entry.name if entry else sale.product,
+                quantity=sale.quantity,
+                unit_price=sale.unit_price,
+                catalog_product_id=entry.id if entry else None,
+            ))
+
+        Ticket.objects.bulk_create(tickets)
+        for ticket, detail in zip(tickets, details):
+            detail.ticket = ticket
+            detail.ticket_date = ticket.date
+        TicketDetail.objects.bulk_create(details)
+        TicketChange.record_many(tickets, TicketChange.ACTION_INSERT)
+        TicketChange.record_many(details, TicketChange.ACTION_INSERT)
+        OutboxEvent.objects.bulk_create([
+            OutboxEvent.build_ticket_created(ticket, [detail]) for ticket, detail in zip(tickets, details)
+        ])
+
+        now = timezone.now()
+        for (sale, assignment), ticket in zip(matched, tickets):
+            sale.status = DispenserSale.STATUS_TICKETED
+            sale.ticket = ticket
+            sale.ticketed_at = now
+            assignment.consumed_at = now
+        DispenserSale.objects.bulk_update([sale for sale, _ in matched], ['status', 'ticket', 'ticketed_at'])
+        PumpAssignment.objects.bulk_update([assignment for _, assignment in matched], ['consumed_at'])
+
+        # bulk_create no emite señales: invalidar el historial de las placas al confirmar
+        plates = {ticket.plate for ticket in tickets}
+        transaction.on_commit(lambda: [invalidate_plate_history(company.pk, plate) for plate in plates])
+    return len(tickets)
+
+
+def get_metrics(company_id=None):
+    """
+    Backlog (pendientes, sin asignación, antigüedad del más viejo) y latencia reciente, de una
+    compañía o, sin company_id, de todas.
+    """
+    now = timezone.now()
+    sales = DispenserSale.objects.all() if company_id is None else DispenserSale.objects.filter(company_id=company_id)
+    backlog = sales.aggregate(
+        pending=Count('id', filter=Q(status=DispenserSale.STATUS_PENDING)),
+        unmatched=Count('id', filter=Q(status=DispenserSale.STATUS_UNMATCHED)),
+        oldest=Min('received_at', filter=Q(status=DispenserSale.STATUS_PENDING)),
+    )
+    latency = ExpressionWrapper(F('ticketed_at') - F('dispensed_at'), output_field=DurationField())
+    recent = sales.filter(
+        status=DispenserSale.STATUS_TICKETED, ticketed_at__gte=now - LATENCY_WINDOW,
+    ).aggregate(count=Count('id'), average=Avg(latency), maximum=Max(latency))
+    return {
+        'pending': backlog['pending'],
+        'unmatched': backlog['unmatched'],
+        'backlog_seconds': (now - backlog['oldest']).total_seconds() if backlog['oldest'] else 0.0,
+        'ticketed_recent': recent['count'],
+        'latency_avg_seconds': recent['average'].total_seconds() if recent['average'] else 0.0,
+        'latency_max_seconds': recent['maximum'].total_seconds() if recent['maximum'] else 0.0,
+    }
+
+
+class DispenserIngestor:
+    """
+    Cola compartida por las conexiones de los surtidores. submit() devuelve un Future que
+    se resuelve cuando la venta quedó guardada; run() (en su propio hilo) guarda los lotes
+    y luego crea los tickets de las ventas que ya tienen asignación.
+    """
+
+    def __init__(self, company, batch_size=None, flush_seconds=None):
+        self.company = company
+        self.batch_size = batch_size or settings.DISPENSER_BATCH_SIZE
+        self.flush_seconds = settings.DISPENSER_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self.queue = queue.Queue()
+        self.stopped = threading.Event()
+        self.received = 0
+        self.stored_batches = 0
+        self.tickets_created = 0
+        self.last_store_seconds = 0.0
+
+    def submit(self, event):
+        future = Future()
+        self.queue.put((event, future))
+        return future
+
+    def next_batch(self):
+        """Espera la primera venta y junta las que lleguen hasta completar el lote o el plazo."""
+        try:
+            batch = [self.queue.get(timeout=self.flush_seconds or 0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.flush_seconds
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def store_batch(self, batch):
+        started = time.monotonic()
+        try:
+            store_sales(self.company, [event for event, _ in batch])
+        except Exception as error:
+            for _, future in batch:
+                future.set_exception(error)
+            raise
+        for _, future in batch:
+            future.set_result(True)
+        self.received += len(batch)
+        self.stored_batches += 1
+        self.last_store_seconds = time.monotonic() - started
+
+    def run(self):
+        last_expire = 0.0
+        while not self.stopped.is_set():
+            close_old_connections()
+            batch = self.next_batch()
+            try:
+                if batch:
+                    self.store_batch(batch)
+                while created := create_tickets(self.company, self.batch_size):
+                    self.tickets_created += created
+                if time.monotonic() - last_expire > 60:
+                    expire_unmatched(self.company)
+                    last_expire = time.monotonic()
+            except Exception:
+                # Los surtidores reciben el error y reenvían; las ventas guardadas siguen pendientes
+                logger.exception('Error en la ingesta de ventas de surtidores')
+                time.sleep(1)
+
+    def stop(self):
+        self.stopped.set()
@@ -0,0 +1,238 @@
+"""
+Actualizaciones en vivo de tickets para el dashboard y el listado (Server-Sent Events).
+
+Cada alta, edición o baja de un ticket escribe una fila en el registro de cambios
+(TicketChange) en su misma transacción; un trigger de la base (migración 0014) emite
+NOTIFY ticket_changes por cada sentencia que inserta en ese registro, y Postgres solo lo
+entrega al confirmarse la transacción. Así llegan también los cambios de importaciones,
+depuraciones y surtidores, que no pasan por los métodos save().
+
+Cada proceso ASGI tiene un único Broadcaster: un hilo escucha el canal (LISTEN) y, al
+recibir un aviso, el broadcaster lee los cambios nuevos, arma los resúmenes de los
+tickets y los contadores con unas pocas consultas, y los reparte en memoria a todas las
+conexiones abiertas; cada conexión recibe solo lo de su compañía (client_event). El costo
+por cambio no depende de cuántas páginas estén mirando.
+El registro se lee con TicketChange.committed_after, como el feed de cambios: un cambio
+confirmado queda retenido mientras siga abierta una transacción más antigua y sale en la
+siguiente lectura (aviso o consulta periódica). Si la escucha falla, se consulta el
+registro cada POLL_SECONDS.
+"""
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.db.models import Count, Q
+from django.urls import reverse
+from django.utils import timezone
+
+from apps.company.models import Company
+from apps.ticket.models import Ticket, TicketChange
+from apps.ticket.services.reports import start_of_day
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'ticket_changes'
+POLL_SECONDS = 5
+HEARTBEAT_SECONDS = 15
+CHANGES_LIMIT = 500
+CLIENT_QUEUE_SIZE = 100
+
+
+def _ticket_counts():
+    return {
+        'total': Count('id'),
+        'today': Count('id', filter=Q(date__gte=start_of_day(timezone.localdate()))),
+    }
+
+
+def get_counters(company_id):
+    """Contadores del dashboard de una compañía en una sola consulta de tickets."""
+    tickets = Ticket.objects.filter(company_id=company_id).aggregate(**_ticket_counts())
+    return {
+        'total_tickets': tickets['total'],
+        'tickets_today': tickets['today'],
+        'total_companies': Company.objects.count(),
+    }
+
+
+def get_all_counters():
+    """Contadores de todas las compañías en una consulta agrupada, para repartir por conexión."""
+    rows = Ticket.objects.order_by().values('company_id').annotate(**_ticket_counts())
+    return {
+        'companies': {row['company_id']: {'total_tickets': row['total'], 'tickets_today': row['today']} for row in rows},
+        'total_companies': Company.objects.count(),
+    }
+
+
+def client_event(event, company_id):
+    """Evento tal como lo recibe una conexión de la compañía; None si no le corresponde."""
+    if event['event'] == 'counters':
+        counters = event['data']['companies'].get(company_id, {'total_tickets': 0, 'tickets_today': 0})
+        return {**event, 'data': {**counters, 'total_companies': event['data']['total_companies']}}
+    ticket = event['data']['ticket']
+    # Las bajas solo traen el id: quitar una fila que no está en la página no tiene efecto
+    if ticket.get('company_id', company_id) != company_id:
+        return None
+    return event
+
+
+def summarize_tickets(ticket_ids):
+    """Resumen de cada ticket para actualizar una fila del listado o del dashboard."""
+    rows = (
+        Ticket.objects
+        .filter(pk__in=ticket_ids)
+        .values('id', 'document_number', 'date', 'client', 'seller', 'ci_ruc', 'plate', 'total', 'company_id', 'company__name')
+    )
+    return {
+        row['id']: {
+            'id': row['id'],
+            'document_number': row['document_number'],
+            'date': timezone.localtime(row['date']).strftime('%d/%m/%Y %H:%M'),
+            'client': row['client'],
+            'seller': row['seller'],
+            'ci_ruc': row['ci_ruc'],
+            'plate': row['plate'],
+            'company_id': row['company_id'],
+            'company': row['company__name'],
+            'total': f"{row['total']:.2f}",
+            'url': reverse('ticket:ticket_detail', args=[row['id']]),
+        }
+        for row in rows
+    }
+
+
+def collect_events(since):
+    """
+    Eventos posteriores al cambio `since` en orden de entrega: uno por ticket afectado (la
+    última acción gana) y los contadores. Devuelve (eventos, último id leído).
+    """
+    changes = list(
+        TicketChange.committed_after(since)
+        .values_list('id', 'ticket_ref', 'entity', 'action')[:CHANGES_LIMIT]
+    )
+    if not changes:
+        return [], since
+    last_id = changes[-1][0]
+    actions = {}
+    for _, ticket_id, entity, action in changes:
+        previous = actions.get(ticket_id)
+        if entity == TicketChange.ENTITY_TICKET and action != TicketChange.ACTION_UPDATE:
+            actions[ticket_id] = action
+        elif previous not in (TicketChange.ACTION_INSERT, TicketChange.ACTION_DELETE):
+            # Edición del ticket o de sus detalles; un alta del mismo lote sigue siendo alta
+            actions[ticket_id] = TicketChange.ACTION_UPDATE
+
+    summaries = summarize_tickets([pk for pk, action in actions.items() if action != TicketChange.ACTION_DELETE])
+    events = []
+    for ticket_id, action in actions.items():
+        summary = summaries.get(ticket_id)
+        if summary is None:
+            # Eliminado después del cambio leído
+            events.append({'event': 'ticket', 'id': last_id, 'data': {'action': TicketChange.ACTION_DELETE, 'ticket': {'id': ticket_id}}})
+        else:
+            events.append({'event': 'ticket', 'id': last_id, 'data': {'action': action, 'ticket': summary}})
+    events.append({'event': 'counters', 'id': last_id, 'data': get_all_counters()})
+    return events, last_id
+
+
+def format_event(event):
+    """Evento en el formato de texto de Server-Sent Events."""
+    lines = []
+    if event.get('id') is not None:
+        lines.append(f"id: {event['id']}")
+    lines.append(f"event: {event['event']}")
+    lines.append(f"data: {json.dumps(event['data'], ensure_ascii=False)}")
+    return '\n'.join(lines) + '\n\n'
+
+
+class Broadcaster:
+    """Reparte los eventos de cambios a las conexiones SSE del proceso."""
+
+    def __init__(self):
+        self.clients = set()
+        self.last_id = None
+        self.loop = None
+        self.wakeup = None
+        self.task = None
+        self.listener = None
+
+    async def subscribe(self):
+        if self.task is None or self.task.done():
+            self.loop = asyncio.get_running_loop()
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self.run())
+        if self.listener is None:
+            self.listener = threading.Thread(target=self.listen, name='ticket-changes-listener', daemon=True)
+            self.listener.start()
+        if self.last_id is None:
+            self.last_id = await sync_to_async(TicketChange.last_committed_id)()
+        client = asyncio.Queue(maxsize=CLIENT_QUEUE_SIZE)
+        self.clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        self.clients.discard(client)
+
+    def notify(self):
+        """Llamado desde el hilo de escucha."""
+        self.loop.call_soon_threadsafe(self.wakeup.set)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), POLL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+            if not self.clients:
+                # Sin conexiones no se leen cambios; la próxima suscripción parte del último
+                self.last_id = None
+                continue
+            try:
+                events, self.last_id = await sync_to_async(collect_events)(self.last_id)
+            except Exception:
+                logger.exception('No se pudieron leer los cambios de tickets')
+                continue
+            for event in events:
+                for client in list(self.clients):
+                    try:
+                        client.put_nowait(event)
+                    except asyncio.QueueFull:
+                        # Cliente que no consume: se cierra su stream y el navegador reconecta
+                        self.clients.discard(client)
+                        while not client.empty():
+                            client.get_nowait()
+                        client.put_nowait(None)
+
+    def listen(self):
+        """LISTEN en una conexión propia; sin Postgres queda solo la consulta periódica."""
+        if connections['default'].vendor != 'postgresql':
+            return
+        while True:
+            connection = connections.create_connection('default')
+            try:
+                connection.ensure_connection()
+                connection.set_autocommit(True)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'LISTEN {CHANNEL}')
+                raw = connection.connection
+                while True:
+                    if select.select([raw], [], [], POLL_SECONDS * 6) == ([], [], []):
+                        continue
+                    raw.poll()
+                    if raw.notifies:
+                        raw.notifies.clear()
+                        self.notify()
+            except Exception:
+                logger.exception('Se perdió la escucha de cambios de tickets; reintentando')
+                time.sleep(POLL_SECONDS)
+            finally:
+                connection.close()
+
+
+broadcaster = Broadcaster()
@@ -0,0 +1,167 @@
+"""
+Envío por lotes de los eventos del outbox transaccional (OutboxEvent).
+
+El dispatcher corre en su propio proceso (comando dispatch_outbox): la creación de tickets
+solo inserta una fila en la misma transacción, así que la lentitud o caída del sistema
+externo no afecta su latencia. Cada ciclo:
+
+1. Reserva un lote de eventos pendientes (SKIP LOCKED) y les da un plazo (lease_seconds) que
+   cubre el peor caso de envíos del lote, divisiones incluidas; si el proceso muere a mitad
+   del envío, los eventos vuelven a estar disponibles al vencer.
+2. Envía el lote en un solo POST JSON. La entrega es "al menos una vez": el receptor debe
+   descartar los ids de evento repetidos.
+3. Si falla por la red, un 5xx o un 429, reprograma cada evento con backoff exponencial con
+   jitter y, al llegar a OUTBOX_MAX_ATTEMPTS, lo marca como descartado (dead letter) para
+   revisarlo en el admin. Otro 4xx no se arregla reintentando: el lote se divide en mitades
+   hasta aislar los eventos rechazados, que se descartan de inmediato; el resto se envía.
+"""
+import json
+import math
+import random
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+from apps.ticket.models import OutboxEvent
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 60 * 60
+
+
+def backoff_delay(attempts):
+    """Segundos hasta el siguiente intento: exponencial con tope y jitter (50-100 %)."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def lease_seconds(batch_size, timeout):
+    """
+    Plazo de un lote: el envío completo más las divisiones ante un 4xx (hasta dos envíos por
+    nivel, ceil(log2(lote)) niveles), cada uno de hasta `timeout` segundos. Si venciera antes,
+    otro dispatcher reenviaría eventos ya entregados.
+    """
+    levels = math.ceil(math.log2(batch_size)) if batch_size > 1 else 0
+    return timeout * (2 * levels + 1)
+
+
+def is_transient(error):
+    """Fallo que puede resolverse al reintentar: red, tiempo agotado, 5xx o 429."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return True
+    return response.status_code >= 500 or response.status_code == 429
+
+
+def get_metrics(company_id=None):
+    """
+    Eventos por estado y antigüedad en segundos del pendiente más viejo (lag), de una
+    compañía o, sin company_id, de todas (dispatcher).
+    """
+    events = OutboxEvent.objects.all() if company_id is None else OutboxEvent.objects.filter(company_ref=company_id)
+    summary = events.aggregate(
+        pending=Count('pk', filter=Q(status=OutboxEvent.STATUS_PENDING)),
+        dead=Count('pk', filter=Q(status=OutboxEvent.STATUS_DEAD)),
+        oldest_pending=Min('created_at', filter=Q(status=OutboxEvent.STATUS_PENDING)),
+    )
+    oldest = summary.pop('oldest_pending')
+    summary['lag_seconds'] = (timezone.now() - oldest).total_seconds() if oldest else 0.0
+    return summary
+
+
+class OutboxDispatcher:
+    """Envía los eventos pendientes al endpoint configurado (OUTBOX_ENDPOINT_URL)."""
+
+    def __init__(self, url=None, batch_size=None, max_attempts=None, timeout=None, session=None):
+        self.url = url or settings.OUTBOX_ENDPOINT_URL
+        self.batch_size = batch_size or settings.OUTBOX_BATCH_SIZE
+        self.max_attempts = max_attempts or settings.OUTBOX_MAX_ATTEMPTS
+        self.timeout = timeout or settings.OUTBOX_TIMEOUT_SECONDS
+        self.session = session or requests.Session()
+        self.sent = 0
+        self.failed = 0
+        self.dead = 0
+
+    def claim_batch(self):
+        now = timezone.now()
+        with transaction.atomic():
+            events = list(
+                OutboxEvent.objects
+                .select_for_update(skip_locked=True)
+                .filter(status=OutboxEvent.STATUS_PENDING, next_attempt_at__lte=now)
+                .order_by('id')[:self.batch_size]
+            )
+            if events:
+                OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                    next_attempt_at=now + timedelta(seconds=lease_seconds(len(events), self.timeout))
+                )
+        return events
+
+    def send(self, events):
+        body = {
+            'events': [
+                {'id': event.pk, 'topic': event.topic, 'created_at': event.created_at, 'payload': event.payload}
+                for event in events
+            ]
+        }
+        headers = {'Content-Type': 'application/json'}
+        if settings.OUTBOX_AUTH_TOKEN:
+            headers['Authorization'] = f'Bearer {settings.OUTBOX_AUTH_TOKEN}'
+        response = self.session.post(
+            self.url, data=json.dumps(body, cls=DjangoJSONEncoder), headers=headers, timeout=self.timeout
+        )
+        response.raise_for_status()
+
+    def mark_sent(self, events):
+        OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+            status=OutboxEvent.STATUS_SENT, sent_at=timezone.now(), last_error=''
+        )
+        self.sent += len(events)
+
+    def mark_failed(self, events, error, permanent=False):
+        """Reprograma los eventos con backoff; los descarta al agotar los intentos o si el rechazo es permanente."""
+        now = timezone.now()
+        for event in events:
+            event.attempts += 1
+            event.last_error = error[:2000]
+            if permanent or event.attempts >= self.max_attempts:
+                event.status = OutboxEvent.STATUS_DEAD
+                self.dead += 1
+            else:
+                event.next_attempt_at = now + timedelta(seconds=backoff_delay(event.attempts))
+        OutboxEvent.objects.bulk_update(events, ['attempts', 'last_error', 'status', 'next_attempt_at'])
+        self.failed += len(events)
+
+    def dispatch_batch(self):
+        """Envía un lote; devuelve la cantidad de eventos procesados (0 si no había pendientes)."""
+        events = self.claim_batch()
+        if not events:
+            return 0
+        self.deliver(events)
+        return len(events)
+
+    def deliver(self, events):
+        """Envía los eventos; ante un rechazo permanente divide el lote para descartar solo los rechazados."""
+        try:
+            self.send(events)
+        except requests.RequestException as error:
+            if is_transient(error):
+                self.mark_failed(events, str(error))
+            elif len(events) > 1:
+                middle = len(events) // 2
+                self.deliver(events[:middle])
+                self.deliver(events[middle:])
+            else:
+                self.mark_failed(events, str(error), permanent=True)
+        else:
+            self.mark_sent(events)
+
+    def dispatch_pending(self):
+        """Envía lotes hasta que no queden eventos con el intento vencido."""
+        while self.dispatch_batch() == self.batch_size:
+            pass
+        return self
@@ -0,0 +1,342 @@
+"""
+Particionado mensual opcional (Postgres) de ticket_ticket y ticket_ticketdetail.
+
+Con TICKET_PARTITIONING=True, `ticket_partitions --convert` convierte ambas tablas en
+tablas particionadas por rango de mes (bloquea y copia las tablas: no se hace al migrar,
+sino en una ventana de mantenimiento). Los tickets se particionan por `date` y los
+detalles por `ticket_date` (la fecha del ticket copiada en la línea), así que un ticket y
+sus detalles caen siempre en el mismo mes. Las consultas con rango de fechas (dashboard,
+impresión en masa, reportes, API) solo leen las particiones del rango, el VACUUM trabaja
+por mes y un mes viejo se separa con DETACH PARTITION sin borrar fila por fila.
+
+Restricciones de Postgres que acepta esta opción:
+- La clave primaria pasa a ser (id, fecha). El id sigue saliendo de una secuencia única,
+  así que el ORM lo sigue usando como clave; un UPDATE por id revisa el índice de cada
+  partición.
+- Las claves foráneas hacia estas tablas (detalles, comprobantes SRI, ventas de surtidores)
+  se eliminan porque exigirían un índice único solo sobre id. Django ya aplica on_delete en
+  Python, y la depuración borra los dependientes antes que los tickets.
+- Un índice único debe incluir la fecha, así que (compañía, número) queda como índice simple
+  y la unicidad la garantiza ticket_document_registry: una tabla sin particionar con esa
+  clave primaria que mantienen triggers de ticket_ticket. Un número repetido sigue fallando
+  con IntegrityError. Las particiones separadas conservan sus números en el registro.
+
+ensure_partitions() crea las particiones de los próximos meses (el comando lo hace a diario,
+ver deploy/ticket-partitions.timer). Una partición DEFAULT recibe lo que no tenga mes creado;
+al crear ese mes sus filas se mueven a la partición nueva.
+"""
+from datetime import date, datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+# Tabla -> columna de partición. Los tickets se convierten primero: los detalles apuntan a ellos
+PARTITIONED_TABLES = {
+    'ticket_ticket': 'date',
+    'ticket_ticketdetail': 'ticket_date',
+}
+
+
+# Unicidad (compañía, número) de los tickets de la tabla particionada
+REGISTRY_TABLE = 'ticket_document_registry'
+
+
+class PartitioningError(Exception):
+    """La base no permite el particionado o la operación pedida."""
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_bounds(month):
+    """Límites [inicio, fin) del mes en la zona horaria local."""
+    start = timezone.make_aware(datetime.combine(month, datetime.min.time()))
+    end = timezone.make_aware(datetime.combine(add_months(month, 1), datetime.min.time()))
+    return start, end
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def default_partition_name(table):
+    return f'{table}_default'
+
+
+def is_partitioned(cursor, table):
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", [table])
+    row = cursor.fetchone()
+    return bool(row) and row[0] == 'p'
+
+
+def _columns(cursor, table):
+    """Columnas que se pueden insertar (sin las generadas)."""
+    cursor.execute(
+        """
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = %s AND is_generated = 'NEVER'
+        ORDER BY ordinal_position
+        """,
+        [table],
+    )
+    return [connection.ops.quote_name(row[0]) for row in cursor.fetchall()]
+
+
+def _constraints(cursor, table):
+    """(nombre, tipo, definición, tabla referida, columnas) de las restricciones de la tabla."""
+    cursor.execute(
+        """
+        SELECT c.conname, c.contype, pg_get_constraintdef(c.oid), c.confrelid::regclass::text,
+               ARRAY(
+                   SELECT a.attname::text FROM pg_attribute a
+                   WHERE a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey)
+               )
+        FROM pg_constraint c WHERE c.conrelid = to_regclass(%s)
+        """,
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _index_definitions(cursor, table):
+    """CREATE INDEX de los índices que no pertenecen a una restricción."""
+    cursor.execute(
+        """
+        SELECT indexdef FROM pg_indexes
+        WHERE schemaname = current_schema() AND tablename = %s
+          AND indexname NOT IN (SELECT conname FROM pg_constraint WHERE conrelid = to_regclass(%s))
+        """,
+        [table, table],
+    )
+    return [row[0] for row in cursor.fetchall()]
+
+
+def _referencing_foreign_keys(cursor, table):
+    cursor.execute(
+        "SELECT conrelid::regclass::text, conname FROM pg_constraint WHERE confrelid = to_regclass(%s) AND contype = 'f'",
+        [table],
+    )
+    return cursor.fetchall()
+
+
+def _months_with_rows(cursor, table, column):
+    cursor.execute(f'SELECT min({column}), max({column}) FROM {table}')
+    first, last = cursor.fetchone()
+    if first is None:
+        return []
+    months = []
+    month = month_start(timezone.localtime(first).date())
+    last_month = month_start(timezone.localtime(last).date())
+    while month <= last_month:
+        months.append(month)
+        month = add_months(month, 1)
+    return months
+
+
+def create_partition(cursor, table, column, month):
+    """
+    Crea la partición del mes si no existe. Si la partición DEFAULT tiene filas de ese mes,
+    se separa mientras se crean y se mueven, y se vuelve a adjuntar.
+    """
+    name = partition_name(table, month)
+    cursor.execute('SELECT to_regclass(%s)', [name])
+    if cursor.fetchone()[0]:
+        return False
+    start, end = month_bounds(month)
+    default = default_partition_name(table)
+    cursor.execute(f'SELECT EXISTS (SELECT 1 FROM {default} WHERE {column} >= %s AND {column} < %s)', [start, end])
+    if not cursor.fetchone()[0]:
+        cursor.execute(f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)', [start, end])
+        return True
+    columns = ', '.join(_columns(cursor, table))
+    cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {default}')
+    cursor.execute(f'CREATE TABLE {name} PARTITION OF {table} FOR VALUES FROM (%s) TO (%s)', [start, end])
+    cursor.execute(
+        f'INSERT INTO {name} ({columns}) SELECT {columns} FROM {default} WHERE {column} >= %s AND {column} < %s',
+        [start, end],
+    )
+    cursor.execute(f'DELETE FROM {default} WHERE {column} >= %s AND {column} < %s', [start, end])
+    cursor.execute(f'ALTER TABLE {table} ATTACH PARTITION {default} DEFAULT')
+    return True
+
+
+def convert_table(cursor, table, column, months_ahead):
+    """Convierte la tabla en particionada por mes copiando sus filas. Devuelve las particiones creadas."""
+    if is_partitioned(cursor, table):
+        return 0
+    legacy = f'{table}_legacy'
+    cursor.execute(f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE')
+
+    columns = _columns(cursor, table)
+    constraints = _constraints(cursor, table)
+    indexes = _index_definitions(cursor, table)
+    months = _months_with_rows(cursor, table, column)
+    cursor.execute(f'SELECT coalesce(max(id), 0) FROM {table}')
+    last_id = cursor.fetchone()[0]
+
+    # Las claves foráneas entrantes exigirían un índice único solo sobre id
+    for referencing, name in _referencing_foreign_keys(cursor, table):
+        cursor.execute(f'ALTER TABLE {referencing} DROP CONSTRAINT {connection.ops.quote_name(name)}')
+
+    cursor.execute(f'ALTER TABLE {table} RENAME TO {legacy}')
+    cursor.execute(
+        f'CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING GENERATED) '
+        f'PARTITION BY RANGE ({column})'
+    )
+    # El id de la tabla original (identity o serial) se reemplaza por una secuencia propia
+    cursor.execute(f'ALTER TABLE {table} ALTER COLUMN id DROP DEFAULT')
+
+    cursor.execute(f'CREATE TABLE {default_partition_name(table)} PARTITION OF {table} DEFAULT')
+    this_month = month_start(timezone.localdate())
+    upcoming = [add_months(this_month, offset) for offset in range(months_ahead + 1)]
+    created = 0
+    for month in sorted(set(months) | set(upcoming)):
+        created += create_partition(cursor, table, column, month)
+
+    column_list = ', '.join(columns)
+    cursor.execute(f'INSERT INTO {table} ({column_list}) SELECT {column_list} FROM {legacy}')
+    cursor.execute(f'DROP TABLE {legacy}')
+
+    sequence = f'{table}_id_seq'
+    cursor.execute(f'CREATE SEQUENCE {sequence} OWNED BY {table}.id')
+    cursor.execute('SELECT setval(%s, %s, %s)', [sequence, max(last_id, 1), last_id > 0])
+    cursor.execute(f"ALTER TABLE {table} ALTER COLUMN id SET DEFAULT nextval('{sequence}')")
+    cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})')
+
+    for name, kind, definition, referenced, constrained in constraints:
+        quoted = connection.ops.quote_name(name)
+        if kind == 'u' and column not in constrained:
+            # Sin la clave de partición no puede ser único: queda como índice (ver REGISTRY_TABLE)
+            cursor.execute(f'CREATE INDEX {quoted} ON {table} {definition[len("UNIQUE "):]}')
+        elif kind == 'u':
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {quoted} {definition}')
+        elif kind == 'f' and referenced not in PARTITIONED_TABLES:
+            cursor.execute(f'ALTER TABLE {table} ADD CONSTRAINT {quoted} {definition}')
+    for definition in indexes:
+        cursor.execute(definition.replace('CREATE UNIQUE INDEX', 'CREATE INDEX'))
+    cursor.execute(f'ANALYZE {table}')
+    return created
+
+
+def create_document_registry(cursor):
+    """Crea el registro de números de los tickets, lo llena y agrega los triggers que lo mantienen."""
+    cursor.execute(
+        f"""
+        CREATE TABLE IF NOT EXISTS {REGISTRY_TABLE} (
+            company_id bigint NOT NULL,
+            document_number varchar(20) NOT NULL,
+            PRIMARY KEY (company_id, document_number)
+        )
+        """
+    )
+    cursor.execute(
+        f'INSERT INTO {REGISTRY_TABLE} (company_id, document_number) '
+        f'SELECT company_id, document_number FROM ticket_ticket ON CONFLICT DO NOTHING'
+    )
+    cursor.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION {REGISTRY_TABLE}_sync() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP IN ('UPDATE', 'DELETE') THEN
+                DELETE FROM {REGISTRY_TABLE}
+                WHERE company_id = OLD.company_id AND document_number = OLD.document_number;
+            END IF;
+            IF TG_OP IN ('INSERT', 'UPDATE') THEN
+                -- Un número repetido viola la clave primaria: IntegrityError en la sentencia
+                INSERT INTO {REGISTRY_TABLE} (company_id, document_number)
+                VALUES (NEW.company_id, NEW.document_number);
+            END IF;
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    cursor.execute(f'DROP TRIGGER IF EXISTS {REGISTRY_TABLE}_sync ON ticket_ticket')
+    cursor.execute(
+        f'CREATE TRIGGER {REGISTRY_TABLE}_sync '
+        f'AFTER INSERT OR DELETE OR UPDATE OF company_id, document_number ON ticket_ticket '
+        f'FOR EACH ROW EXECUTE FUNCTION {REGISTRY_TABLE}_sync()'
+    )
+
+
+def convert(months_ahead=None):
+    """Convierte las tablas de tickets y detalles. Solo en Postgres y con TICKET_PARTITIONING activo."""
+    if connection.vendor != 'postgresql':
+        raise PartitioningError('El particionado de tickets requiere PostgreSQL.')
+    if not settings.TICKET_PARTITIONING:
+        raise PartitioningError('Active TICKET_PARTITIONING para convertir las tablas de tickets.')
+    months_ahead = settings.TICKET_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    created = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            created[table] = convert_table(cursor, table, column, months_ahead)
+        create_document_registry(cursor)
+    return created
+
+
+def ensure_partitions(months_ahead=None):
+    """Crea las particiones del mes actual y de los próximos meses. Devuelve las creadas por tabla."""
+    months_ahead = settings.TICKET_PARTITION_MONTHS_AHEAD if months_ahead is None else months_ahead
+    this_month = month_start(timezone.localdate())
+    created = {}
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table, column in PARTITIONED_TABLES.items():
+            if not is_partitioned(cursor, table):
+                continue
+            created[table] = sum(
+                create_partition(cursor, table, column, add_months(this_month, offset))
+                for offset in range(months_ahead + 1)
+            )
+    return created
+
+
+def list_partitions():
+    """(tabla, partición, límites, filas estimadas) de las particiones adjuntas."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            """
+            SELECT parent.relname, child.relname, pg_get_expr(child.relpartbound, child.oid), child.reltuples::bigint
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE parent.relname = ANY(%s)
+            ORDER BY parent.relname, child.relname
+            """,
+            [list(PARTITIONED_TABLES)],
+        )
+        return cursor.fetchall()
+
+
+def detach_before(month, drop=False):
+    """
+    Separa (y opcionalmente elimina) las particiones mensuales anteriores a `month`.
+    Las tablas separadas conservan sus filas para archivarlas; no se borra fila por fila.
+    """
+    detached = []
+    with transaction.atomic(), connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            prefix = f'{table}_p'
+            cursor.execute(
+                """
+                SELECT child.relname FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE pg_inherits.inhparent = to_regclass(%s) AND child.relname LIKE %s
+                """,
+                [table, f'{prefix}%'],
+            )
+            for (name,) in cursor.fetchall():
+                if name[len(prefix):] < f'{month:%Y%m}':
+                    cursor.execute(f'ALTER TABLE {table} DETACH PARTITION {name}')
+                    if drop:
+                        cursor.execute(f'DROP TABLE {name}')
+                    detached.append(name)
+    return detached
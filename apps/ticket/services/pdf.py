@@ -0,0 +1,218 @@
+"""
+PDF de tickets generados en el servidor, con la misma plantilla y hoja de estilos que la
+impresión desde el navegador (ticket_print.html), en los tamaños 58, 80, half y A4.
+
+Cada PDF se guarda en TICKET_PDF_DIR con el ETag del ticket en el nombre (make_etag: última
+modificación del ticket o de su compañía y RELEASE_VERSION). Una reimpresión solo lee el
+archivo; al editar el ticket cambia el ETag y el siguiente pedido lo vuelve a generar. Las
+señales y la depuración eliminan además los archivos de los tickets editados o borrados.
+
+render_batch genera los PDF que falten en un pool de procesos (WeasyPrint usa un núcleo por
+documento) y une todos en un solo archivo. Los procesos se crean con spawn, no con fork:
+no heredan las conexiones ni los hilos del servidor web, y cada uno configura Django al
+iniciar (DJANGO_SETTINGS_MODULE viene del entorno del proceso padre).
+"""
+import logging
+import math
+import multiprocessing
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.template.loader import render_to_string
+
+from apps.core.conditional import make_etag
+from apps.ticket.models import Ticket
+
+logger = logging.getLogger(__name__)
+
+# Tamaño -> (clase de ticket_print.css, ancho de página o None para A4)
+PDF_SIZES = {
+    '58': ('58', '58mm'),
+    '80': ('80', '80mm'),
+    'half': ('half', None),
+    'A4': ('a4', None),
+}
+DEFAULT_SIZE = 'half'
+# Alto de la primera pasada de los tamaños térmicos; la segunda usa el alto real del ticket
+THERMAL_DRAFT_HEIGHT = '2000mm'
+
+
+class PdfRenderError(Exception):
+    """No se pudo generar el PDF (ticket inexistente o WeasyPrint no disponible)."""
+
+
+def normalize_size(size):
+    return size if size in PDF_SIZES else DEFAULT_SIZE
+
+
+def _static_url_fetcher(url):
+    """Lee las hojas de estilo de /static/ del disco en lugar de pedirlas por HTTP."""
+    from weasyprint import default_url_fetcher
+
+    path = urlparse(url).path
+    if path.startswith(settings.STATIC_URL):
+        name = path[len(settings.STATIC_URL):]
+        if staticfiles_storage.exists(name):
+            location = staticfiles_storage.path(name)
+        else:
+            location = finders.find(name)
+        if location:
+            with open(location, 'rb') as file:
+                return {'string': file.read(), 'mime_type': 'text/css' if name.endswith('.css') else None}
+    return default_url_fetcher(url)
+
+
+def _write_pdf(ticket, size):
+    try:
+        from weasyprint import HTML
+    except (ImportError, OSError) as error:
+        # OSError: faltan las bibliotecas del sistema (Pango) que usa WeasyPrint
+        raise PdfRenderError(f'WeasyPrint no está disponible: {error}')
+
+    size_class, width = PDF_SIZES[size]
+
+    def render(page_size):
+        html = render_to_string('ticket/ticket_print.html', {
+            'ticket': ticket,
+            'details': ticket.details.all(),
+            'size': size,
+            'size_class': size_class,
+            'pdf_page_size': page_size,
+        })
+        return HTML(string=html, base_url='/', url_fetcher=_static_url_fetcher).render()
+
+    if width is None:
+        return render('A4 portrait').write_pdf()
+    # Papel térmico continuo: una sola página del alto del ticket
+    draft = render(f'{width} {THERMAL_DRAFT_HEIGHT}')
+    try:
+        # La caja del contenido no es API pública de WeasyPrint: puede cambiar al actualizarla
+        content_height = draft.pages[0]._page_box.children[0].margin_height()
+    except (AttributeError, IndexError, TypeError):
+        logger.warning('No se pudo medir el alto del ticket %s; se usa la página de %s', ticket.pk, THERMAL_DRAFT_HEIGHT)
+        return draft.write_pdf()
+    height_mm = math.ceil(content_height * 25.4 / 96) + 2
+    return render(f'{width} {height_mm}mm').write_pdf()
+
+
+def _ticket_dir(ticket_id):
+    return os.path.join(settings.TICKET_PDF_DIR, str(ticket_id // 1000), str(ticket_id))
+
+
+def cached_pdf_path(ticket_id, last_modified, size):
+    """Ruta del PDF en caché para esta versión del ticket (exista o no)."""
+    return os.path.join(_ticket_dir(ticket_id), f'{size}-{make_etag(last_modified, "pdf", size)}.pdf')
+
+
+def get_ticket_pdf(ticket_id, size, company_id=None):
+    """
+    Ruta del PDF del ticket en `size`, generándolo si la versión actual no está en caché.
+    Lanza Ticket.DoesNotExist si el ticket no existe (o es de otra compañía).
+    """
+    size = normalize_size(size)
+    last_modified = Ticket.get_last_modified(ticket_id, company_id)
+    if last_modified is None:
+        raise Ticket.DoesNotExist
+    path = cached_pdf_path(ticket_id, last_modified, size)
+    if os.path.exists(path):
+        return path
+
+    ticket = Ticket.objects.select_related('company').get(pk=ticket_id)
+    content = _write_pdf(ticket, size)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Escritura atómica: otro proceso nunca lee un PDF a medio escribir
+    descriptor, temporary = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    with os.fdopen(descriptor, 'wb') as file:
+        file.write(content)
+    os.replace(temporary, path)
+    # Versiones anteriores del mismo tamaño
+    for name in os.listdir(os.path.dirname(path)):
+        if name.startswith(f'{size}-') and name.endswith('.pdf') and name != os.path.basename(path):
+            _remove(os.path.join(os.path.dirname(path), name))
+    return path
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def discard_ticket_pdfs(ticket_ids):
+    """Elimina los PDF en caché de los tickets (editados o borrados)."""
+    for ticket_id in ticket_ids:
+        shutil.rmtree(_ticket_dir(ticket_id), ignore_errors=True)
+
+
+def _init_worker():
+    # Proceso nuevo (spawn): carga la configuración y las aplicaciones; abre su propia conexión
+    import django
+
+    django.setup()
+
+
+def _render_in_worker(arguments):
+    ticket_id, size = arguments
+    try:
+        return get_ticket_pdf(ticket_id, size)
+    except Ticket.DoesNotExist:
+        return None
+
+
+def render_batch(ticket_ids, size, output, workers=None):
+    """
+    Une en `output` (ruta o archivo binario) los PDF de los tickets, en el orden recibido.
+    Los que no están en caché se generan en `workers` procesos (TICKET_PDF_WORKERS); con un
+    solo faltante o workers=1 se generan en este proceso. Devuelve la cantidad de tickets unidos.
+    """
+    from pypdf import PdfWriter
+
+    size = normalize_size(size)
+    workers = settings.TICKET_PDF_WORKERS if workers is None else workers
+    # Misma versión que Ticket.get_last_modified, para todos los tickets en una consulta
+    versions = {
+        pk: max(updated_at, company_updated_at)
+        for pk, updated_at, company_updated_at in
+        Ticket.objects.filter(pk__in=ticket_ids).values_list('pk', 'updated_at', 'company__updated_at')
+    }
+    paths = {}
+    missing = []
+    for ticket_id in ticket_ids:
+        if ticket_id not in versions:
+            continue
+        path = cached_pdf_path(ticket_id, versions[ticket_id], size)
+        if os.path.exists(path):
+            paths[ticket_id] = path
+        else:
+            missing.append(ticket_id)
+
+    if len(missing) > 1 and workers > 1:
+        with ProcessPoolExecutor(
+            max_workers=min(workers, len(missing)),
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+        ) as pool:
+            rendered = pool.map(_render_in_worker, [(ticket_id, size) for ticket_id in missing], chunksize=8)
+            paths.update((ticket_id, path) for ticket_id, path in zip(missing, rendered) if path)
+    else:
+        for ticket_id in missing:
+            path = _render_in_worker((ticket_id, size))
+            if path:
+                paths[ticket_id] = path
+
+    writer = PdfWriter()
+    merged = 0
+    for ticket_id in ticket_ids:
+        if ticket_id in paths:
+            writer.append(paths[ticket_id])
+            merged += 1
+    writer.write(output)
+    logger.info('PDF de %s tickets (%s generados) en tamaño %s', merged, len(missing), size)
+    return merged
@@ -0,0 +1,75 @@
+"""
+Historial de tickets por placa para los vehículos que vuelven a cargar.
+
+La consulta usa el índice (company, plate, date) y devuelve los últimos tickets ya
+serializados; el resultado se guarda en la caché de la compañía por placa y se invalida
+cuando se guarda o elimina un ticket de esa placa (ver apps.ticket.signals). HISTORY_CACHE_TIMEOUT acota el desfase
+en los casos que no pasan por esas señales (p. ej. updates masivos).
+"""
+from django.core.cache import cache
+from django.utils import timezone
+
+from apps.company.tenancy import company_cache_key
+from apps.ticket.models import Ticket
+
+HISTORY_CACHE_TIMEOUT = 120
+HISTORY_DEFAULT_LIMIT = 5
+HISTORY_MAX_LIMIT = 20
+
+
+def normalize_plate(plate):
+    """Placas sin espacios ni diferencias de mayúsculas: ' gba-1234 ' -> 'GBA-1234'."""
+    return ''.join((plate or '').split()).upper()
+
+
+def _cache_key(company_id, plate):
+    return company_cache_key(company_id, 'ticket:plate-history', plate)
+
+
+def serialize_ticket(ticket):
+    """Datos del ticket necesarios para mostrar el historial y repetir la venta."""
+    return {
+        'id': ticket.pk,
+        'document_number': ticket.document_number,
+        'date': timezone.localtime(ticket.date).isoformat(),
+        'seller': ticket.seller,
+        'phone': ticket.phone or '',
+        'plate': ticket.plate,
+        'total': str(ticket.total),
+        'details': [
+            {
+                'product': detail.product,
+                'quantity': str(detail.quantity),
+                'unit_price': str(detail.unit_price),
+            }
+            for detail in ticket.details.all()
+        ],
+    }
+
+
+def get_plate_history(company_id, plate, limit=HISTORY_DEFAULT_LIMIT):
+    """Últimos `limit` tickets de la placa en la compañía, del más reciente al más antiguo."""
+    plate = normalize_plate(plate)
+    if not plate:
+        return []
+    history = cache.get(_cache_key(company_id, plate))
+    if history is None:
+        tickets = (
+            Ticket.objects
+            .filter(company_id=company_id, plate=plate)
+            .order_by('-date')
+            .prefetch_related('details')[:HISTORY_MAX_LIMIT]
+        )
+        history = [serialize_ticket(ticket) for ticket in tickets]
+        cache.set(_cache_key(company_id, plate), history, HISTORY_CACHE_TIMEOUT)
+    return history[:limit]
+
+
+def get_last_ticket(company_id, plate):
+    """Último ticket de la placa (serializado) o None."""
+    history = get_plate_history(company_id, plate, limit=1)
+    return history[0] if history else None
+
+
+def invalidate_plate_history(company_id, plate):
+    cache.delete(_cache_key(company_id, normalize_plate(plate)))
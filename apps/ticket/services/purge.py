@@ -0,0 +1,260 @@
+"""
+Depuración por lotes de tickets antiguos y de compañías con todos sus tickets.
+
+El borrado en cascada de Django carga en memoria cada ticket y detalle antes de eliminarlos,
+lo que con años de datos bloquea las tablas y agota la memoria dentro de una petición.
+TicketPurger procesa los tickets en lotes de PURGE_CHUNK_SIZE, cada uno en su propia
+transacción corta:
+
+1. Archiva los tickets del lote (con detalles y comprobante SRI) en un archivo .jsonl.gz,
+   un miembro gzip por ticket, y registra su posición en ArchivedTicket.
+2. Elimina detalles, comprobantes y tickets con DELETE por conjunto de ids, sin cargar
+   instancias, y registra las eliminaciones en el registro de cambios.
+
+Si la transacción de un lote falla, los registros ya escritos en el archivo quedan sin
+índice y se ignoran; el lote se vuelve a procesar en la siguiente ejecución.
+"""
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models import F, SET_NULL
+from django.utils import timezone
+
+from apps.company.models import Company
+from apps.ticket.models import ArchivedTicket, PurgeJob, SriDocument, Ticket, TicketChange, TicketDetail
+from apps.ticket.services.pdf import discard_ticket_pdfs
+from apps.ticket.services.plate_history import invalidate_plate_history
+
+TICKET_FIELDS = [
+    'id', 'document_number', 'date', 'seller', 'client', 'ci_ruc', 'phone', 'plate',
+    'iva_percentage', 'total', 'company_id', 'company__name', 'company__ruc',
+]
+DETAIL_FIELDS = ['id', 'ticket_id', 'product', 'quantity', 'unit_price', 'total', 'catalog_product_id']
+SRI_FIELDS = ['ticket_id', 'access_key', 'status', 'xml', 'signed_xml']
+
+
+class TicketArchiveWriter:
+    """Agrega tickets a un archivo .jsonl.gz; cada línea es un miembro gzip independiente."""
+
+    def __init__(self, name):
+        self.name = name
+        self.path = os.path.join(settings.TICKET_ARCHIVE_DIR, name)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+
+    def write(self, records):
+        """
+        Escribe los registros al final del archivo y devuelve (offset, length) de cada uno.
+        El archivo queda sincronizado en disco antes de volver, es decir, antes del commit
+        que elimina los tickets.
+        """
+        positions = []
+        with open(self.path, 'ab') as archive:
+            offset = archive.seek(0, os.SEEK_END)
+            for record in records:
+                line = json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n'
+                member = gzip.compress(line.encode('utf-8'))
+                archive.write(member)
+                positions.append((offset, len(member)))
+                offset += len(member)
+            archive.flush()
+            os.fsync(archive.fileno())
+        return positions
+
+
+def read_archived_ticket(archived):
+    """Datos del ticket archivado: lee y descomprime solo su miembro del archivo."""
+    path = os.path.join(settings.TICKET_ARCHIVE_DIR, archived.archive_file)
+    with open(path, 'rb') as archive:
+        archive.seek(archived.offset)
+        return json.loads(gzip.decompress(archive.read(archived.length)))
+
+
+def release_ticket_references(ids):
+    """
+    Aplica SET_NULL de las relaciones que apuntan a los tickets (p. ej. ventas de surtidores).
+    El DELETE directo de la depuración no pasa por el Collector, que es quien lo haría.
+    """
+    for relation in Ticket._meta.related_objects:
+        if relation.on_delete is SET_NULL:
+            name = relation.field.name
+            relation.related_model.objects.filter(**{f'{name}__in': ids}).update(**{name: None})
+
+
+def delete_tickets(ids):
+    """
+    DELETE de los tickets sin cargarlos ni enviar señales. Las referencias deben estar
+    resueltas antes (detalles, comprobantes y release_ticket_references).
+    """
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {connection.ops.quote_name(Ticket._meta.db_table)} WHERE id IN ({placeholders})', ids)
+        return cursor.rowcount
+
+
+def invalidate_plates(plates):
+    for company_id, plate in plates:
+        invalidate_plate_history(company_id, plate)
+
+
+def enqueue_retention_purge(retention_days=None, archive=True):
+    """Programa la depuración de los tickets más antiguos que la ventana de retención."""
+    days = settings.TICKET_RETENTION_DAYS if retention_days is None else retention_days
+    return PurgeJob.objects.create(
+        kind=PurgeJob.KIND_RETENTION,
+        cutoff=timezone.now() - timedelta(days=days),
+        archive=archive,
+    )
+
+
+def enqueue_company_purge(company, archive=True):
+    """
+    Programa la eliminación de la compañía con todos sus tickets en segundo plano.
+    Si ya hay una depuración pendiente o en ejecución para la compañía, la devuelve.
+    """
+    job = PurgeJob.objects.filter(
+        kind=PurgeJob.KIND_COMPANY,
+        company_id_ref=company.pk,
+        status__in=[PurgeJob.STATUS_PENDING, PurgeJob.STATUS_RUNNING],
+    ).first()
+    if job is None:
+        job = PurgeJob.objects.create(
+            kind=PurgeJob.KIND_COMPANY,
+            company_id_ref=company.pk,
+            company_name=company.name,
+            archive=archive,
+        )
+    return job
+
+
+def claim_next_job():
+    """Toma el trabajo pendiente más antiguo; los demás workers lo saltan (SKIP LOCKED)."""
+    with transaction.atomic():
+        job = (
+            PurgeJob.objects
+            .select_for_update(skip_locked=True)
+            .filter(status=PurgeJob.STATUS_PENDING)
+            .order_by('created_at')
+            .first()
+        )
+        if job is not None:
+            job.status = PurgeJob.STATUS_RUNNING
+            job.started_at = timezone.now()
+            job.save(update_fields=['status', 'started_at'])
+    return job
+
+
+class TicketPurger:
+    """Ejecuta un PurgeJob lote por lote; on_chunk(purger) se llama después de cada lote."""
+
+    def __init__(self, job, chunk_size=None, on_chunk=None):
+        self.job = job
+        self.chunk_size = chunk_size or settings.PURGE_CHUNK_SIZE
+        self.on_chunk = on_chunk
+        self.writer = None
+        if job.archive:
+            self.writer = TicketArchiveWriter(f'{timezone.now():%Y/%m}/tickets-{job.kind}-{job.pk}.jsonl.gz')
+
+    def get_queryset(self):
+        if self.job.kind == PurgeJob.KIND_COMPANY:
+            return Ticket.objects.filter(company_id=self.job.company_id_ref)
+        return Ticket.objects.filter(date__lt=self.job.cutoff)
+
+    def run(self):
+        job = self.job
+        try:
+            while True:
+                ids = list(self.get_queryset().order_by('id').values_list('pk', flat=True)[:self.chunk_size])
+                if not ids:
+                    break
+                self.purge_chunk(ids)
+                if self.on_chunk:
+                    self.on_chunk(self)
+            if job.kind == PurgeJob.KIND_COMPANY:
+                # Sin tickets, la cascada de la compañía ya no tiene nada que cargar
+                Company.objects.filter(pk=job.company_id_ref).delete()
+        except Exception as error:
+            job.status = PurgeJob.STATUS_FAILED
+            job.error = str(error)
+            job.finished_at = timezone.now()
+            job.save(update_fields=['status', 'error', 'finished_at'])
+            raise
+        job.status = PurgeJob.STATUS_DONE
+        job.error = ''
+        job.finished_at = timezone.now()
+        job.save(update_fields=['status', 'error', 'finished_at'])
+        return job
+
+    def build_records(self, tickets, details, documents):
+        details_by_ticket = defaultdict(list)
+        for detail in details:
+            details_by_ticket[detail['ticket_id']].append(detail)
+        documents_by_ticket = {document['ticket_id']: document for document in documents}
+        return [
+            {
+                **ticket,
+                'details': details_by_ticket.get(ticket['id'], []),
+                'sri_document': documents_by_ticket.get(ticket['id']),
+            }
+            for ticket in tickets
+        ]
+
+    def archive_chunk(self, records):
+        positions = self.writer.write(records)
+        ArchivedTicket.objects.bulk_create([
+            ArchivedTicket(
+                ticket_id=record['id'],
+                company_id=record['company_id'],
+                document_number=record['document_number'],
+                date=record['date'],
+                plate=record['plate'],
+                company_name=record['company__name'],
+                total=record['total'],
+                archive_file=self.writer.name,
+                offset=offset,
+                length=length,
+            )
+            for record, (offset, length) in zip(records, positions)
+        ])
+
+    def purge_chunk(self, ids):
+        with transaction.atomic():
+            # Bloquear los tickets del lote para que no cambien entre el archivo y el borrado
+            tickets = list(
+                Ticket.objects.select_for_update(of=('self',)).filter(pk__in=ids).order_by('id').values(*TICKET_FIELDS)
+            )
+            ids = [ticket['id'] for ticket in tickets]
+            if not ids:
+                return
+            if self.writer:
+                details = TicketDetail.objects.filter(ticket_id__in=ids).order_by('id').values(*DETAIL_FIELDS)
+                documents = SriDocument.objects.filter(ticket_id__in=ids).values(*SRI_FIELDS)
+                self.archive_chunk(self.build_records(tickets, details, documents))
+
+            # Detalles y comprobantes no tienen receptores de delete: Django los borra con un solo DELETE
+            details_deleted, _ = TicketDetail.objects.filter(ticket_id__in=ids).delete()
+            SriDocument.objects.filter(ticket_id__in=ids).delete()
+            release_ticket_references(ids)
+            TicketChange.record_many(
+                [Ticket(pk=ticket['id'], company_id=ticket['company_id']) for ticket in tickets], TicketChange.ACTION_DELETE
+            )
+            # Los tickets sí tienen post_delete (registro de cambios, ya escrito arriba): DELETE directo
+            tickets_deleted = delete_tickets(ids)
+
+            PurgeJob.objects.filter(pk=self.job.pk).update(
+                tickets_archived=F('tickets_archived') + (len(ids) if self.writer else 0),
+                tickets_deleted=F('tickets_deleted') + tickets_deleted,
+                details_deleted=F('details_deleted') + details_deleted,
+            )
+            plates = {(ticket['company_id'], ticket['plate']) for ticket in tickets}
+            transaction.on_commit(lambda: invalidate_plates(plates))
+            transaction.on_commit(lambda: discard_ticket_pdfs(ids))
+
+        self.job.tickets_archived += len(ids) if self.writer else 0
+        self.job.tickets_deleted += tickets_deleted
+        self.job.details_deleted += details_deleted
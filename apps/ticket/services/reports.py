@@ -0,0 +1,165 @@
+"""
+Reportes de ventas agregados en la base de datos.
+
+Cada reporte agrupa los detalles de ticket por una dimensión (día, semana, mes, vendedor,
+producto o placa) y suma cantidades e importes con SUM(quantity * unit_price) en SQL:
+ningún ticket se carga en Python. Los resultados se guardan en la caché por conjunto de
+parámetros en el espacio de la compañía; la clave incluye la versión de los datos (último id del registro de cambios,
+que se escribe en la misma transacción que cualquier alta, edición o baja), así que un
+cambio deja inaccesibles los resultados anteriores sin tener que borrarlos.
+"""
+import csv
+import hashlib
+import json
+from collections import namedtuple
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Count, DateField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from apps.company.tenancy import company_cache_key
+from apps.product.catalog import normalize_name
+from apps.ticket.models import TicketChange, TicketDetail
+from apps.ticket.services.plate_history import normalize_plate
+
+REPORT_CACHE_TIMEOUT = 60 * 60
+
+ReportDimension = namedtuple('ReportDimension', ['label', 'expression', 'is_period'])
+
+DIMENSIONS = {
+    # La fecha del ticket copiada en el detalle: los reportes por período no necesitan el join
+    'day': ReportDimension('Día', TruncDay('ticket_date', output_field=DateField()), True),
+    'week': ReportDimension('Semana', TruncWeek('ticket_date', output_field=DateField()), True),
+    'month': ReportDimension('Mes', TruncMonth('ticket_date', output_field=DateField()), True),
+    'seller': ReportDimension('Vendedor', F('ticket__seller'), False),
+    # El nombre del catálogo agrupa las variantes escritas a mano; sin catálogo, el texto de la línea
+    'product': ReportDimension('Producto', Coalesce('catalog_product__name', 'product'), False),
+    'plate': ReportDimension('Placa', F('ticket__plate'), False),
+}
+
+REPORT_CHOICES = [(key, dimension.label) for key, dimension in DIMENSIONS.items()]
+
+CSV_HEADERS = ['Tickets', 'Cantidad', 'Subtotal', 'IVA', 'Total']
+
+
+def start_of_day(day):
+    """Inicio del día en la zona horaria local."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def get_data_version():
+    """Versión de los datos de tickets: id del último cambio registrado (consulta por PK)."""
+    return TicketChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+class SalesReport:
+    """
+    Reporte de ventas de la compañía agrupado por `dimension` con filtros opcionales.
+    Los filtros de fecha son inclusivos y se comparan contra la fecha local del ticket.
+    """
+
+    def __init__(self, company_id, dimension, date_from=None, date_to=None, product='', seller='', plate=''):
+        if dimension not in DIMENSIONS:
+            raise ValueError(f'Reporte desconocido: {dimension}')
+        self.company_id = company_id
+        self.dimension = dimension
+        self.date_from = date_from
+        self.date_to = date_to
+        self.product = (product or '').strip()
+        self.seller = (seller or '').strip()
+        self.plate = normalize_plate(plate)
+
+    @property
+    def label(self):
+        return DIMENSIONS[self.dimension].label
+
+    def get_params(self):
+        return {
+            'dimension': self.dimension,
+            'date_from': self.date_from.isoformat() if self.date_from else None,
+            'date_to': self.date_to.isoformat() if self.date_to else None,
+            'product': normalize_name(self.product),
+            'seller': self.seller.lower(),
+            'plate': self.plate,
+        }
+
+    def get_cache_key(self, version):
+        digest = hashlib.md5(json.dumps(self.get_params(), sort_keys=True).encode('utf-8')).hexdigest()
+        return company_cache_key(self.company_id, 'ticket:report', version, digest)
+
+    def get_queryset(self):
+        queryset = TicketDetail.objects.filter(ticket__company_id=self.company_id)
+        # Rango sobre la columna (no sobre su fecha) para que use el índice de Ticket.date; el
+        # mismo rango sobre ticket_date descarta las particiones de detalles que no aplican
+        if self.date_from:
+            start = start_of_day(self.date_from)
+            queryset = queryset.filter(ticket__date__gte=start, ticket_date__gte=start)
+        if self.date_to:
+            end = start_of_day(self.date_to + timedelta(days=1))
+            queryset = queryset.filter(ticket__date__lt=end, ticket_date__lt=end)
+        if self.product:
+            queryset = queryset.filter(
+                Q(catalog_product__normalized_name=normalize_name(self.product))
+                | Q(catalog_product__isnull=True, product__iexact=self.product)
+            )
+        if self.seller:
+            queryset = queryset.filter(ticket__seller__icontains=self.seller)
+        if self.plate:
+            queryset = queryset.filter(ticket__plate=self.plate)
+        return queryset
+
+    def compute(self):
+        """Una sola consulta GROUP BY; devuelve filas con Decimal sin redondear."""
+        dimension = DIMENSIONS[self.dimension]
+        line_total = F('quantity') * F('unit_price')
+        rows = (
+            self.get_queryset()
+            .annotate(key=dimension.expression)
+            .values('key')
+            .annotate(
+                tickets=Count('ticket', distinct=True),
+                quantity=Sum('quantity'),
+                subtotal=Sum(line_total),
+                iva=Sum(line_total * F('ticket__iva_percentage') / Value(Decimal('100'))),
+            )
+        )
+        rows = rows.order_by('key') if dimension.is_period else rows.order_by('-subtotal', 'key')
+        return [
+            {**row, 'key': row['key'] or '', 'total': row['subtotal'] + row['iva']}
+            for row in rows
+        ]
+
+    def get_rows(self):
+        """Filas del reporte desde la caché, calculándolas si la versión de los datos cambió."""
+        cache_key = self.get_cache_key(get_data_version())
+        rows = cache.get(cache_key)
+        if rows is None:
+            rows = self.compute()
+            cache.set(cache_key, rows, REPORT_CACHE_TIMEOUT)
+        return rows
+
+    @staticmethod
+    def get_totals(rows):
+        """Totales de las filas ya agregadas (los tickets pueden repetirse entre grupos de producto)."""
+        return {
+            field: sum((row[field] for row in rows), Decimal('0'))
+            for field in ('quantity', 'subtotal', 'iva', 'total')
+        }
+
+    def write_csv(self, output, rows=None):
+        """Escribe el reporte como CSV; montos redondeados a 2 decimales y cantidades a 8."""
+        rows = self.get_rows() if rows is None else rows
+        writer = csv.writer(output)
+        writer.writerow([self.label, *CSV_HEADERS])
+        for row in rows:
+            writer.writerow([
+                row['key'],
+                row['tickets'],
+                f"{row['quantity']:.8f}",
+                f"{row['subtotal']:.2f}",
+                f"{row['iva']:.2f}",
+                f"{row['total']:.2f}",
+            ])
@@ -0,0 +1,194 @@
+"""
+Generación por lotes de comprobantes electrónicos del SRI a partir de tickets.
+
+- build_payload extrae de cada ticket los datos planos que necesita sri_xml.render_document
+  (clave de acceso de 49 dígitos con módulo 11 y XML), que se ejecuta en un pool de procesos.
+- SriBatchGenerator reparte los tickets pendientes entre procesos y guarda el resultado en
+  SriDocument; los tickets cuya última modificación no cambió se omiten (caché).
+- Un comprobante firmado, enviado o autorizado nunca se regenera: si su ticket cambió, se
+  marca needs_review para emitir una nota de crédito o revisarlo a mano.
+- La firma y el envío son clases configurables (SRI_SIGNER / SRI_SUBMITTER) para poder
+  reemplazarlas por implementaciones sin red al trabajar fuera de línea.
+"""
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.ticket.models import SriDocument, Ticket
+from apps.ticket.services.sri_xml import render_document
+
+BATCH_CHUNK_SIZE = 500
+
+
+def build_payload(ticket):
+    """
+    Datos planos (serializables) de un ticket para generar su comprobante en otro proceso.
+    Requiere ticket.company y ticket.details cargados (select_related / prefetch_related).
+    """
+    company = ticket.company
+    return {
+        'ticket_id': ticket.pk,
+        'source_modified': max(ticket.updated_at, company.updated_at),
+        'issue_date': timezone.localtime(ticket.date).strftime('%d/%m/%Y'),
+        'environment': str(settings.SRI_ENVIRONMENT),
+        'establishment': settings.SRI_ESTABLISHMENT,
+        'emission_point': settings.SRI_EMISSION_POINT,
+        'sequential': ticket.document_number,
+        # Código numérico fijo por ticket para que la clave no cambie al regenerar
+        'numeric_code': f'{ticket.pk % 100_000_000:08d}',
+        'ruc': company.ruc,
+        'company_name': company.name,
+        'company_address': company.address,
+        'buyer_name': ticket.client,
+        'buyer_id': ticket.ci_ruc,
+        'iva_percentage': str(ticket.iva_percentage),
+        'plate': ticket.plate,
+        'seller': ticket.seller,
+        'lines': [(detail.product, str(detail.quantity), str(detail.unit_price)) for detail in ticket.details.all()],
+    }
+
+
+class UnsignedSigner:
+    """Firmador nulo: devuelve el XML sin firmar (pruebas y trabajo fuera de línea)."""
+
+    def sign(self, xml, company):
+        return xml
+
+
+class OfflineSubmitter:
+    """Envío nulo: no contacta al SRI y deja el comprobante como firmado."""
+
+    def submit(self, access_key, signed_xml):
+        return SriDocument.STATUS_SIGNED
+
+
+def get_signer():
+    return import_string(settings.SRI_SIGNER)()
+
+
+def get_submitter():
+    return import_string(settings.SRI_SUBMITTER)()
+
+
+class SriBatchGenerator:
+    """
+    Genera los comprobantes de un conjunto de tickets.
+    Solo procesa los tickets sin comprobante o modificados desde la última generación
+    (salvo force=True). Con workers > 1 el armado y la validación se reparten en procesos.
+    """
+
+    def __init__(self, workers=1, force=False, xsd_path=None, chunk_size=BATCH_CHUNK_SIZE, on_chunk=None):
+        self.workers = workers
+        self.force = force
+        self.xsd_path = settings.SRI_XSD_PATH if xsd_path is None else xsd_path
+        self.chunk_size = chunk_size
+        self.on_chunk = on_chunk
+        self.generated = 0
+        self.skipped = 0
+        self.flagged = 0
+        self.errors = {}
+
+    def stale_ids(self, queryset):
+        """
+        Ids de tickets cuyo comprobante falta o quedó desactualizado (una sola consulta).
+        Los comprobantes ya emitidos no se regeneran, ni siquiera con force.
+        """
+        queryset = queryset.exclude(sri_document__status__in=SriDocument.ISSUED_STATUSES)
+        if self.force:
+            return list(queryset.values_list('pk', flat=True))
+        return list(
+            queryset
+            .annotate(last_modified=Greatest('updated_at', 'company__updated_at'))
+            .filter(Q(sri_document__isnull=True) | ~Q(sri_document__source_modified=F('last_modified')))
+            .values_list('pk', flat=True)
+        )
+
+    def flag_changed_issued(self, queryset):
+        """Marca para revisión los comprobantes emitidos cuyo ticket o compañía cambió después."""
+        ids = list(
+            SriDocument.objects
+            .filter(ticket__in=queryset, status__in=SriDocument.ISSUED_STATUSES, needs_review=False)
+            .annotate(last_modified=Greatest('ticket__updated_at', 'ticket__company__updated_at'))
+            .exclude(source_modified=F('last_modified'))
+            .values_list('pk', flat=True)
+        )
+        if ids:
+            SriDocument.objects.filter(pk__in=ids).update(needs_review=True)
+        return len(ids)
+
+    def run(self, queryset):
+        self.flagged = self.flag_changed_issued(queryset)
+        ids = self.stale_ids(queryset)
+        self.skipped = queryset.count() - len(ids)
+        executor = ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            for start in range(0, len(ids), self.chunk_size):
+                chunk = ids[start:start + self.chunk_size]
+                tickets = Ticket.objects.filter(pk__in=chunk).select_related('company').prefetch_related('details')
+                payloads = [build_payload(ticket) for ticket in tickets]
+                xsd_paths = [self.xsd_path] * len(payloads)
+                if executor:
+                    results = list(executor.map(render_document, payloads, xsd_paths, chunksize=max(1, len(payloads) // (self.workers * 4))))
+                else:
+                    results = [render_document(payload, self.xsd_path) for payload in payloads]
+                self._save(results)
+                if self.on_chunk:
+                    self.on_chunk(self)
+        finally:
+            if executor:
+                executor.shutdown()
+        return self
+
+    def _save(self, results):
+        documents = []
+        for result in results:
+            if result['errors']:
+                self.errors[result['ticket_id']] = result['errors']
+                continue
+            documents.append(SriDocument(
+                ticket_id=result['ticket_id'],
+                access_key=result['access_key'],
+                xml=result['xml'],
+                signed_xml='',
+                status=SriDocument.STATUS_GENERATED,
+                source_modified=result['source_modified'],
+            ))
+        with transaction.atomic():
+            # Un comprobante firmado mientras se generaba el lote no se sobrescribe
+            issued = set(
+                SriDocument.objects.select_for_update()
+                .filter(ticket_id__in=[document.ticket_id for document in documents], status__in=SriDocument.ISSUED_STATUSES)
+                .values_list('ticket_id', flat=True)
+            )
+            documents = [document for document in documents if document.ticket_id not in issued]
+            SriDocument.objects.bulk_create(
+                documents,
+                update_conflicts=True,
+                unique_fields=['ticket'],
+                update_fields=['access_key', 'xml', 'signed_xml', 'status', 'source_modified', 'generated_at'],
+            )
+        self.generated += len(documents)
+
+
+def sign_and_submit(queryset=None):
+    """
+    Firma y envía los comprobantes generados con las clases configuradas.
+    Devuelve la cantidad de comprobantes procesados.
+    """
+    signer = get_signer()
+    submitter = get_submitter()
+    if queryset is None:
+        queryset = SriDocument.objects.all()
+    pending = queryset.filter(status=SriDocument.STATUS_GENERATED).select_related('ticket__company')
+    processed = 0
+    for document in pending.iterator(chunk_size=BATCH_CHUNK_SIZE):
+        document.signed_xml = signer.sign(document.xml, document.ticket.company)
+        document.status = submitter.submit(document.access_key, document.signed_xml)
+        document.save(update_fields=['signed_xml', 'status'])
+        processed += 1
+    return processed
@@ -0,0 +1,207 @@
+"""
+Armado del comprobante electrónico del SRI (factura, versión 1.1.0) a partir de datos planos.
+
+Este módulo no importa Django: los procesos del pool de generación por lotes solo
+necesitan cargar la biblioteca estándar (y lxml para validar contra el XSD).
+"""
+import xml.etree.ElementTree as ET
+from decimal import Decimal, ROUND_HALF_UP
+
+
+DOC_TYPE_INVOICE = '01'
+EMISSION_TYPE_NORMAL = '1'
+XML_VERSION = '1.1.0'
+
+# Código de porcentaje de IVA según la tabla 17 de la ficha técnica del SRI
+IVA_PERCENTAGE_CODES = {
+    Decimal('0'): '0',
+    Decimal('12'): '2',
+    Decimal('14'): '3',
+    Decimal('15'): '4',
+    Decimal('5'): '5',
+    Decimal('8'): '8',
+    Decimal('13'): '10',
+}
+
+# Forma de pago por defecto: 01 = sin utilización del sistema financiero
+DEFAULT_PAYMENT_METHOD = '01'
+
+TWO_PLACES = Decimal('0.01')
+SIX_PLACES = Decimal('0.000001')
+
+
+class SriDocumentError(ValueError):
+    """Datos del ticket o de la compañía que impiden generar el comprobante."""
+
+
+def mod11_check_digit(digits):
+    """Dígito verificador módulo 11 (pesos 2 a 7 de derecha a izquierda)."""
+    total = 0
+    for index, digit in enumerate(reversed(digits)):
+        total += int(digit) * (2 + index % 6)
+    check = 11 - total % 11
+    if check == 11:
+        return '0'
+    if check == 10:
+        return '1'
+    return str(check)
+
+
+def build_access_key(issue_date, doc_type, ruc, environment, establishment, emission_point,
+                     sequential, numeric_code, emission_type=EMISSION_TYPE_NORMAL):
+    """
+    Clave de acceso de 49 dígitos: fecha (ddmmaaaa), tipo de comprobante, RUC, ambiente,
+    serie (establecimiento + punto de emisión), secuencial, código numérico, tipo de emisión
+    y dígito verificador.
+    """
+    parts = [
+        ('fecha de emisión', issue_date, 8),
+        ('tipo de comprobante', doc_type, 2),
+        ('RUC', ruc, 13),
+        ('ambiente', environment, 1),
+        ('establecimiento', establishment, 3),
+        ('punto de emisión', emission_point, 3),
+        ('secuencial', sequential, 9),
+        ('código numérico', numeric_code, 8),
+        ('tipo de emisión', emission_type, 1),
+    ]
+    for label, value, length in parts:
+        if len(value) != length or not value.isdigit():
+            raise SriDocumentError(f'El {label} debe tener {length} dígitos (valor: "{value}").')
+    key = ''.join(value for _, value, _ in parts)
+    return key + mod11_check_digit(key)
+
+
+def buyer_id_type(identification):
+    """Tipo de identificación del comprador (tabla 6 de la ficha técnica)."""
+    if identification == '9999999999999':
+        return '07'  # Consumidor final
+    if len(identification) == 13 and identification.isdigit() and identification.endswith('001'):
+        return '04'  # RUC
+    if len(identification) == 10 and identification.isdigit():
+        return '05'  # Cédula
+    return '06'  # Pasaporte
+
+
+def _money(value):
+    return str(Decimal(value).quantize(TWO_PLACES, rounding=ROUND_HALF_UP))
+
+
+def _sub(parent, tag, text=None):
+    element = ET.SubElement(parent, tag)
+    if text is not None:
+        element.text = str(text)
+    return element
+
+
+def render_document(payload, xsd_path=''):
+    """
+    Construye la clave de acceso y el XML de la factura. No usa la base de datos ni Django,
+    para poder ejecutarse en un ProcessPoolExecutor con cualquier método de arranque.
+    Devuelve un dict con ticket_id, access_key, xml y errors.
+    """
+    result = {'ticket_id': payload['ticket_id'], 'source_modified': payload['source_modified'],
+              'access_key': '', 'xml': '', 'errors': []}
+    try:
+        day, month, year = payload['issue_date'].split('/')
+        access_key = build_access_key(
+            f'{day}{month}{year}', DOC_TYPE_INVOICE, payload['ruc'], payload['environment'],
+            payload['establishment'], payload['emission_point'], payload['sequential'],
+            payload['numeric_code'],
+        )
+        iva_percentage = Decimal(payload['iva_percentage']).normalize()
+        iva_code = IVA_PERCENTAGE_CODES.get(iva_percentage)
+        if iva_code is None:
+            raise SriDocumentError(f'Porcentaje de IVA sin código SRI: {payload["iva_percentage"]}%.')
+        if not payload['lines']:
+            raise SriDocumentError('El ticket no tiene detalles.')
+    except SriDocumentError as error:
+        result['errors'].append(str(error))
+        return result
+
+    rate = Decimal(payload['iva_percentage']) / 100
+    lines = []
+    for product, quantity, unit_price in payload['lines']:
+        base = (Decimal(quantity) * Decimal(unit_price)).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)
+        lines.append((product, Decimal(quantity), Decimal(unit_price), base, (base * rate).quantize(TWO_PLACES, rounding=ROUND_HALF_UP)))
+    total_base = sum(line[3] for line in lines)
+    total_iva = sum(line[4] for line in lines)
+
+    root = ET.Element('factura', id='comprobante', version=XML_VERSION)
+
+    info_tributaria = _sub(root, 'infoTributaria')
+    _sub(info_tributaria, 'ambiente', payload['environment'])
+    _sub(info_tributaria, 'tipoEmision', EMISSION_TYPE_NORMAL)
+    _sub(info_tributaria, 'razonSocial', payload['company_name'])
+    _sub(info_tributaria, 'ruc', payload['ruc'])
+    _sub(info_tributaria, 'claveAcceso', access_key)
+    _sub(info_tributaria, 'codDoc', DOC_TYPE_INVOICE)
+    _sub(info_tributaria, 'estab', payload['establishment'])
+    _sub(info_tributaria, 'ptoEmi', payload['emission_point'])
+    _sub(info_tributaria, 'secuencial', payload['sequential'])
+    _sub(info_tributaria, 'dirMatriz', payload['company_address'])
+
+    info_factura = _sub(root, 'infoFactura')
+    _sub(info_factura, 'fechaEmision', payload['issue_date'])
+    _sub(info_factura, 'dirEstablecimiento', payload['company_address'])
+    _sub(info_factura, 'tipoIdentificacionComprador', buyer_id_type(payload['buyer_id']))
+    _sub(info_factura, 'razonSocialComprador', payload['buyer_name'])
+    _sub(info_factura, 'identificacionComprador', payload['buyer_id'])
+    _sub(info_factura, 'totalSinImpuestos', _money(total_base))
+    _sub(info_factura, 'totalDescuento', '0.00')
+    total_impuesto = _sub(_sub(info_factura, 'totalConImpuestos'), 'totalImpuesto')
+    _sub(total_impuesto, 'codigo', '2')  # 2 = IVA
+    _sub(total_impuesto, 'codigoPorcentaje', iva_code)
+    _sub(total_impuesto, 'baseImponible', _money(total_base))
+    _sub(total_impuesto, 'valor', _money(total_iva))
+    _sub(info_factura, 'propina', '0.00')
+    _sub(info_factura, 'importeTotal', _money(total_base + total_iva))
+    _sub(info_factura, 'moneda', 'DOLAR')
+    pago = _sub(_sub(info_factura, 'pagos'), 'pago')
+    _sub(pago, 'formaPago', DEFAULT_PAYMENT_METHOD)
+    _sub(pago, 'total', _money(total_base + total_iva))
+
+    detalles = _sub(root, 'detalles')
+    for product, quantity, unit_price, base, iva in lines:
+        detalle = _sub(detalles, 'detalle')
+        _sub(detalle, 'descripcion', product)
+        _sub(detalle, 'cantidad', quantity.quantize(SIX_PLACES, rounding=ROUND_HALF_UP))
+        _sub(detalle, 'precioUnitario', unit_price.quantize(SIX_PLACES, rounding=ROUND_HALF_UP))
+        _sub(detalle, 'descuento', '0.00')
+        _sub(detalle, 'precioTotalSinImpuesto', _money(base))
+        impuesto = _sub(_sub(detalle, 'impuestos'), 'impuesto')
+        _sub(impuesto, 'codigo', '2')
+        _sub(impuesto, 'codigoPorcentaje', iva_code)
+        _sub(impuesto, 'tarifa', _money(payload['iva_percentage']))
+        _sub(impuesto, 'baseImponible', _money(base))
+        _sub(impuesto, 'valor', _money(iva))
+
+    info_adicional = _sub(root, 'infoAdicional')
+    _sub(info_adicional, 'campoAdicional', payload['plate']).set('nombre', 'Placa')
+    if payload['seller']:
+        _sub(info_adicional, 'campoAdicional', payload['seller']).set('nombre', 'Vendedor')
+
+    xml = ET.tostring(root, encoding='unicode', xml_declaration=False)
+    xml = '<?xml version="1.0" encoding="UTF-8"?>\n' + xml
+    if xsd_path:
+        result['errors'].extend(validate_xml(xml, xsd_path))
+    result['access_key'] = access_key
+    result['xml'] = xml
+    return result
+
+
+# Esquemas XSD ya cargados en este proceso (parsear el XSD es costoso)
+_SCHEMAS = {}
+
+
+def validate_xml(xml, xsd_path):
+    """Valida el XML contra el XSD oficial del SRI (requiere lxml). Devuelve la lista de errores."""
+    from lxml import etree
+
+    schema = _SCHEMAS.get(xsd_path)
+    if schema is None:
+        schema = _SCHEMAS[xsd_path] = etree.XMLSchema(etree.parse(xsd_path))
+    document = etree.fromstring(xml.encode('utf-8'))
+    if schema.validate(document):
+        return []
+    return [f'XSD línea {error.line}: {error.message}' for error in schema.error_log]
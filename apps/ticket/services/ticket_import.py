@@ -0,0 +1,404 @@
+"""
+Importación masiva de tickets desde archivos Excel (.xlsx) o CSV.
+
+El archivo se lee como flujo (openpyxl en modo read-only o csv.reader), las filas se
+agrupan por número de documento y se validan por lotes con las mismas reglas de
+TicketForm y TicketDetailForm. Cada lote se inserta con bulk_create dentro de su propia
+transacción, por lo que la memoria usada depende del tamaño del lote y no del archivo.
+Acepta el mismo formato que genera export_tickets_excel.
+"""
+import csv
+import io
+import itertools
+import os
+import unicodedata
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from apps.ticket.forms import TicketDetailForm, TicketForm
+from apps.ticket.models import DocumentSequence, Ticket, TicketChange, TicketDetail
+
+
+# Encabezados aceptados (normalizados sin tildes y en minúsculas) -> campo interno
+COLUMN_ALIASES = {
+    'numero de ticket': 'document_number',
+    'numero de documento': 'document_number',
+    'document_number': 'document_number',
+    'fecha': 'date',
+    'date': 'date',
+    'vendedor': 'seller',
+    'seller': 'seller',
+    'telefono': 'phone',
+    'phone': 'phone',
+    'placa': 'plate',
+    'plate': 'plate',
+    'iva (%)': 'iva_percentage',
+    'iva_percentage': 'iva_percentage',
+    'producto': 'product',
+    'product': 'product',
+    'cantidad': 'quantity',
+    'quantity': 'quantity',
+    'precio unitario': 'unit_price',
+    'p. unitario': 'unit_price',
+    'unit_price': 'unit_price',
+}
+
+# Nombre de columna mostrado en el reporte de errores
+COLUMN_LABELS = {
+    'document_number': 'Número de Ticket',
+    'date': 'Fecha',
+    'seller': 'Vendedor',
+    'client': 'Cliente',
+    'ci_ruc': 'CI/RUC',
+    'phone': 'Teléfono',
+    'plate': 'Placa',
+    'iva_percentage': 'IVA (%)',
+    'product': 'Producto',
+    'quantity': 'Cantidad',
+    'unit_price': 'Precio Unitario',
+}
+
+REQUIRED_COLUMNS = ('document_number', 'plate', 'product', 'quantity', 'unit_price')
+TICKET_COLUMNS = ('seller', 'phone', 'plate')
+DETAIL_COLUMNS = ('product', 'quantity', 'unit_price')
+
+DATE_FORMATS = ('%Y-%m-%d %H:%M', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d', '%d/%m/%Y %H:%M', '%d/%m/%Y')
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class TicketImportError(Exception):
+    """Error de formato que impide procesar el archivo completo."""
+
+
+@dataclass
+class ImportRowError:
+    row: int
+    document_number: str
+    column: str
+    message: str
+
+
+@dataclass
+class ImportResult:
+    rows_read: int = 0
+    tickets_created: int = 0
+    details_created: int = 0
+    documents_rejected: int = 0
+    error_count: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def has_errors(self):
+        return self.error_count > 0
+
+
+@dataclass
+class _Document:
+    """Líneas de un mismo número de documento pendientes de validar."""
+    number: str
+    first_row: int
+    values: dict
+    lines: list = field(default_factory=list)
+
+
+def _normalize_header(value):
+    text = unicodedata.normalize('NFKD', str(value or '')).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(text.lower().split())
+
+
+def _cell_to_text(value):
+    """Convierte el valor de una celda al texto que esperan los formularios."""
+    if value is None:
+        return ''
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+def _parse_date(value):
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        text = _cell_to_text(value)
+        for date_format in DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, date_format)
+                break
+            except ValueError:
+                continue
+        else:
+            raise ValueError(text)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def iter_xlsx_rows(fileobj):
+    """Recorre la hoja activa de un .xlsx en modo read-only (sin cargar el libro en memoria)."""
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_csv_rows(fileobj):
+    """Recorre un CSV detectando el separador (',', ';' o tabulación) en la primera línea."""
+    if isinstance(fileobj, io.TextIOBase):
+        stream = fileobj
+    else:
+        stream = io.TextIOWrapper(fileobj, encoding='utf-8-sig', newline='')
+    first_line = stream.readline()
+    if not first_line:
+        return
+    try:
+        dialect = csv.Sniffer().sniff(first_line, delimiters=',;\t')
+    except csv.Error:
+        dialect = csv.excel
+    yield from csv.reader(itertools.chain([first_line], stream), dialect)
+
+
+def iter_file_rows(fileobj, filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == '.xlsx':
+        return iter_xlsx_rows(fileobj)
+    if extension == '.csv':
+        return iter_csv_rows(fileobj)
+    raise TicketImportError(f'Formato no soportado: "{extension}". Use archivos .xlsx o .csv.')
+
+
+class TicketImporter:
+    """
+    Importa tickets por lotes.
+
+    - company: compañía a la que se asignan los tickets (client/ci_ruc/IVA se toman de ella).
+    - renumber: si es True, el número del archivo solo agrupa las líneas y se asignan
+      números nuevos de la secuencia fiscal; si es False, se conservan los del archivo.
+    - dry_run: valida todo el archivo sin guardar.
+    - error_limit: máximo de errores conservados en el resultado (None = todos).
+    - on_chunk: callback opcional llamado con el ImportResult tras cada lote.
+    """
+
+    def __init__(self, company, renumber=False, dry_run=False,
+                 chunk_size=DEFAULT_CHUNK_SIZE, error_limit=None, on_chunk=None):
+        self.company = company
+        self.renumber = renumber
+        self.dry_run = dry_run
+        self.chunk_size = chunk_size
+        self.error_limit = error_limit
+        self.on_chunk = on_chunk
+        self.result = ImportResult()
+        self._seen_numbers = set()
+
+    def import_file(self, fileobj, filename):
+        return self.import_rows(iter_file_rows(fileobj, filename))
+
+    def import_rows(self, rows):
+        """Procesa un iterable de filas (la primera es el encabezado)."""
+        rows = iter(rows)
+        try:
+            header = next(rows)
+        except StopIteration:
+            raise TicketImportError('El archivo está vacío.')
+        columns = self._map_columns(header)
+
+        pending = []
+        pending_lines = 0
+        current = None
+        for row_number, row in enumerate(rows, start=2):
+            values = {name: row[index] if index < len(row) else None for name, index in columns.items()}
+            if all(value in (None, '') for value in values.values()):
+                continue
+            self.result.rows_read += 1
+
+            number = _cell_to_text(values.get('document_number'))
+            if current is None or number != current.number:
+                if current is not None:
+                    pending.append(current)
+                    if pending_lines >= self.chunk_size:
+                        self._process_chunk(pending)
+                        pending, pending_lines = [], 0
+                current = _Document(number=number, first_row=row_number, values=values)
+            current.lines.append((row_number, values))
+            pending_lines += 1
+
+        if current is not None:
+            pending.append(current)
+        if pending:
+            self._process_chunk(pending)
+        return self.result
+
+    def _map_columns(self, header):
+        columns = {}
+        for index, title in enumerate(header):
+            name = COLUMN_ALIASES.get(_normalize_header(title))
+            if name and name not in columns:
+                columns[name] = index
+        missing = [COLUMN_LABELS[name] for name in REQUIRED_COLUMNS if name not in columns]
+        if missing:
+            raise TicketImportError(f'Faltan columnas obligatorias: {", ".join(missing)}.')
+        return columns
+
+    def _add_error(self, row, document_number, column, message):
+        self.result.error_count += 1
+        if self.error_limit is None or len(self.result.errors) < self.error_limit:
+            self.result.errors.append(ImportRowError(row, document_number, COLUMN_LABELS.get(column, column), message))
+
+    def _add_form_errors(self, form, row, document_number):
+        for name, messages in form.errors.items():
+            for message in messages:
+                self._add_error(row, document_number, name, message)
+
+    def _build_document(self, document):
+        """Valida un documento y devuelve (ticket, detalles, fecha) o None si tiene errores."""
+        number = document.number
+        error_count = self.result.error_count
+
+        if not number:
+            self._add_error(document.first_row, number, 'document_number', 'El número de ticket es obligatorio.')
+        elif len(number) > 20 and not self.renumber:
+            self._add_error(document.first_row, number, 'document_number', 'El número de ticket no puede exceder 20 caracteres.')
+        elif number in self._seen_numbers:
+            self._add_error(document.first_row, number, 'document_number',
+                            'Número de ticket repetido en el archivo (las líneas de un ticket deben ser consecutivas).')
+        self._seen_numbers.add(number)
+
+        # Mismas reglas que la creación manual: client y ci_ruc vienen de la compañía
+        data = {name: _cell_to_text(document.values.get(name)) for name in TICKET_COLUMNS}
+        data['client'] = self.company.client_name
+        data['ci_ruc'] = self.company.client_ruc
+        ticket_form = TicketForm(data=data, company=self.company)
+        if not ticket_form.is_valid():
+            self._add_form_errors(ticket_form, document.first_row, number)
+
+        ticket_date = None
+        if document.values.get('date') not in (None, ''):
+            try:
+                ticket_date = _parse_date(document.values['date'])
+            except ValueError:
+                self._add_error(document.first_row, number, 'date', 'Fecha inválida.')
+
+        iva_percentage = self.company.iva_percentage
+        if document.values.get('iva_percentage') not in (None, ''):
+            iva_field = Ticket._meta.get_field('iva_percentage').formfield()
+            try:
+                iva_percentage = iva_field.clean(_cell_to_text(document.values['iva_percentage']))
+            except ValidationError as error:
+                for message in error.messages:
+                    self._add_error(document.first_row, number, 'iva_percentage', message)
+
+        details = []
+        for row_number, values in document.lines:
+            detail_form = TicketDetailForm(data={name: _cell_to_text(values.get(name)) for name in DETAIL_COLUMNS})
+            if detail_form.is_valid():
+                detail = detail_form.instance
+                # La base genera la columna; el valor en memoria solo se usa para el total del ticket
+                detail.total = detail.quantity * detail.unit_price
+                details.append(detail)
+            else:
+                self._add_form_errors(detail_form, row_number, number)
+
+        if self.result.error_count > error_count:
+            self.result.documents_rejected += 1
+            return None
+
+        ticket = ticket_form.instance
+        ticket.company = self.company
+        ticket.iva_percentage = iva_percentage
+        ticket.document_number = number
+        subtotal = sum(detail.total for detail in details)
+        ticket.total = subtotal + subtotal * (iva_percentage / 100)
+        return ticket, details, ticket_date
+
+    def _reject_existing(self, built):
+        """Descarta documentos cuyo número ya existe en la base (una consulta por lote)."""
+        numbers = [document.number for document, _ in built]
+        existing = set(
+            Ticket.objects
+            .filter(company=self.company, document_number__in=numbers)
+            .values_list('document_number', flat=True)
+        )
+        if not existing:
+            return built
+        accepted = []
+        for document, entry in built:
+            if document.number in existing:
+                self._add_error(document.first_row, document.number, 'document_number',
+                                'Ya existe un ticket con este número.')
+                self.result.documents_rejected += 1
+            else:
+                accepted.append((document, entry))
+        return accepted
+
+    def _process_chunk(self, documents):
+        built = []
+        for document in documents:
+            entry = self._build_document(document)
+            if entry is not None:
+                built.append((document, entry))
+        if built and not self.renumber:
+            built = self._reject_existing(built)
+        if built and not self.dry_run:
+            self._insert(built)
+        if self.on_chunk:
+            self.on_chunk(self.result)
+
+    def _insert(self, built):
+        entries = [entry for _, entry in built]
+        try:
+            with transaction.atomic():
+                if self.renumber:
+                    numbers = Ticket.reserve_document_numbers(self.company.pk, len(entries))
+                    for (ticket, _, _), number in zip(entries, numbers):
+                        ticket.document_number = number
+                else:
+                    # Los números importados no se vuelven a emitir en la secuencia de la compañía
+                    numeric = [
+                        int(ticket.document_number) for ticket, _, _ in entries
+                        if ticket.document_number.isascii() and ticket.document_number.isdigit()
+                    ]
+                    if numeric:
+                        DocumentSequence.advance_to(self.company.pk, max(numeric))
+
+                tickets = Ticket.objects.bulk_create([ticket for ticket, _, _ in entries])
+
+                # bulk_create aplica auto_now_add: restaurar las fechas históricas en un solo UPDATE
+                dated = []
+                for ticket, (_, _, ticket_date) in zip(tickets, entries):
+                    if ticket_date:
+                        ticket.date = ticket_date
+                        dated.append(When(pk=ticket.pk, then=Value(ticket_date)))
+                if dated:
+                    Ticket.objects.filter(pk__in=[ticket.pk for ticket in tickets]).update(
+                        date=Case(*dated, default='date', output_field=DateTimeField())
+                    )
+
+                details = []
+                for ticket, (_, ticket_details, _) in zip(tickets, entries):
+                    for detail in ticket_details:
+                        detail.ticket = ticket
+                        detail.ticket_date = ticket.date
+                        details.append(detail)
+                TicketDetail.objects.bulk_create(details)
+
+                # Feed de cambios: un INSERT por lote en la misma transacción
+                TicketChange.record_many(tickets, TicketChange.ACTION_INSERT)
+                TicketChange.record_many(details, TicketChange.ACTION_INSERT)
+        except IntegrityError:
+            # Otro proceso insertó uno de los números entre la verificación y el insert
+            for document, _ in built:
+                self._add_error(document.first_row, document.number, 'document_number',
+                                'Lote rechazado por un número de ticket duplicado. Vuelva a importar estas filas.')
+            self.result.documents_rejected += len(built)
+            return
+
+        self.result.tickets_created += len(tickets)
+        self.result.details_created += len(details)
@@ -0,0 +1,73 @@
+"""
+Recálculo por lotes del total de los tickets (cambios de tarifa de IVA y reparaciones de datos).
+
+Los tickets se recorren por rangos de id; cada rango se corrige con un UPDATE que calcula
+el total en SQL (Ticket.computed_total) y solo toca las filas que difieren. Las mismas
+expresiones sirven para el modo de prueba (diferencias sin escribir) y la verificación.
+"""
+from django.db.models import Count, F, Max, Min, Q, Sum
+
+from apps.ticket.models import Ticket
+
+DEFAULT_CHUNK_SIZE = 10_000
+
+
+class TotalRecalculator:
+    """
+    Recalcula los totales del queryset. Con iva_percentage además reemplaza la tarifa de IVA
+    guardada. on_chunk(recalculator, last_id) se llama después de cada rango.
+    """
+
+    def __init__(self, queryset=None, iva_percentage=None, chunk_size=DEFAULT_CHUNK_SIZE,
+                 record_changes=True, on_chunk=None):
+        self.queryset = Ticket.objects.all() if queryset is None else queryset
+        self.iva_percentage = iva_percentage
+        self.chunk_size = chunk_size
+        self.record_changes = record_changes
+        self.on_chunk = on_chunk
+        self.checked = 0
+        self.mismatched = 0
+        self.difference = 0
+        self.updated = 0
+        self.samples = []
+
+    def chunks(self):
+        """Querysets por rango de id [inicio, inicio + chunk_size)."""
+        bounds = self.queryset.aggregate(first=Min('pk'), last=Max('pk'))
+        if bounds['first'] is None:
+            return
+        for start in range(bounds['first'], bounds['last'] + 1, self.chunk_size):
+            yield start + self.chunk_size - 1, self.queryset.filter(pk__gte=start, pk__lt=start + self.chunk_size)
+
+    def mismatches(self, queryset):
+        stale = ~Q(total=F('computed_total'))
+        if self.iva_percentage is not None:
+            stale |= ~Q(iva_percentage=self.iva_percentage)
+        return queryset.annotate(computed_total=Ticket.computed_total(self.iva_percentage)).filter(stale)
+
+    def diff(self, sample_size=20):
+        """Sin escribir: cuenta los tickets que cambiarían y la diferencia total (computed - stored)."""
+        for last_id, chunk in self.chunks():
+            mismatches = self.mismatches(chunk)
+            summary = mismatches.aggregate(count=Count('pk'), difference=Sum(F('computed_total') - F('total')))
+            self.checked += chunk.count()
+            self.mismatched += summary['count']
+            self.difference += summary['difference'] or 0
+            if summary['count'] and len(self.samples) < sample_size:
+                self.samples.extend(
+                    mismatches.order_by('pk').values('pk', 'document_number', 'iva_percentage', 'total', 'computed_total')
+                    [:sample_size - len(self.samples)]
+                )
+            if self.on_chunk:
+                self.on_chunk(self, last_id)
+        return self
+
+    def apply(self):
+        """Corrige cada rango con un UPDATE (más la lectura de ids si se registran los cambios)."""
+        for last_id, chunk in self.chunks():
+            self.updated += Ticket.refresh_totals(
+                chunk, iva_percentage=self.iva_percentage, record_changes=self.record_changes
+            )
+            if self.on_chunk:
+                self.on_chunk(self, last_id)
+        return self
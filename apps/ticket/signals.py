@@ -0,0 +1,47 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.ticket.models import Ticket, TicketChange, TicketDetail
+from apps.ticket.services.pdf import discard_ticket_pdfs
+from apps.ticket.services.plate_history import invalidate_plate_history
+
+
+@receiver(post_delete, sender=Ticket)
+def record_ticket_delete(sender, instance, **kwargs):
+    """
+    Registra la eliminación de tickets, incluidas las que vienen en cascada desde la compañía.
+    post_delete se envía dentro de la transacción del Collector. No se registra un receptor
+    para TicketDetail para no impedir el borrado rápido de detalles en cascada.
+    """
+    TicketChange.record(instance, TicketChange.ACTION_DELETE)
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def invalidate_ticket_plate_history(sender, instance, **kwargs):
+    # Después del commit, para que otra petición no vuelva a cachear la versión anterior
+    plates = {(instance.company_id, instance.plate)}
+    # Placa con la que se leyó el ticket (Ticket.from_db), sin consultarla de nuevo
+    previous = getattr(instance, 'loaded_plate', None)
+    if previous and previous[1] is not None:
+        plates.add(previous)
+    instance.loaded_plate = (instance.company_id, instance.plate)
+    transaction.on_commit(lambda: [invalidate_plate_history(company_id, plate) for company_id, plate in plates])
+
+
+@receiver(post_save, sender=TicketDetail)
+def invalidate_detail_plate_history(sender, instance, **kwargs):
+    # Solo si el ticket ya está cargado; las vistas guardan el total del ticket después de los detalles
+    if TicketDetail.ticket.is_cached(instance):
+        company_id, plate = instance.ticket.company_id, instance.ticket.plate
+        transaction.on_commit(lambda: invalidate_plate_history(company_id, plate))
+
+
+@receiver(post_save, sender=Ticket)
+@receiver(post_delete, sender=Ticket)
+def discard_ticket_pdf_cache(sender, instance, created=False, **kwargs):
+    # El nombre del PDF ya cambia con la versión; esto solo libera los archivos viejos
+    if not created:
+        ticket_id = instance.pk
+        transaction.on_commit(lambda: discard_ticket_pdfs([ticket_id]))
@@ -1,3 +1,87 @@
-from django.test import TestCase
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone as dt_timezone
+from types import SimpleNamespace
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+from apps.ticket.services.dispenser import match_sales
+from apps.ticket.services.sri_xml import SriDocumentError, build_access_key, mod11_check_digit
+
+
+START = datetime(2026, 10, 19, 8, 0, tzinfo=dt_timezone.utc)
+
+
+def at(minutes):
+    return START + timedelta(minutes=minutes)
+
+
+def assignment(pump, minutes):
+    return SimpleNamespace(pump=pump, created_at=at(minutes))
+
+
+def sale(pump, minutes):
+    return SimpleNamespace(pump=pump, dispensed_at=at(minutes))
+
+
+def open_assignments(*assignments):
+    by_pump = defaultdict(deque)
+    for item in assignments:
+        by_pump[item.pump].append(item)
+    return by_pump
+
+
+class MatchSalesTests(SimpleTestCase):
+    def test_matches_oldest_assignment_registered_before_the_sale(self):
+        first, second = assignment(1, 0), assignment(1, 1)
+        sales = [sale(1, 2), sale(1, 3)]
+        matched, unmatched, expired = match_sales(sales, open_assignments(first, second), window=15)
+        self.assertEqual(matched, [(sales[0], first), (sales[1], second)])
+        self.assertEqual((unmatched, expired), ([], []))
+
+    def test_sale_before_every_assignment_is_unmatched(self):
+        later = assignment(1, 5)
+        early = sale(1, 2)
+        matched, unmatched, expired = match_sales([early], open_assignments(later), window=15)
+        self.assertEqual((matched, unmatched, expired), ([], [early], []))
+
+    def test_assignment_outside_the_window_expires(self):
+        stale, fresh = assignment(1, 0), assignment(1, 20)
+        current = sale(1, 25)
+        matched, unmatched, expired = match_sales([current], open_assignments(stale, fresh), window=15)
+        self.assertEqual(matched, [(current, fresh)])
+        self.assertEqual((unmatched, expired), ([], [stale]))
+
+    def test_sale_without_candidates_stays_pending(self):
+        stale = assignment(1, 0)
+        current = sale(1, 30)
+        matched, unmatched, expired = match_sales([current], open_assignments(stale), window=15)
+        self.assertEqual((matched, unmatched, expired), ([], [], [stale]))
+
+    def test_pumps_are_matched_independently(self):
+        pump_one, pump_two = assignment(1, 0), assignment(2, 0)
+        sales = [sale(2, 1), sale(1, 2)]
+        matched, _, _ = match_sales(sales, open_assignments(pump_one, pump_two), window=15)
+        self.assertEqual(matched, [(sales[0], pump_two), (sales[1], pump_one)])
+
+
+class AccessKeyTests(SimpleTestCase):
+    # Clave de la ficha técnica de comprobantes electrónicos del SRI
+    SAMPLE_KEY = '2110201101179214673900110020010000000011234567813'
+
+    def test_builds_published_sample_key(self):
+        key = build_access_key('21102011', '01', '1792146739001', '1', '002', '001', '000000001', '12345678')
+        self.assertEqual(key, self.SAMPLE_KEY)
+
+    def test_check_digit_of_published_sample(self):
+        self.assertEqual(mod11_check_digit(self.SAMPLE_KEY[:48]), self.SAMPLE_KEY[48])
+
+    def test_check_digit_ten_becomes_one(self):
+        self.assertEqual(mod11_check_digit('0' * 47 + '6'), '1')
+
+    def test_check_digit_eleven_becomes_zero(self):
+        self.assertEqual(mod11_check_digit('0' * 48), '0')
+        self.assertEqual(mod11_check_digit('0' * 46 + '14'), '0')
+
+    def test_rejects_part_with_wrong_length(self):
+        with self.assertRaises(SriDocumentError):
+            build_access_key('2110201', '01', '1792146739001', '1', '002', '001', '000000001', '12345678')
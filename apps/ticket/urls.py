@@ -1,8 +1,14 @@
 from django.urls import path
 from apps.ticket.view.ticket_view import (
     TicketListView, TicketDetailView, TicketCreateView,
-    TicketUpdateView, TicketDeleteView, TicketPrintView, TicketMassPrintView, export_tickets_excel
+    TicketUpdateView, TicketDeleteView, TicketPrintView, TicketMassPrintView, TicketImportView, export_tickets_excel,
+    ticket_changes, ticket_plate_history, ArchivedTicketListView, ArchivedTicketDetailView, outbox_metrics
 )
+from apps.ticket.view.report_view import TicketReportView, export_report_csv
+from apps.ticket.view.dispenser_view import PumpAssignmentCreateView, dispenser_metrics
+from apps.ticket.view.live_view import ticket_stream
+from apps.ticket.view.api_view import api_ticket_list, api_ticket_detail
+from apps.ticket.view.pdf_view import ticket_mass_pdf, ticket_pdf
 
 app_name = 'ticket'
 
@@ -13,6 +19,21 @@ urlpatterns = [
     path('<int:pk>/editar/', TicketUpdateView.as_view(), name='ticket_update'),
     path('<int:pk>/eliminar/', TicketDeleteView.as_view(), name='ticket_delete'),
     path('<int:pk>/imprimir/', TicketPrintView.as_view(), name='ticket_print'),
+    path('<int:pk>/pdf/', ticket_pdf, name='ticket_pdf'),
     path('imprimir-masa/', TicketMassPrintView.as_view(), name='ticket_mass_print'),
+    path('imprimir-masa/pdf/', ticket_mass_pdf, name='ticket_mass_pdf'),
     path('exportar-excel/', export_tickets_excel, name='ticket_export_excel'),
+    path('importar/', TicketImportView.as_view(), name='ticket_import'),
+    path('changes/', ticket_changes, name='ticket_changes'),
+    path('stream/', ticket_stream, name='ticket_stream'),
+    path('api/tickets/', api_ticket_list, name='api_ticket_list'),
+    path('api/tickets/<int:pk>/', api_ticket_detail, name='api_ticket_detail'),
+    path('outbox/metrics/', outbox_metrics, name='outbox_metrics'),
+    path('placa/', ticket_plate_history, name='ticket_plate_history'),
+    path('reportes/', TicketReportView.as_view(), name='ticket_report'),
+    path('reportes/exportar-csv/', export_report_csv, name='ticket_report_csv'),
+    path('archivo/', ArchivedTicketListView.as_view(), name='archived_ticket_list'),
+    path('archivo/<int:pk>/', ArchivedTicketDetailView.as_view(), name='archived_ticket_detail'),
+    path('surtidores/', PumpAssignmentCreateView.as_view(), name='pump_assignment'),
+    path('surtidores/metrics/', dispenser_metrics, name='dispenser_metrics'),
 ]
\ No newline at end of file
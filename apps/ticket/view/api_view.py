@@ -0,0 +1,173 @@
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db.models import Q
+from django.http import JsonResponse
+from django.utils.dateparse import parse_datetime
+from django.views.decorators.http import require_GET
+
+from apps.company.models import Company
+from apps.core.api import (
+    ApiError, conditional_json, decode_cursor, encode_cursor, error_response, make_version_etag,
+    parse_fields, parse_limit, pick,
+)
+from apps.core.conditional import make_etag
+from apps.ticket.models import Ticket, TicketDetail
+from apps.ticket.services.plate_history import normalize_plate
+from apps.ticket.services.reports import get_data_version, start_of_day
+
+# Nombre público -> ruta del ORM
+TICKET_FIELDS = {
+    'id': 'id',
+    'document_number': 'document_number',
+    'date': 'date',
+    'seller': 'seller',
+    'client': 'client',
+    'ci_ruc': 'ci_ruc',
+    'phone': 'phone',
+    'plate': 'plate',
+    'iva_percentage': 'iva_percentage',
+    'total': 'total',
+    'updated_at': 'updated_at',
+    'version': 'version',
+    'company': 'company_id',
+    'company_name': 'company__name',
+}
+DEFAULT_TICKET_FIELDS = ('id', 'document_number', 'date', 'seller', 'plate', 'total')
+
+DETAIL_FIELDS = {
+    'id': 'id',
+    'product': 'product',
+    'quantity': 'quantity',
+    'unit_price': 'unit_price',
+    'total': 'total',
+    'catalog_product': 'catalog_product_id',
+}
+DEFAULT_DETAIL_FIELDS = ('product', 'quantity', 'unit_price', 'total')
+
+
+def parse_ticket_filters(params):
+    """
+    Filtros sobre columnas indexadas junto con la compañía: rango de fechas
+    (ticket_company_date_idx), vendedor exacto (ticket_company_seller_date_idx) y placa
+    exacta (ticket_company_plate_date_idx).
+    """
+    filters = {}
+    try:
+        if params.get('date_from'):
+            filters['date__gte'] = start_of_day(date.fromisoformat(params['date_from']))
+        if params.get('date_to'):
+            filters['date__lt'] = start_of_day(date.fromisoformat(params['date_to']) + timedelta(days=1))
+    except ValueError:
+        raise ApiError('date_from y date_to deben tener el formato AAAA-MM-DD.')
+    if params.get('seller'):
+        filters['seller'] = params['seller'].strip()
+    if params.get('plate'):
+        filters['plate'] = normalize_plate(params['plate'])
+    return filters
+
+
+def parse_ticket_cursor(value):
+    """Cursor (fecha, id) del último ticket entregado; el orden es -date, -id."""
+    position = decode_cursor(value)
+    if not isinstance(position, list) or len(position) != 2:
+        raise ApiError('cursor inválido.')
+    cursor_date = parse_datetime(str(position[0]))
+    if cursor_date is None or not isinstance(position[1], int):
+        raise ApiError('cursor inválido.')
+    return Q(date__lt=cursor_date) | Q(date=cursor_date, id__lt=position[1])
+
+
+def load_details(ticket_ids, fields):
+    """Detalles de todos los tickets con una sola consulta, agrupados por ticket."""
+    paths = [DETAIL_FIELDS[name] for name in fields]
+    rows = (
+        TicketDetail.objects
+        .filter(ticket_id__in=ticket_ids)
+        .order_by('ticket_id', 'id')
+        .values('ticket_id', *paths)
+    )
+    details = defaultdict(list)
+    for row in rows:
+        details[row['ticket_id']].append(pick(row, fields, DETAIL_FIELDS))
+    return details
+
+
+def parse_detail_fields(params):
+    return parse_fields(params.get('detail_fields'), DETAIL_FIELDS, DEFAULT_DETAIL_FIELDS)
+
+
+def company_not_found():
+    return JsonResponse({'error': 'Compañía no encontrada.'}, status=404)
+
+
+@require_GET
+def api_ticket_list(request):
+    """
+    Tickets de la compañía activa (cabecera X-Company-Id) en JSON, del más reciente al más
+    antiguo. Parámetros: fields, include=details, detail_fields, date_from, date_to, seller, plate,
+    limit y cursor (next_cursor de la página anterior).
+    """
+    try:
+        fields = parse_fields(request.GET.get('fields'), TICKET_FIELDS, DEFAULT_TICKET_FIELDS)
+        with_details = request.GET.get('include') == 'details'
+        detail_fields = parse_detail_fields(request.GET) if with_details else ()
+        limit = parse_limit(request.GET.get('limit'))
+        filters = parse_ticket_filters(request.GET)
+        cursor = parse_ticket_cursor(request.GET['cursor']) if request.GET.get('cursor') else None
+    except ApiError as error:
+        return error_response(error)
+    company = request.company
+    if not company:
+        return company_not_found()
+
+    # Versión barata: último cambio de tickets y, si se pide el nombre, el listado de compañías
+    version = get_data_version()
+    if 'company_name' in fields:
+        version = f'{version}:{Company.get_list_version()}'
+    etag = make_version_etag(version, company.pk, request.path, request.GET.urlencode())
+
+    def build():
+        queryset = Ticket.objects.filter(company_id=company.pk, **filters)
+        if cursor is not None:
+            queryset = queryset.filter(cursor)
+        paths = {'id', 'date', *(TICKET_FIELDS[name] for name in fields)}
+        rows = list(queryset.order_by('-date', '-id').values(*paths)[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        results = [pick(row, fields, TICKET_FIELDS) for row in rows]
+        if with_details:
+            details = load_details([row['id'] for row in rows], detail_fields)
+            for row, result in zip(rows, results):
+                result['details'] = details.get(row['id'], [])
+        next_cursor = encode_cursor(rows[-1]['date'].isoformat(), rows[-1]['id']) if has_more else None
+        return {'results': results, 'next_cursor': next_cursor, 'has_more': has_more}
+
+    return conditional_json(request, etag, build)
+
+
+@require_GET
+def api_ticket_detail(request, pk):
+    """Un ticket de la compañía activa en JSON con sus detalles. Parámetros: fields y detail_fields."""
+    try:
+        fields = parse_fields(request.GET.get('fields'), TICKET_FIELDS, DEFAULT_TICKET_FIELDS)
+        detail_fields = parse_detail_fields(request.GET)
+    except ApiError as error:
+        return error_response(error)
+
+    company = request.company
+    if not company:
+        return company_not_found()
+    last_modified = Ticket.get_last_modified(pk, company.pk)
+    if last_modified is None:
+        return JsonResponse({'error': 'Ticket no encontrado.'}, status=404)
+    etag = make_etag(last_modified, 'api', ','.join(fields), ','.join(detail_fields))
+
+    def build():
+        row = Ticket.objects.filter(pk=pk).values(*{TICKET_FIELDS[name] for name in fields}).first()
+        result = pick(row, fields, TICKET_FIELDS)
+        result['details'] = load_details([pk], detail_fields).get(pk, [])
+        return result
+
+    return conditional_json(request, etag, build, last_modified)
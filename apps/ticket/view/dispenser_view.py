@@ -0,0 +1,89 @@
+from django.contrib import messages
+from django.http import HttpResponse
+from django.shortcuts import redirect
+from django.urls import reverse_lazy
+from django.views.decorators.http import require_GET
+from django.views.generic import CreateView
+from apps.ticket.forms import PumpAssignmentForm
+from apps.ticket.models import DispenserSale, PumpAssignment
+from apps.ticket.services.dispenser import get_metrics
+
+RECENT_SALES_LIMIT = 20
+
+
+class PumpAssignmentCreateView(CreateView):
+    """
+    Registro en la isla de la placa y el vendedor para la próxima venta de un surtidor de la
+    compañía activa. Muestra sus asignaciones abiertas y las últimas ventas recibidas.
+    """
+    model = PumpAssignment
+    form_class = PumpAssignmentForm
+    template_name = 'ticket/pump_assignment_form.html'
+    success_url = reverse_lazy('ticket:pump_assignment')
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.company:
+            messages.warning(request, 'Debe crear al menos una compañía antes de asignar surtidores.')
+            return redirect('company:company_list')
+        return super().dispatch(request, *args, **kwargs)
+
+    def form_valid(self, form):
+        form.instance.company = self.request.company
+        response = super().form_valid(form)
+        messages.success(
+            self.request,
+            f'Placa {self.object.plate} asignada al surtidor {self.object.pump}.'
+        )
+        return response
+
+    def form_invalid(self, form):
+        messages.error(self.request, 'Error al asignar la placa. Verifique los datos.')
+        return super().form_invalid(form)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        company = self.request.company
+        context['open_assignments'] = (
+            PumpAssignment.objects.filter(company=company, consumed_at__isnull=True).order_by('pump', 'created_at')
+        )
+        context['recent_sales'] = (
+            DispenserSale.objects.filter(company=company).select_related('ticket').order_by('-received_at')[:RECENT_SALES_LIMIT]
+        )
+        context['metrics'] = get_metrics(company.pk)
+        # Breadcrumbs
+        context['breadcrumb_list'] = [
+            {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
+            {'label': 'Tickets', 'url': reverse_lazy('ticket:ticket_list')},
+            {'label': 'Surtidores'}
+        ]
+        return context
+
+
+@require_GET
+def dispenser_metrics(request):
+    """
+    Métricas de la ingesta de surtidores de la compañía activa en formato de texto de
+    Prometheus: backlog de ventas pendientes, ventas sin asignación y latencia de venta a ticket.
+    """
+    if not request.company:
+        return HttpResponse(status=404)
+    metrics = get_metrics(request.company.pk)
+    lines = [
+        '# HELP ticket_dispenser_pending_sales Ventas recibidas que esperan ticket.',
+        '# TYPE ticket_dispenser_pending_sales gauge',
+        f'ticket_dispenser_pending_sales {metrics["pending"]}',
+        '# HELP ticket_dispenser_unmatched_sales Ventas que vencieron sin asignación de placa.',
+        '# TYPE ticket_dispenser_unmatched_sales gauge',
+        f'ticket_dispenser_unmatched_sales {metrics["unmatched"]}',
+        '# HELP ticket_dispenser_backlog_seconds Antigüedad de la venta pendiente más vieja.',
+        '# TYPE ticket_dispenser_backlog_seconds gauge',
+        f'ticket_dispenser_backlog_seconds {metrics["backlog_seconds"]:.3f}',
+        '# HELP ticket_dispenser_latency_seconds Latencia de venta a ticket en los últimos 5 minutos.',
+        '# TYPE ticket_dispenser_latency_seconds gauge',
+        f'ticket_dispenser_latency_seconds{{stat="avg"}} {metrics["latency_avg_seconds"]:.3f}',
+        f'ticket_dispenser_latency_seconds{{stat="max"}} {metrics["latency_max_seconds"]:.3f}',
+        '# HELP ticket_dispenser_recent_tickets Tickets creados desde surtidores en los últimos 5 minutos.',
+        '# TYPE ticket_dispenser_recent_tickets gauge',
+        f'ticket_dispenser_recent_tickets {metrics["ticketed_recent"]}',
+    ]
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,46 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
+
+from apps.ticket.services.live import HEARTBEAT_SECONDS, broadcaster, client_event, format_event, get_counters
+
+
+@require_GET
+async def ticket_stream(request):
+    """
+    Stream SSE de cambios de tickets de la compañía activa (eventos ticket y counters) para
+    el dashboard y el listado. Cada conexión solo espera en su cola: las consultas las hace
+    el broadcaster del proceso una vez por cambio. Requiere servir la aplicación por ASGI.
+    """
+    company = await sync_to_async(lambda: request.company.pk if request.company else None)()
+    if company is None:
+        return HttpResponse(status=204)
+    client = await broadcaster.subscribe()
+    counters = await sync_to_async(get_counters)(company)
+
+    async def events():
+        try:
+            yield 'retry: 5000\n\n'
+            yield format_event({'event': 'counters', 'data': counters})
+            while True:
+                try:
+                    event = await asyncio.wait_for(client.get(), HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    # Mantiene viva la conexión a través de nginx y proxies
+                    yield ': ping\n\n'
+                    continue
+                if event is None:
+                    yield format_event({'event': 'reload', 'data': {}})
+                    return
+                event = client_event(event, company)
+                if event is not None:
+                    yield format_event(event)
+        finally:
+            broadcaster.unsubscribe(client)
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,77 @@
+import tempfile
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date, quote_etag
+from django.views.decorators.http import require_GET
+
+from apps.company.tenancy import for_company
+from apps.core.conditional import make_etag
+from apps.ticket.models import Ticket
+from apps.ticket.services.pdf import PdfRenderError, get_ticket_pdf, normalize_size, render_batch
+from apps.ticket.view.ticket_view import filter_print_range
+
+
+@require_GET
+def ticket_pdf(request, pk):
+    """
+    PDF del ticket generado en el servidor (?size=58|80|half|A4). Las reimpresiones salen del
+    archivo en caché; responde 304 si el navegador ya tiene esta versión.
+    """
+    size = normalize_size(request.GET.get('size', 'half'))
+    company_id = getattr(request.company, 'pk', None)
+    last_modified = Ticket.get_last_modified(pk, company_id) if company_id else None
+    if last_modified is None:
+        raise Http404('Ticket no encontrado.')
+
+    etag = quote_etag(make_etag(last_modified, 'pdf', size))
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is None:
+        try:
+            path = get_ticket_pdf(pk, size, company_id)
+        except Ticket.DoesNotExist:
+            raise Http404('Ticket no encontrado.')
+        except PdfRenderError as error:
+            return HttpResponse(str(error), status=503, content_type='text/plain; charset=utf-8')
+        response = FileResponse(open(path, 'rb'), content_type='application/pdf', filename=f'ticket-{pk}-{size}.pdf')
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@require_GET
+def ticket_mass_pdf(request):
+    """
+    Un solo PDF con los tickets del rango de la impresión en masa (date_from, date_to y size).
+    Los PDF que no están en caché se generan en paralelo (TICKET_PDF_WORKERS procesos).
+    El rango es obligatorio y hasta TICKET_PDF_WEB_LIMIT tickets: la petición espera toda la
+    generación, así que los lotes grandes se dejan al comando render_ticket_pdfs.
+    """
+    size = normalize_size(request.GET.get('size', 'half'))
+    try:
+        date_from = parse_date(request.GET.get('date_from') or '')
+        date_to = parse_date(request.GET.get('date_to') or '')
+    except ValueError:
+        date_from = date_to = None
+    if not date_from or not date_to:
+        return HttpResponse('Indique el rango de fechas (date_from y date_to).', status=400, content_type='text/plain; charset=utf-8')
+    limit = settings.TICKET_PDF_WEB_LIMIT
+    tickets = filter_print_range(for_company(Ticket.objects, request.company), request.GET)
+    ticket_ids = list(tickets.order_by('-date').values_list('pk', flat=True)[:limit + 1])
+    if len(ticket_ids) > limit:
+        return HttpResponse(
+            f'El rango tiene más de {limit} tickets. Acótelo o genere el PDF con el comando render_ticket_pdfs.',
+            status=400, content_type='text/plain; charset=utf-8',
+        )
+    # En memoria hasta 10 MB; más grande pasa a disco
+    output = tempfile.SpooledTemporaryFile(max_size=10 * 1024 * 1024)
+    try:
+        render_batch(ticket_ids, size, output, settings.TICKET_PDF_WORKERS)
+    except PdfRenderError as error:
+        output.close()
+        return HttpResponse(str(error), status=503, content_type='text/plain; charset=utf-8')
+    output.seek(0)
+    return FileResponse(output, content_type='application/pdf', filename=f'tickets-{size}.pdf')
@@ -0,0 +1,65 @@
+from django.http import HttpResponse
+from django.urls import reverse_lazy
+from django.utils import timezone
+from django.utils.http import urlencode
+from django.views.decorators.http import require_GET
+from django.views.generic import TemplateView
+from apps.ticket.forms import TicketReportForm
+
+REPORT_DISPLAY_LIMIT = 500
+
+
+def get_report_form(request):
+    """Formulario de filtros ligado a la query string; sin parámetros, ventas por día del mes actual."""
+    data = request.GET
+    if not data:
+        today = timezone.localdate()
+        data = {'report': 'day', 'date_from': today.replace(day=1).isoformat(), 'date_to': today.isoformat()}
+    return TicketReportForm(data)
+
+
+class TicketReportView(TemplateView):
+    """
+    Vista de reportes de ventas agregados (por período, vendedor, producto o placa).
+    """
+    template_name = 'ticket/ticket_report.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        form = get_report_form(self.request)
+        context['form'] = form
+
+        if form.is_valid() and self.request.company:
+            report = form.get_report(self.request.company)
+            rows = report.get_rows()
+            context['report'] = report
+            context['rows'] = rows[:REPORT_DISPLAY_LIMIT]
+            context['row_count'] = len(rows)
+            context['display_limit'] = REPORT_DISPLAY_LIMIT
+            context['totals'] = report.get_totals(rows)
+            context['export_query'] = urlencode(form.data, doseq=True)
+
+        # Breadcrumbs
+        context['breadcrumb_list'] = [
+            {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
+            {'label': 'Tickets', 'url': reverse_lazy('ticket:ticket_list')},
+            {'label': 'Reportes'}
+        ]
+        return context
+
+
+@require_GET
+def export_report_csv(request):
+    """
+    Exporta el reporte con los mismos filtros de la vista (todas las filas) a CSV.
+    """
+    form = get_report_form(request)
+    if not form.is_valid() or not request.company:
+        return HttpResponse('Parámetros de reporte inválidos.', status=400, content_type='text/plain; charset=utf-8')
+    report = form.get_report(request.company)
+    response = HttpResponse(content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename=reporte_{report.dimension}.csv'
+    # BOM para que Excel reconozca UTF-8
+    response.write('\ufeff')
+    report.write_csv(response)
+    return response
@@ -1,22 +1,41 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.urls import reverse, reverse_lazy
-from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView, FormView
 from django.contrib import messages
-from django.forms import modelformset_factory
 from django.db import transaction
-from django.http import HttpResponse
-from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill
-from apps.ticket.models import Ticket, TicketDetail
-from apps.ticket.forms import TicketForm, TicketDetailForm
-
-
-class TicketListView(ListView):
+from django.http import HttpResponse, JsonResponse
+from django.conf import settings
+from django.utils.dateparse import parse_date
+from django.views.decorators.http import require_GET
+from datetime import timedelta
+from urllib.parse import urlencode
+from apps.company.models import Company
+from apps.company.tenancy import CompanyScopedMixin, company_cache_key, for_company
+from apps.core.conditional import ConditionalGetMixin
+from apps.core.fragments import FragmentListMixin
+from apps.ticket.models import (
+    ArchivedTicket, OutboxEvent, Ticket, TicketChange, TicketDetail, TicketVersionConflict
+)
+from apps.ticket.forms import (
+    TicketForm, TicketImportForm, TicketDetailCreateFormSet, TicketDetailUpdateFormSet
+)
+from apps.ticket.services.outbox import get_metrics as get_outbox_metrics
+from apps.ticket.services.plate_history import (
+    HISTORY_DEFAULT_LIMIT, HISTORY_MAX_LIMIT, get_last_ticket, get_plate_history, normalize_plate
+)
+from apps.ticket.services.purge import read_archived_ticket
+from apps.ticket.services.reports import get_data_version, start_of_day
+from apps.ticket.services.ticket_import import TicketImporter, TicketImportError
+
+
+class TicketListView(CompanyScopedMixin, FragmentListMixin, ListView):
     """
     Vista para listar tickets con filtros y búsqueda.
+    Por XHR devuelve solo la tabla y la paginación (ver apps.core.fragments).
     """
     model = Ticket
     template_name = 'ticket/ticket_list.html'
+    fragment_template_name = 'fragments/ticket_list_results.html'
     context_object_name = 'tickets'
     paginate_by = 10
 
@@ -36,25 +55,33 @@ class TicketListView(ListView):
             )
         return queryset.order_by('-date')
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context['sellers'] = Ticket.objects.exclude(seller__isnull=True).exclude(seller='').values_list('seller', flat=True).distinct().order_by('seller')
-        # Breadcrumbs
-        context['breadcrumb_list'] = [
-            {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
-            {'label': 'Tickets'}
-        ]
-        return context
+    def get_fragment_version(self):
+        # El listado muestra el nombre de la compañía además de los datos del ticket
+        return company_cache_key(getattr(self.request.company, 'pk', None), get_data_version(), Company.get_list_version())
+
+    def get_layout_context(self):
+        return {
+            'sellers': for_company(Ticket.objects, self.request.company).exclude(seller__isnull=True).exclude(seller='').values_list('seller', flat=True).distinct().order_by('seller'),
+            # Breadcrumbs
+            'breadcrumb_list': [
+                {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
+                {'label': 'Tickets'}
+            ],
+        }
 
 
-class TicketDetailView(DetailView):
+class TicketDetailView(CompanyScopedMixin, ConditionalGetMixin, DetailView):
     """
     Vista para ver detalles de un ticket específico.
+    Responde 304 si el navegador ya tiene la versión actual del ticket.
     """
     model = Ticket
     template_name = 'ticket/ticket_detail.html'
     context_object_name = 'ticket'
 
+    def get_last_modified(self):
+        return Ticket.get_last_modified(self.kwargs['pk'], getattr(self.request.company, 'pk', None))
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['details'] = self.object.details.all()
@@ -76,35 +103,49 @@ class TicketCreateView(CreateView):
     template_name = 'ticket/ticket_form.html'
     success_url = reverse_lazy('ticket:ticket_list')
 
-    def get(self, request, *args, **kwargs):
-        from apps.company.models import Company
-        if not Company.objects.exists():
+    def dispatch(self, request, *args, **kwargs):
+        if not request.company:
             messages.warning(request, 'Debe crear al menos una compañía antes de crear tickets.')
             return redirect('company:company_list')
-        return super().get(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['company'] = self.request.company
+        return kwargs
+
+    def get_repeat_source(self):
+        """
+        Último ticket de la placa indicada en ?repeat= para precargar el formulario.
+        Sale del historial en caché, así que repetir no cuesta consultas extra.
+        """
+        if not hasattr(self, 'repeat_source'):
+            plate = normalize_plate(self.request.GET.get('repeat'))
+            self.repeat_source = None
+            if plate and self.request.method == 'GET':
+                self.repeat_source = get_last_ticket(self.request.company.pk, plate)
+                if self.repeat_source is None:
+                    messages.info(self.request, f'No hay tickets anteriores para la placa {plate}.')
+        return self.repeat_source
+
+    def get_initial(self):
+        initial = super().get_initial()
+        source = self.get_repeat_source()
+        if source:
+            initial.update(seller=source['seller'], phone=source['phone'], plate=source['plate'])
+        elif self.request.GET.get('repeat'):
+            initial['plate'] = normalize_plate(self.request.GET['repeat'])
+        return initial
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        TicketDetailFormSet = modelformset_factory(
-            TicketDetail,
-            form=TicketDetailForm,
-            extra=1,  # Una fila extra para agregar
-            can_delete=True,  # Permitir eliminar
-        )
-        if self.request.POST:
-            context['detail_formset'] = TicketDetailFormSet(
-                self.request.POST,
-                queryset=TicketDetail.objects.none()
-            )
-        else:
-            context['detail_formset'] = TicketDetailFormSet(
-                queryset=TicketDetail.objects.none()
-            )
+        context['detail_formset'] = self.get_detail_formset()
+        context['repeat_source'] = self.get_repeat_source()
 
         # Modal de éxito
         if self.request.GET.get('success') and self.request.GET.get('ticket_id'):
             try:
-                ticket = Ticket.objects.get(pk=self.request.GET['ticket_id'])
+                ticket = for_company(Ticket.objects, self.request.company).get(pk=self.request.GET['ticket_id'])
                 context['show_modal'] = True
                 context['created_ticket'] = ticket
             except Ticket.DoesNotExist:
@@ -112,9 +153,8 @@ class TicketCreateView(CreateView):
 
         context['is_edit'] = False
 
-        # Agregar compañía por defecto y su IVA
-        from apps.company.models import Company
-        company = Company.objects.first()
+        # Compañía activa y su IVA
+        company = self.request.company
         if company:
             context['default_company'] = company
             context['iva_percentage'] = company.iva_percentage
@@ -128,22 +168,32 @@ class TicketCreateView(CreateView):
 
         return context
 
+    def get_detail_formset(self):
+        """Formset de detalles; en POST se construye una sola vez y se reutiliza al re-renderizar."""
+        if not hasattr(self, 'detail_formset'):
+            if self.request.POST:
+                self.detail_formset = TicketDetailCreateFormSet(
+                    self.request.POST,
+                    queryset=TicketDetail.objects.none()
+                )
+            else:
+                source = self.get_repeat_source()
+                lines = source['details'] if source else []
+                self.detail_formset = TicketDetailCreateFormSet(
+                    queryset=TicketDetail.objects.none(),
+                    initial=lines
+                )
+                if lines:
+                    # Una fila por cada línea del ticket repetido
+                    self.detail_formset.extra = len(lines)
+        return self.detail_formset
+
     def form_valid(self, form):
-        TicketDetailFormSet = modelformset_factory(
-            TicketDetail,
-            form=TicketDetailForm,
-            extra=1,
-            can_delete=True,
-        )
-        detail_formset = TicketDetailFormSet(
-            self.request.POST,
-            queryset=TicketDetail.objects.none()
-        )
+        detail_formset = self.get_detail_formset()
         
         with transaction.atomic():
-            # Asignar compañía por defecto
-            from apps.company.models import Company
-            form.instance.company = Company.objects.first()
+            # Asignar la compañía activa
+            form.instance.company = self.request.company
             # Copiar IVA de la compañía
             form.instance.iva_percentage = form.instance.company.iva_percentage
             self.object = form.save()
@@ -163,6 +213,8 @@ class TicketCreateView(CreateView):
                 
                 # Actualizar total
                 self.object.update_total()
+                # Notificación al sistema de flota: se envía después, fuera de esta transacción
+                OutboxEvent.ticket_created(self.object, details)
                 messages.success(self.request, f'Ticket {self.object.document_number} creado exitosamente.')
                 
                 # Redirigir con parámetros para modal
@@ -176,7 +228,7 @@ class TicketCreateView(CreateView):
         return super().form_invalid(form)
 
 
-class TicketUpdateView(UpdateView):
+class TicketUpdateView(CompanyScopedMixin, UpdateView):
     """
     Vista para editar un ticket existente con sus detalles.
     """
@@ -187,21 +239,7 @@ class TicketUpdateView(UpdateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        TicketDetailFormSet = modelformset_factory(
-            TicketDetail,
-            form=TicketDetailForm,
-            extra=0,  # No extra en edición
-            can_delete=True,
-        )
-        if self.request.POST:
-            context['detail_formset'] = TicketDetailFormSet(
-                self.request.POST,
-                queryset=self.object.details.all()
-            )
-        else:
-            context['detail_formset'] = TicketDetailFormSet(
-                queryset=self.object.details.all()
-            )
+        context['detail_formset'] = self.get_detail_formset()
         context['is_edit'] = True
         context['default_company'] = self.object.company
         context['iva_percentage'] = self.object.iva_percentage
@@ -215,57 +253,109 @@ class TicketUpdateView(UpdateView):
 
         return context
 
+    def get_detail_formset(self):
+        """Formset de detalles; en POST se construye una sola vez y se reutiliza al re-renderizar."""
+        if not hasattr(self, 'detail_formset'):
+            if self.request.POST:
+                self.detail_formset = TicketDetailUpdateFormSet(
+                    self.request.POST,
+                    queryset=self.object.details.all()
+                )
+            else:
+                self.detail_formset = TicketDetailUpdateFormSet(
+                    queryset=self.object.details.all()
+                )
+        return self.detail_formset
+
     def form_valid(self, form):
-        TicketDetailFormSet = modelformset_factory(
-            TicketDetail,
-            form=TicketDetailForm,
-            extra=0,
-            can_delete=True,
-        )
-        detail_formset = TicketDetailFormSet(
-            self.request.POST,
-            queryset=self.object.details.all()
-        )
-        
-        with transaction.atomic():
-            self.object = form.save()
+        detail_formset = self.get_detail_formset()
+        expected_version = form.cleaned_data.get('version')
+
+        # self.object se leyó al inicio de la petición: si ya cambió no hace falta validar más
+        if expected_version != self.object.version:
+            return self.render_conflict(form)
+
+        if not detail_formset.is_valid():
+            messages.error(self.request, 'Error en los detalles del ticket. Verifique los datos.')
+            return self.form_invalid(form)
+
+        # Verificar que hay al menos un detalle
+        details = detail_formset.save(commit=False)
+        remaining_details = self.object.details.count()
+        new_details = len([d for d in details if not d.pk])
+        deleted_details = len(detail_formset.deleted_forms)
+        if remaining_details - deleted_details + new_details <= 0:
+            messages.error(self.request, 'Debe mantener al menos un producto en el ticket.')
+            return self.form_invalid(form)
+
+        try:
+            with transaction.atomic():
+                # UPDATE condicional sobre la versión: cubre también los detalles, porque
+                # cualquier cambio de un detalle incrementa la versión del ticket
+                Ticket.claim_version(self.object.pk, expected_version)
+                self.object = form.save()
 
-            if detail_formset.is_valid():
                 # Eliminar detalles marcados para eliminación
                 for deleted_form in detail_formset.deleted_forms:
                     if deleted_form.instance.pk:
                         deleted_form.instance.delete()
-                
+
                 # Guardar detalles actualizados y nuevos
-                details = detail_formset.save(commit=False)
-                
-                # Verificar que hay al menos un detalle
-                remaining_details = self.object.details.count()
-                new_details = len([d for d in details if not d.pk])
-                deleted_details = len(detail_formset.deleted_forms)
-                
-                if remaining_details - deleted_details + new_details <= 0:
-                    messages.error(self.request, 'Debe mantener al menos un producto en el ticket.')
-                    return self.form_invalid(form)
-                
                 for detail in details:
                     detail.ticket = self.object
                     detail.save()
-                
+
                 # Actualizar total
                 self.object.update_total()
-                messages.success(self.request, f'Ticket {self.object.document_number} actualizado exitosamente.')
-                return redirect(self.success_url)
-            else:
-                messages.error(self.request, 'Error en los detalles del ticket. Verifique los datos.')
-                return self.form_invalid(form)
+        except TicketVersionConflict:
+            return self.render_conflict(form)
+
+        messages.success(self.request, f'Ticket {self.object.document_number} actualizado exitosamente.')
+        return redirect(self.success_url)
+
+    def render_conflict(self, form):
+        """
+        Otro usuario guardó el ticket mientras se editaba: se vuelve a mostrar el formulario
+        con los datos ingresados, los detalles actuales y las diferencias, y con la versión
+        actual para que el usuario pueda guardar de nuevo después de revisarlas.
+        """
+        current = get_object_or_404(Ticket.objects.select_related('company'), pk=self.object.pk)
+        current_details = list(current.details.all())
+        detail_formset = self.get_detail_formset()
+
+        fields = []
+        for name in ('seller', 'phone', 'plate'):
+            submitted = form.cleaned_data.get(name) or ''
+            stored = getattr(current, name) or ''
+            if submitted != stored:
+                fields.append({'label': Ticket._meta.get_field(name).verbose_name, 'submitted': submitted, 'current': stored})
+        submitted_lines = [
+            data for data in (getattr(detail_form, 'cleaned_data', None) for detail_form in detail_formset.forms)
+            if data and data.get('product') and not data.get('DELETE')
+        ]
+
+        data = self.request.POST.copy()
+        data['version'] = current.version
+        self.object = current
+        self.detail_formset = TicketDetailUpdateFormSet(queryset=TicketDetail.objects.filter(ticket=current))
+        messages.error(
+            self.request,
+            'Otro usuario modificó este ticket mientras lo editaba. Revise las diferencias y vuelva a guardar.'
+        )
+        return self.render_to_response(self.get_context_data(
+            form=self.get_form_class()(data, instance=current, company=current.company),
+            conflict={'fields': fields, 'submitted_lines': submitted_lines, 'current_lines': current_details},
+        ))
 
     def form_invalid(self, form):
+        if 'version' in form.errors:
+            # Sin la versión vista (formulario antiguo o alterado) no se sobrescribe a ciegas
+            return self.render_conflict(form)
         messages.error(self.request, 'Error al actualizar el ticket. Verifique los datos.')
         return super().form_invalid(form)
 
 
-class TicketDeleteView(DeleteView):
+class TicketDeleteView(CompanyScopedMixin, DeleteView):
     """
     Vista para eliminar un ticket.
     """
@@ -278,23 +368,102 @@ class TicketDeleteView(DeleteView):
         return super().delete(request, *args, **kwargs)
 
 
-class TicketPrintView(DetailView):
+class ArchivedTicketListView(CompanyScopedMixin, ListView):
+    """
+    Vista para buscar tickets archivados (depurados de la base) de la compañía activa por número o placa.
+    """
+    model = ArchivedTicket
+    template_name = 'ticket/archived_ticket_list.html'
+    context_object_name = 'archived_tickets'
+    paginate_by = 20
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        search = self.request.GET.get('search', '').strip()
+        if search:
+            queryset = queryset.filter(document_number=search) | queryset.filter(plate=normalize_plate(search))
+        return queryset
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        # Breadcrumbs
+        context['breadcrumb_list'] = [
+            {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
+            {'label': 'Tickets', 'url': reverse_lazy('ticket:ticket_list')},
+            {'label': 'Archivo'}
+        ]
+        return context
+
+
+class ArchivedTicketDetailView(CompanyScopedMixin, DetailView):
+    """
+    Vista de un ticket archivado; los datos se leen del archivo comprimido a pedido.
+    """
+    model = ArchivedTicket
+    template_name = 'ticket/archived_ticket_detail.html'
+    context_object_name = 'archived_ticket'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        try:
+            context['data'] = read_archived_ticket(self.object)
+        except OSError:
+            messages.error(self.request, 'No se pudo leer el archivo del ticket.')
+            context['data'] = None
+        # Breadcrumbs
+        context['breadcrumb_list'] = [
+            {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
+            {'label': 'Archivo', 'url': reverse_lazy('ticket:archived_ticket_list')},
+            {'label': f'Ticket #{self.object.document_number}'}
+        ]
+        return context
+
+
+def filter_print_range(queryset, params):
+    """Filtra por date_from/date_to (AAAA-MM-DD) de la impresión en masa; fechas inválidas se ignoran."""
+    try:
+        date_from = parse_date(params.get('date_from') or '')
+        date_to = parse_date(params.get('date_to') or '')
+    except ValueError:
+        date_from = date_to = None
+    # Rango sobre la columna (no sobre su fecha): usa el índice y descarta particiones
+    if date_from:
+        queryset = queryset.filter(date__gte=start_of_day(date_from))
+    if date_to:
+        queryset = queryset.filter(date__lt=start_of_day(date_to + timedelta(days=1)))
+    return queryset
+
+
+# Tamaño pedido -> clase del body en static/css/print/ticket_print.css
+PRINT_SIZE_CLASSES = {'58': '58', '80': '80', 'half': 'half', '88': 'half', 'A4': 'a4'}
+
+
+class TicketPrintView(CompanyScopedMixin, ConditionalGetMixin, DetailView):
     """
     Vista para imprimir ticket en diferentes formatos.
+    Responde 304 si el navegador ya tiene la versión actual del ticket en ese tamaño.
     """
     model = Ticket
     template_name = 'ticket/ticket_print.html'
     context_object_name = 'ticket'
 
+    def get_last_modified(self):
+        return Ticket.get_last_modified(self.kwargs['pk'], getattr(self.request.company, 'pk', None))
+
+    def get_etag_variant(self):
+        return (self.request.GET.get('size', 'half'),)
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['details'] = self.object.details.all()
         # Opciones: 58, 80, half (media hoja A4), A4
         context['size'] = self.request.GET.get('size', 'half')
+        # Clase del body en ticket_print.css; '88' es el alias anterior de media hoja
+        context['size_class'] = PRINT_SIZE_CLASSES.get(context['size'], 'a4')
         return context
 
 
-class TicketMassPrintView(ListView):
+class TicketMassPrintView(CompanyScopedMixin, ListView):
     """
     Vista para imprimir múltiples tickets en masa (hasta 6 por página).
     """
@@ -304,15 +473,7 @@ class TicketMassPrintView(ListView):
 
     def get_queryset(self):
         queryset = super().get_queryset().select_related('company')
-        date_from = self.request.GET.get('date_from')
-        date_to = self.request.GET.get('date_to')
-        if date_from and date_to:
-            queryset = queryset.filter(date__date__range=[date_from, date_to])
-        elif date_from:
-            queryset = queryset.filter(date__date__gte=date_from)
-        elif date_to:
-            queryset = queryset.filter(date__date__lte=date_to)
-        return queryset.order_by('-date')  # Máximo 6 tickets
+        return filter_print_range(queryset, self.request.GET).order_by('-date')  # Máximo 6 tickets
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -320,13 +481,68 @@ class TicketMassPrintView(ListView):
             ticket.details_list = ticket.details.all()
         context['date_from'] = self.request.GET.get('date_from', '')
         context['date_to'] = self.request.GET.get('date_to', '')
+        # El PDF desde la web exige un rango y un máximo de tickets (ver ticket_mass_pdf)
+        context['pdf_limit'] = settings.TICKET_PDF_WEB_LIMIT
+        return context
+
+
+class TicketImportView(FormView):
+    """
+    Vista para importar tickets desde un archivo Excel o CSV.
+    Muestra el resumen y el reporte de errores por fila en la misma página.
+    """
+    form_class = TicketImportForm
+    template_name = 'ticket/ticket_import.html'
+    error_limit = 500  # Errores mostrados en pantalla
+
+    def dispatch(self, request, *args, **kwargs):
+        if not request.company:
+            messages.warning(request, 'Debe crear al menos una compañía antes de importar tickets.')
+            return redirect('company:company_list')
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['error_limit'] = self.error_limit
+        # Breadcrumbs
+        context['breadcrumb_list'] = [
+            {'label': 'Dashboard', 'url': reverse_lazy('core:dashboard')},
+            {'label': 'Tickets', 'url': reverse_lazy('ticket:ticket_list')},
+            {'label': 'Importar Tickets'}
+        ]
         return context
 
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        importer = TicketImporter(
+            company=self.request.company,
+            renumber=form.cleaned_data['renumber'],
+            dry_run=form.cleaned_data['dry_run'],
+            error_limit=self.error_limit,
+        )
+        try:
+            result = importer.import_file(upload.file, upload.name)
+        except TicketImportError as error:
+            messages.error(self.request, str(error))
+            return self.form_invalid(form)
+
+        if importer.dry_run:
+            messages.success(self.request, f'Validación completa: {result.rows_read} filas leídas, {result.error_count} errores.')
+        elif result.has_errors:
+            messages.warning(self.request, f'Se importaron {result.tickets_created} tickets; {result.documents_rejected} tickets fueron rechazados.')
+        else:
+            messages.success(self.request, f'Se importaron {result.tickets_created} tickets ({result.details_created} detalles) exitosamente.')
+        return self.render_to_response(self.get_context_data(form=form, result=result))
+
 
 def export_tickets_excel(request):
     """
-    Vista para exportar todos los tickets a Excel.
+    Vista para exportar todos los tickets de la compañía activa a Excel.
     """
+    # openpyxl se importa al usarse: cargarlo con el módulo alarga el arranque de cada proceso
+    from openpyxl import Workbook
+    from openpyxl.styles import Font, PatternFill
+
     # Crear workbook
     wb = Workbook()
     ws = wb.active
@@ -349,7 +565,7 @@ def export_tickets_excel(request):
         cell.fill = header_fill
 
     # Obtener tickets con detalles
-    tickets = Ticket.objects.select_related('company').prefetch_related('details').order_by('-date')
+    tickets = for_company(Ticket.objects, request.company).select_related('company').prefetch_related('details').order_by('-date')
     
     row_num = 2
     for ticket in tickets:
@@ -393,4 +609,84 @@ def export_tickets_excel(request):
     response['Content-Disposition'] = 'attachment; filename=tickets_export.xlsx'
     
     wb.save(response)
-    return response
\ No newline at end of file
+    return response
+
+
+CHANGES_DEFAULT_LIMIT = 500
+CHANGES_MAX_LIMIT = 5000
+
+
+@require_GET
+def ticket_changes(request):
+    """
+    Feed incremental de cambios de tickets y detalles de la compañía activa para sistemas
+    externos (ERP/contabilidad). Parámetros: since (next_since de la página anterior, 0 para empezar) y limit.
+    Devuelve los cambios posteriores a since en orden de entrega (ver TicketChange) y next_since
+    para la siguiente página. Los ids no son crecientes: el cursor es el último id entregado.
+    """
+    try:
+        since = int(request.GET.get('since', 0))
+        limit = min(int(request.GET.get('limit', CHANGES_DEFAULT_LIMIT)), CHANGES_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'since y limit deben ser enteros.'}, status=400)
+    if since < 0 or limit <= 0:
+        return JsonResponse({'error': 'since debe ser >= 0 y limit > 0.'}, status=400)
+
+    if not request.company:
+        return JsonResponse({'results': [], 'next_since': since, 'has_more': False})
+    # Solo transacciones terminadas: una en curso con ids menores no queda detrás del cursor
+    changes = list(
+        TicketChange.committed_after(since, request.company.pk)
+        .values('id', 'created_at', 'entity', 'action', 'object_id', 'ticket_ref', 'data')[:limit + 1]
+    )
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    return JsonResponse({
+        'results': changes,
+        'next_since': changes[-1]['id'] if changes else since,
+        'has_more': has_more,
+    })
+
+
+@require_GET
+def ticket_plate_history(request):
+    """
+    Últimos tickets de una placa (parámetros: plate y limit), del más reciente al más antiguo.
+    Responde desde la caché del historial; la primera consulta usa el índice (plate, date).
+    """
+    plate = normalize_plate(request.GET.get('plate'))
+    if not plate:
+        return JsonResponse({'error': 'Debe indicar la placa.'}, status=400)
+    try:
+        limit = min(int(request.GET.get('limit', HISTORY_DEFAULT_LIMIT)), HISTORY_MAX_LIMIT)
+    except ValueError:
+        return JsonResponse({'error': 'limit debe ser un entero.'}, status=400)
+    return JsonResponse({
+        'plate': plate,
+        'results': get_plate_history(request.company.pk, plate, limit=max(limit, 1)) if request.company else [],
+        'repeat_url': f"{reverse('ticket:ticket_create')}?{urlencode({'repeat': plate})}",
+    })
+
+
+@require_GET
+def outbox_metrics(request):
+    """
+    Métricas del outbox de la compañía activa en formato de texto de Prometheus: eventos
+    pendientes, descartados y lag (antigüedad del pendiente más viejo) del envío al sistema de flota.
+    """
+    if request.company:
+        metrics = get_outbox_metrics(request.company.pk)
+    else:
+        metrics = {'pending': 0, 'dead': 0, 'lag_seconds': 0.0}
+    lines = [
+        '# HELP ticket_outbox_pending_events Eventos pendientes de envío.',
+        '# TYPE ticket_outbox_pending_events gauge',
+        f'ticket_outbox_pending_events {metrics["pending"]}',
+        '# HELP ticket_outbox_dead_events Eventos descartados tras agotar los reintentos.',
+        '# TYPE ticket_outbox_dead_events gauge',
+        f'ticket_outbox_dead_events {metrics["dead"]}',
+        '# HELP ticket_outbox_lag_seconds Antigüedad del evento pendiente más viejo.',
+        '# TYPE ticket_outbox_lag_seconds gauge',
+        f'ticket_outbox_lag_seconds {metrics["lag_seconds"]:.3f}',
+    ]
+    return HttpResponse('\n'.join(lines) + '\n', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,40 @@
+"""
+Configuración de gunicorn para producción:
+
+    gunicorn -c python:config.gunicorn config.wsgi:application
+
+preload_app carga Django una sola vez en el proceso maestro; when_ready lo calienta
+(apps.core.warmup) y congela el recolector de basura para que los workers compartan
+esas páginas de memoria por copy-on-write. Cada worker abre su conexión a la base en
+post_fork, antes de aceptar peticiones.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', 'unix:/run/gunicorn.sock')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+# Reciclar workers de a poco acota el crecimiento de memoria sin reinicios simultáneos
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = 200
+preload_app = True
+accesslog = '-'
+
+
+def when_ready(server):
+    from apps.core.warmup import warm_up
+
+    elapsed = warm_up()
+    # Los objetos creados hasta aquí no los recorre el GC de los workers: no se copian sus páginas
+    gc.freeze()
+    server.log.info('Aplicación precalentada en %.2fs', elapsed)
+
+
+def post_fork(server, worker):
+    from apps.core.warmup import warm_up_worker
+
+    elapsed = warm_up_worker()
+    server.log.info('Worker %s listo en %.2fs', worker.pid, elapsed)
@@ -34,6 +34,47 @@ DEBUG = env('DEBUG')
 
 ALLOWED_HOSTS = env.list('ALLOWED_HOSTS', default=['*'])
 
+# Versión del despliegue: forma parte de los ETag para invalidar páginas cacheadas al cambiar plantillas
+RELEASE_VERSION = env('RELEASE_VERSION', default='1')
+
+# Comprobantes electrónicos del SRI
+SRI_ENVIRONMENT = env('SRI_ENVIRONMENT', default='1')  # 1 = pruebas, 2 = producción
+SRI_ESTABLISHMENT = env('SRI_ESTABLISHMENT', default='001')
+SRI_EMISSION_POINT = env('SRI_EMISSION_POINT', default='001')
+SRI_XSD_PATH = env('SRI_XSD_PATH', default='')  # XSD oficial de la factura; vacío = sin validación
+SRI_SIGNER = env('SRI_SIGNER', default='apps.ticket.services.sri.UnsignedSigner')
+SRI_SUBMITTER = env('SRI_SUBMITTER', default='apps.ticket.services.sri.OfflineSubmitter')
+
+# Depuración y archivo de tickets antiguos (el SRI exige conservar los comprobantes 7 años)
+TICKET_RETENTION_DAYS = env.int('TICKET_RETENTION_DAYS', default=7 * 365)
+TICKET_ARCHIVE_DIR = env('TICKET_ARCHIVE_DIR', default=str(BASE_DIR / 'archive'))
+PURGE_CHUNK_SIZE = env.int('PURGE_CHUNK_SIZE', default=1000)
+
+# PDF de tickets generados en el servidor (WeasyPrint): caché por ticket y procesos para la impresión en masa
+TICKET_PDF_DIR = env('TICKET_PDF_DIR', default=str(BASE_DIR / 'pdf_cache'))
+TICKET_PDF_WORKERS = env.int('TICKET_PDF_WORKERS', default=os.cpu_count() or 1)
+# Máximo de tickets del PDF en masa desde la web (la petición espera la generación); más, con render_ticket_pdfs
+TICKET_PDF_WEB_LIMIT = env.int('TICKET_PDF_WEB_LIMIT', default=200)
+
+# Particionado mensual de tickets y detalles (solo PostgreSQL 13+; lo aplica ticket_partitions --convert)
+TICKET_PARTITIONING = env.bool('TICKET_PARTITIONING', default=False)
+TICKET_PARTITION_MONTHS_AHEAD = env.int('TICKET_PARTITION_MONTHS_AHEAD', default=3)  # Meses futuros con partición creada
+
+# Notificación de tickets nuevos al sistema de gestión de flota (outbox + dispatch_outbox)
+OUTBOX_ENDPOINT_URL = env('OUTBOX_ENDPOINT_URL', default='')  # Vacío = el dispatcher no envía
+OUTBOX_AUTH_TOKEN = env('OUTBOX_AUTH_TOKEN', default='')
+OUTBOX_BATCH_SIZE = env.int('OUTBOX_BATCH_SIZE', default=100)
+OUTBOX_MAX_ATTEMPTS = env.int('OUTBOX_MAX_ATTEMPTS', default=10)
+OUTBOX_TIMEOUT_SECONDS = env.float('OUTBOX_TIMEOUT_SECONDS', default=10.0)
+
+# Ingesta de ventas de los surtidores (ingest_dispensers): socket local, lotes y espera de asignación
+DISPENSER_HOST = env('DISPENSER_HOST', default='127.0.0.1')
+DISPENSER_PORT = env.int('DISPENSER_PORT', default=9750)
+DISPENSER_BATCH_SIZE = env.int('DISPENSER_BATCH_SIZE', default=200)
+DISPENSER_FLUSH_SECONDS = env.float('DISPENSER_FLUSH_SECONDS', default=0.2)  # Espera máxima para completar un lote
+DISPENSER_MATCH_TIMEOUT_MINUTES = env.int('DISPENSER_MATCH_TIMEOUT_MINUTES', default=30)  # Luego la venta queda "sin asignación"
+DISPENSER_ASSIGNMENT_WINDOW_MINUTES = env.int('DISPENSER_ASSIGNMENT_WINDOW_MINUTES', default=15)  # Antigüedad máxima de la asignación al despachar
+
 # Definición de aplicaciones
 INSTALLED_APPS = [
     'django.contrib.admin',
@@ -56,6 +97,7 @@ THIRD_PARTY_APPS = [
 LOCAL_APPS = [
     'apps.core',
     'apps.company',
+    'apps.product',
     'apps.ticket'
 ]
 
@@ -69,10 +111,14 @@ TAILWIND_APP_NAME = 'theme'
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Gzip de páginas y exportaciones de texto (también en streaming); antes de los que leen el cuerpo
+    'apps.core.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # Compañía (estación) activa en request.company
+    'apps.company.tenancy.ActiveCompanyMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -94,7 +140,8 @@ TEMPLATES = [
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages'
+                'django.contrib.messages.context_processors.messages',
+                'apps.company.tenancy.active_company',
             ],
         },
     },
@@ -115,9 +162,29 @@ DATABASES = {
         'PASSWORD': env('DB_PASSWORD'),
         'HOST': env('DB_HOST'),
         'PORT': env('DB_PORT'),
+        # Conexiones persistentes: los workers reutilizan la conexión abierta en el calentamiento
+        'CONN_MAX_AGE': env.int('DB_CONN_MAX_AGE', default=60),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Caché: local por proceso salvo que CACHE_URL indique una compartida (p. ej. redis://127.0.0.1:6379/1)
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://gestortickets'),
+}
+
+# Sesiones y mensajes fuera de la base en cada petición (medición: manage.py measure_request_storage)
+# cached_db lee la sesión desde la caché y solo consulta django_session si no está. Solo es seguro con
+# una caché compartida: con una local por proceso, cada worker guarda su copia hasta que la sesión
+# vence y no ve el cierre de sesión ni el cambio de compañía hecho en otro worker. Sin CACHE_URL las
+# sesiones quedan en la base.
+SESSION_ENGINE = env(
+    'SESSION_ENGINE',
+    default='django.contrib.sessions.backends.cached_db' if env('CACHE_URL', default='') else 'django.contrib.sessions.backends.db',
+)
+# Mensajes en una cookie firmada: mostrarlos no lee ni escribe la sesión (límite ~4 KB por respuesta)
+MESSAGE_STORAGE = env('MESSAGE_STORAGE', default='django.contrib.messages.storage.cookie.CookieStorage')
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -162,6 +229,13 @@ if not DEBUG:
 STATIC_URL = '/static/'
 STATICFILES_DIRS = [BASE_DIR / "static",]
 STATIC_ROOT = BASE_DIR / 'staticfiles'
+# collectstatic agrega el hash del contenido al nombre y una copia .gz para gzip_static de nginx
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': env('STATICFILES_BACKEND', default='apps.core.compression.CompressedManifestStaticFilesStorage')},
+}
+# Respuestas completas más chicas que esto se envían sin comprimir
+COMPRESSION_MIN_BYTES = env.int('COMPRESSION_MIN_BYTES', default=1024)
 
 #Npm configuracion para Tailwin
 NPM_BIN_PATH = r"D:\Node Js\npm.cmd"
\ No newline at end of file
@@ -0,0 +1,54 @@
+// Filtros y paginación de listados sin recargar la página: se pide por XHR solo el
+// fragmento de resultados (ver apps/core/fragments.py) y se reemplaza el contenedor.
+document.addEventListener('DOMContentLoaded', function() {
+    const results = document.querySelector('[data-fragment-results]');
+    if (!results) return;
+    const form = document.querySelector(`[data-fragment-form="${results.id}"]`);
+
+    function loadResults(url, push) {
+        results.classList.add('opacity-50');
+        return fetch(url, { headers: { 'X-Requested-With': 'XMLHttpRequest' } })
+            .then(res => {
+                if (!res.ok) throw new Error(res.status);
+                return res.text();
+            })
+            .then(html => {
+                results.innerHTML = html;
+                if (push) history.pushState({ fragment: true }, '', url);
+            })
+            .catch(() => {
+                // Si el fragmento falla, la navegación normal sigue funcionando
+                window.location.href = url;
+            })
+            .finally(() => results.classList.remove('opacity-50'));
+    }
+
+    if (form) {
+        form.addEventListener('submit', function(e) {
+            e.preventDefault();
+            const params = new URLSearchParams(new FormData(form));
+            for (const [key, value] of [...params]) {
+                if (!value) params.delete(key);
+            }
+            const query = params.toString();
+            loadResults(window.location.pathname + (query ? `?${query}` : ''), true);
+        });
+    }
+
+    // Enlaces de paginación
+    results.addEventListener('click', function(e) {
+        const link = e.target.closest('a[href^="?"]');
+        if (!link || e.ctrlKey || e.metaKey || e.shiftKey) return;
+        e.preventDefault();
+        loadResults(window.location.pathname + link.getAttribute('href'), true);
+    });
+
+    // Recarga pedida desde otros scripts (p. ej. actualizaciones en vivo), sin tocar el historial
+    results.addEventListener('fragment:reload', function() {
+        loadResults(window.location.href, false);
+    });
+
+    window.addEventListener('popstate', function() {
+        loadResults(window.location.href, false);
+    });
+});
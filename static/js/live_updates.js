@@ -0,0 +1,83 @@
+// Actualizaciones en vivo por Server-Sent Events (ver apps/ticket/services/live.py):
+// contadores y tickets recientes del dashboard, y recarga del fragmento del listado.
+(function() {
+    const script = document.currentScript;
+    const RECENT_LIMIT = 5;
+    const RELOAD_DELAY = 1000;
+
+    document.addEventListener('DOMContentLoaded', function() {
+        const counters = document.querySelectorAll('[data-live-counter]');
+        const recent = document.querySelector('[data-live-recent]');
+        const results = document.querySelector('[data-live-results]');
+        if (!script || !window.EventSource || (!counters.length && !recent && !results)) return;
+
+        let reloadTimer = null;
+
+        function reloadResults() {
+            // Varias altas seguidas (importación, surtidores) se agrupan en una sola recarga
+            if (reloadTimer) return;
+            reloadTimer = setTimeout(function() {
+                reloadTimer = null;
+                results.dispatchEvent(new CustomEvent('fragment:reload'));
+            }, RELOAD_DELAY);
+        }
+
+        function cell(text) {
+            const td = document.createElement('td');
+            td.className = 'px-4 py-3 whitespace-nowrap text-sm text-gray-900';
+            td.textContent = text;
+            return td;
+        }
+
+        function buildRecentRow(ticket) {
+            const row = document.createElement('tr');
+            row.className = 'hover:bg-gray-50';
+            row.dataset.ticketId = ticket.id;
+            row.append(cell(ticket.date), cell(ticket.client), cell(ticket.company), cell(`$${ticket.total}`));
+            const action = document.createElement('td');
+            action.className = 'px-4 py-3 whitespace-nowrap text-sm font-medium';
+            const link = document.createElement('a');
+            link.href = ticket.url;
+            link.className = 'text-indigo-600 hover:text-indigo-900';
+            link.textContent = 'Ver';
+            action.appendChild(link);
+            row.appendChild(action);
+            return row;
+        }
+
+        function updateRecent(action, ticket) {
+            const current = recent.querySelector(`[data-ticket-id="${ticket.id}"]`);
+            if (action === 'delete') {
+                if (current) current.remove();
+                return;
+            }
+            if (current) {
+                current.replaceWith(buildRecentRow(ticket));
+            } else if (action === 'insert') {
+                recent.prepend(buildRecentRow(ticket));
+                while (recent.children.length > RECENT_LIMIT) recent.lastElementChild.remove();
+            }
+        }
+
+        const source = new EventSource(script.dataset.streamUrl);
+
+        source.addEventListener('counters', function(e) {
+            const data = JSON.parse(e.data);
+            counters.forEach(function(element) {
+                const value = data[element.dataset.liveCounter];
+                if (value !== undefined) element.textContent = value;
+            });
+        });
+
+        source.addEventListener('ticket', function(e) {
+            const data = JSON.parse(e.data);
+            if (recent) updateRecent(data.action, data.ticket);
+            if (results) reloadResults();
+        });
+
+        // El servidor cerró el stream por no consumir a tiempo: se pudieron perder cambios
+        source.addEventListener('reload', function() {
+            if (results) reloadResults();
+        });
+    });
+})();
@@ -9,13 +9,13 @@ document.addEventListener('DOMContentLoaded', function() {
         const template = `
             <tr class="detail-form border-b border-gray-200 hover:bg-gray-50" data-form-index="${index}">
                 <td class="px-2 py-1.5">
-                    <input type="text" name="form-${index}-product" maxlength="255" required class="block w-full px-2 py-1 text-xs border border-gray-300 rounded focus:outline-none focus:ring-1 focus:ring-slate-500 focus:border-slate-500" id="id_form-${index}-product">
+                    <input type="text" name="form-${index}-product" maxlength="255" required list="product-catalog" autocomplete="off" class="block w-full px-2 py-1 text-xs border border-gray-300 rounded focus:outline-none focus:ring-1 focus:ring-slate-500 focus:border-slate-500" id="id_form-${index}-product">
                 </td>
                 <td class="px-2 py-1.5">
                     <input type="number" name="form-${index}-quantity" step="0.00000001" min="0" required class="block w-full px-2 py-1 text-xs text-right border border-gray-300 rounded focus:outline-none focus:ring-1 focus:ring-slate-500 focus:border-slate-500 quantity-input" id="id_form-${index}-quantity">
                 </td>
                 <td class="px-2 py-1.5">
-                    <input type="number" name="form-${index}-unit_price" step="0.00000001" min="0" required class="block w-full px-2 py-1 text-xs text-right border border-gray-300 rounded focus:outline-none focus:ring-1 focus:ring-slate-500 focus:border-slate-500 price-input" id="id_form-${index}-unit_price">
+                    <input type="number" name="form-${index}-unit_price" step="0.00000001" min="0" class="block w-full px-2 py-1 text-xs text-right border border-gray-300 rounded focus:outline-none focus:ring-1 focus:ring-slate-500 focus:border-slate-500 price-input" id="id_form-${index}-unit_price">
                 </td>
                 <td class="px-2 py-1.5 text-right">
                     <span class="text-xs font-medium text-gray-700 row-subtotal">$0.00</span>
@@ -107,6 +107,62 @@ document.addEventListener('DOMContentLoaded', function() {
         }
     });
 
+    // Autocompletado de productos desde el catálogo
+    const detailFormset = document.getElementById('detail-formset');
+    const productCatalog = document.getElementById('product-catalog');
+    const autocompleteUrl = detailFormset ? detailFormset.dataset.autocompleteUrl : null;
+    const catalogPrices = {};
+    let autocompleteTimer = null;
+
+    function loadSuggestions(query) {
+        fetch(`${autocompleteUrl}?q=${encodeURIComponent(query)}`)
+            .then(response => response.json())
+            .then(data => {
+                productCatalog.innerHTML = '';
+                data.results.forEach(product => {
+                    catalogPrices[product.name] = product.unit_price;
+                    const option = document.createElement('option');
+                    option.value = product.name;
+                    productCatalog.appendChild(option);
+                });
+            })
+            .catch(() => {});
+    }
+
+    document.addEventListener('input', function(e) {
+        if (!autocompleteUrl || !e.target.name || !e.target.name.endsWith('-product')) {
+            return;
+        }
+        const query = e.target.value.trim();
+        // Al elegir una sugerencia, completar el precio si está vacío
+        if (catalogPrices[query] !== undefined) {
+            const priceInput = e.target.closest('.detail-form').querySelector('input[name*="unit_price"]');
+            if (priceInput && !priceInput.value) {
+                priceInput.value = catalogPrices[query];
+                updateTotals();
+            }
+            return;
+        }
+        clearTimeout(autocompleteTimer);
+        if (query.length >= 1) {
+            autocompleteTimer = setTimeout(() => loadSuggestions(query), 150);
+        }
+    });
+
+    // Repetir el último ticket de la placa: recarga el formulario precargado
+    const repeatBtn = document.getElementById('repeat-last-ticket');
+    if (repeatBtn) {
+        repeatBtn.addEventListener('click', function() {
+            const plateInput = document.querySelector('input[name="plate"]');
+            const plate = plateInput ? plateInput.value.trim() : '';
+            if (!plate) {
+                plateInput.focus();
+                return;
+            }
+            window.location.href = `${repeatBtn.dataset.url}?repeat=${encodeURIComponent(plate)}`;
+        });
+    }
+
     // Calcular totales iniciales
     updateTotals();
 });
\ No newline at end of file
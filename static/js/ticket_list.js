@@ -1,10 +1,11 @@
 document.addEventListener('DOMContentLoaded', function() {
-    // Manejar eliminación de tickets
-    document.querySelectorAll('.delete-ticket').forEach(link => {
-        link.addEventListener('click', function(e) {
+    // Manejar eliminación de tickets (delegado: los resultados se reemplazan al filtrar)
+    document.addEventListener('click', function(e) {
+        const link = e.target.closest('.delete-ticket');
+        if (link) {
             e.preventDefault();
-            const url = this.getAttribute('data-url');
-            const name = this.getAttribute('data-name');
+            const url = link.getAttribute('data-url');
+            const name = link.getAttribute('data-name');
 
             Swal.fire({
                 title: '¿Eliminar Ticket?',
@@ -32,6 +33,6 @@ document.addEventListener('DOMContentLoaded', function() {
                     form.submit();
                 }
             });
-        });
+        }
     });
 });
\ No newline at end of file